@@ -3,8 +3,9 @@ from fastapi import FastAPI
 from pydantic import BaseModel  # 数据验证库
 from core.middleware import add_middlewares
 from core.exception_handler import add_exception_handlers
-from app.routers import router
+from app.routers import router, stream_router
 from core.logger import logger
+from core.executor import shutdown_blocking_executor
 # 创建 FastAPI 实例
 app = FastAPI(title="Quant Data API")
 # 添加中间件和异常处理
@@ -12,6 +13,13 @@ add_middlewares(app)
 add_exception_handlers(app)
 # 注册所有路由
 app.include_router(router)
+# 实时推送（WebSocket / SSE）
+app.include_router(stream_router)
+
+@app.on_event("shutdown")
+def shutdown_executor():
+    # 关闭阻塞任务线程池
+    shutdown_blocking_executor()
 
 # Swagger UI：访问 http://127.0.0.1:8000/docs
 # ReDoc：访问 http://127.0.0.1:8000/redoc
@@ -1 +1,2 @@
-from .router import router
\ No newline at end of file
+from .router import router
+from .stream_router import stream_router
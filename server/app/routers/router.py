@@ -1,7 +1,9 @@
 from core.logger import logger
 from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
 from app.services.data import data_service
 from core.response import success, error
+from core.executor import iter_blocking, run_blocking
 from typing import Optional
 router = APIRouter()
 # 1.1.1 获取所有股票列表
@@ -22,7 +24,7 @@ async def get_all_stocks_api(
     :param page_size: 每页数量
     :return: 股票列表
     """
-    result = data_service.get_all_stocks(
+    result = await run_blocking(source, data_service.get_all_stocks,
         source=source, 
         market=market, 
         page=page, 
@@ -47,7 +49,7 @@ async def get_all_concepts_api(
     :param concept: 概念板块名称
     :return: 概念板块成分股列表
     """
-    result = data_service.get_concept_stocks(
+    result = await run_blocking(source, data_service.get_concept_stocks,
         source=source, 
         fields=fields,
         page=page,
@@ -75,7 +77,7 @@ async def get_concept_constituent_stocks_api(
     :param page_size: 每页数量
     :return: 概念板块成分股列表
     """
-    result = data_service.get_concept_constituent_stocks(
+    result = await run_blocking(source, data_service.get_concept_constituent_stocks,
         source=source,
         concept_identifier=concept_identifier,
         fields=fields,
@@ -110,7 +112,7 @@ async def get_stock_history_api(
     :param page_size: 每页数量
     :return: 股票历史数据
     """
-    result = data_service.get_stock_history(
+    result = await run_blocking(source, data_service.get_stock_history,
         source=source, 
         code=code, 
         market=market, 
@@ -124,6 +126,56 @@ async def get_stock_history_api(
         return success(data=result.get("data"), message=result.get("message", "Success"))
     return error(message=result.get("message", "Unknown error"))
 
+# 1.2.2 批量获取多只股票历史数据
+@router.get("/data/history/batch", tags=["Data"])
+async def get_batch_stock_history_api(
+    source: str = "akshare",
+    codes: Optional[str] = Query(None, description="股票代码列表(逗号分隔)"),
+    market: Optional[str] = Query(None, description="交易所(SH/SZ/BJ/KE/CY)，未指定codes时取全市场"),
+    concept_identifier: Optional[str] = Query(None, description="概念板块代码或名称，未指定codes时取成分股"),
+    start_date: str = None,
+    end_date: str = None,
+    fields: str = None,
+    max_workers: Optional[int] = Query(None, ge=1, le=data_service.BATCH_HISTORY_MAX_WORKERS, description="并发线程数"),
+    format: str = Query("json", description="返回格式：json（合并长表）/ndjson（逐只股票流式输出）"),
+):
+    """
+    批量获取多只股票历史数据
+    :param source: 数据源
+    :param codes: 股票代码列表(逗号分隔)
+    :param market: 交易所
+    :param concept_identifier: 概念板块代码或名称
+    :param start_date: 开始日期
+    :param end_date: 结束日期
+    :param fields: 返回字段,逗号分隔
+    :param max_workers: 并发线程数（不超过 BATCH_HISTORY_MAX_WORKERS）
+    :param format: 返回格式
+    :return: 带 symbol 列的长表，或 NDJSON 流
+    """
+    if format == "ndjson":
+        try:
+            code_list = await run_blocking(source, data_service.resolve_batch_codes, source, codes, market, concept_identifier)
+        except Exception as e:
+            return error(message=f"获取失败：{e}")
+        # 与 json 格式一样占用数据源的一个并发名额，逐块在共享线程池中取数
+        return StreamingResponse(
+            iter_blocking(source, data_service.stream_batch_stock_history(source, code_list, start_date, end_date, fields, max_workers)),
+            media_type="application/x-ndjson"
+        )
+    result = await run_blocking(source, data_service.get_batch_stock_history,
+        source=source,
+        codes=codes,
+        market=market,
+        concept_identifier=concept_identifier,
+        start_date=start_date,
+        end_date=end_date,
+        fields=fields,
+        max_workers=max_workers
+    )
+    if result.get("status") == "success":
+        return success(data=result.get("data"), message=result.get("message", "Success"))
+    return error(message=result.get("message", "Unknown error"))
+
 # 1.3.1 获取股票实时数据
 @router.get("/quotes/realtime", tags=["Quotes"])
 async def get_realtime_quotes_api(
@@ -131,7 +183,8 @@ async def get_realtime_quotes_api(
     codes: str = None,
     fields: str = None,
     page: Optional[int] = Query(None, description="页码"),
-    page_size: Optional[int] = Query(20, description="每页数量")
+    page_size: Optional[int] = Query(20, description="每页数量"),
+    since_version: Optional[int] = Query(None, description="已持有的快照版本号，只返回此后变化的行")
 ):
     """
     获取股票实时行情
@@ -139,14 +192,16 @@ async def get_realtime_quotes_api(
     :param codes: 股票代码列表(逗号分隔)
     :param page: 页码
     :param page_size: 每页数量
+    :param since_version: 已持有的快照版本号
     :return: 实时行情数据
     """
-    result = data_service.get_realtime_quotes(
+    result = await run_blocking(source, data_service.get_realtime_quotes,
         source=source, 
         codes=codes, 
         fields=fields,
         page=page, 
-        page_size=page_size
+        page_size=page_size,
+        since_version=since_version
     )
     if result.get("status") == "success":
         return success(data=result.get("data"), message=result.get("message", "Success"))
@@ -171,7 +226,7 @@ async def get_macro_data_api(
     - PPI: 生产者价格指数
     - PMI: 采购经理指数
     """
-    result = data_service.get_macro_data(
+    result = await run_blocking(source, data_service.get_macro_data,
         source=source, 
         indicator=indicator,
         start_date=start_date, 
@@ -205,7 +260,7 @@ async def get_financial_report_api(
     :param page_size: 每页数量
     :return: 财务数据
     """
-    result = data_service.get_financial_report(
+    result = await run_blocking(source, data_service.get_financial_report,
         source=source, 
         code=code, 
         market=market,
@@ -238,7 +293,7 @@ async def get_stock_fund_flow_api(
     :param page_size: 每页数量
     :return: 股票基金流数据
     """
-    result = data_service.get_stock_fund_flow(
+    result = await run_blocking(source, data_service.get_stock_fund_flow,
         source=source, 
         code=code,
         indicator=indicator,
@@ -270,7 +325,7 @@ async def get_dragon_tiger_list_api(
     :param page_size: 每页数量
     :return: 龙虎榜数据
     """
-    result = data_service.get_dragon_tiger_list(
+    result = await run_blocking(source, data_service.get_dragon_tiger_list,
         source=source, 
         start_date=start_date,
         end_date=end_date,
@@ -303,7 +358,7 @@ async def get_news_sentiment_api(
     :param page_size: 每页数量
     :return: 新闻情感数据
     """
-    result = data_service.get_news_sentiment(
+    result = await run_blocking(source, data_service.get_news_sentiment,
         source=source, 
         symbol=symbol,
         start_date=start_date,
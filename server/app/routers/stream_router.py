@@ -0,0 +1,85 @@
+import asyncio
+from fastapi import APIRouter, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from core.logger import logger
+from core.executor import run_blocking
+from app.services.stream.stream_service import stream_hub, encode_message, STREAM_HEARTBEAT_SECONDS
+
+stream_router = APIRouter()
+
+# 10.1 WebSocket 推送：行情字段变化 + 新信号
+@stream_router.websocket("/ws/stream")
+async def stream_websocket(websocket: WebSocket, symbols: str = None):
+    """
+    实时推送（WebSocket）
+    连接参数 symbols=000001,600000 为初始订阅；连接后可发送
+    {"action": "subscribe", "symbols": [...]} / {"action": "unsubscribe", "symbols": [...]} 调整订阅
+    推送消息：
+    - {"type": "quotes", "version", "full", "data": {代码: {变化字段}}}（订阅后首条为完整行情）
+    - {"type": "signals", "kind": "data_driven"/"event_driven", "data": [信号]}
+    """
+    await websocket.accept()
+    subscription = stream_hub.subscribe(symbols)
+
+    async def reader():
+        while True:
+            request = await websocket.receive_json()
+            action = request.get('action')
+            requested = request.get('symbols') or []
+            if action == 'subscribe':
+                added = stream_hub.update_symbols(subscription, add=requested)
+                # 只为新增代码推送一次完整行情，已订阅的代码继续接收增量
+                if added:
+                    await run_blocking('akshare', stream_hub.send_initial_quotes, subscription, added)
+            elif action == 'unsubscribe':
+                stream_hub.update_symbols(subscription, remove=requested)
+            else:
+                await websocket.send_text(encode_message({'type': 'error', 'message': f'未知操作: {action}'}))
+
+    async def writer():
+        while True:
+            message = await subscription.next_message(timeout=STREAM_HEARTBEAT_SECONDS)
+            await websocket.send_text(encode_message(message or {'type': 'heartbeat'}))
+
+    try:
+        if subscription.symbols:
+            await run_blocking('akshare', stream_hub.send_initial_quotes, subscription)
+        tasks = [asyncio.create_task(reader()), asyncio.create_task(writer())]
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            if task.exception() and not isinstance(task.exception(), WebSocketDisconnect):
+                logger.error(f"[Stream]WebSocket推送异常: {task.exception()}")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        stream_hub.unsubscribe(subscription)
+
+# 10.2 SSE 推送：行情字段变化 + 新信号
+@stream_router.get("/stream/quotes", tags=["Quotes"])
+async def stream_quotes_sse(
+    request: Request,
+    symbols: str = Query(..., description="订阅代码(逗号分隔)"),
+):
+    """
+    实时推送（Server-Sent Events），消息格式与 WebSocket 一致
+    :param symbols: 订阅代码(逗号分隔)
+    """
+    subscription = stream_hub.subscribe(symbols)
+
+    async def event_stream():
+        try:
+            await run_blocking('akshare', stream_hub.send_initial_quotes, subscription)
+            while not await request.is_disconnected():
+                message = await subscription.next_message(timeout=STREAM_HEARTBEAT_SECONDS)
+                if message is None:
+                    # 心跳注释行，防止代理断开空闲连接
+                    yield ": heartbeat\n\n"
+                else:
+                    yield f"event: {message['type']}\ndata: {encode_message(message)}\n\n"
+        finally:
+            stream_hub.unsubscribe(subscription)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
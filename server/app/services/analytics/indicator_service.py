@@ -29,7 +29,12 @@ class IndicatorCalculator:
     提供高兼容性的指标计算功能，支持多种数据格式和参数配置
     """
     
-    def __init__(self):
+    def __init__(self, native: bool = False):
+        """
+        :param native: 原生模式。为True时指标结果直接以float64 DataFrame返回（data字段），
+                       不做NaN清理和字典转换，供内部调用方使用；序列化只在API边界进行
+        """
+        self.native = native
         self.supported_indicators = {
             'ma': self.calculate_moving_averages,
             'ema': self.calculate_exponential_moving_averages,
@@ -61,9 +66,43 @@ class IndicatorCalculator:
         
         return df_copy
     
+    def _native_result(self, df: pd.DataFrame, message: str,
+                       indicator_columns: List[str] = None) -> Dict:
+        """
+        原生模式结果：只保留指标列，转换为float64（无穷大视为缺失），保留原索引
+        """
+        indicator_columns = [col for col in (indicator_columns or []) if col in df.columns]
+        data = df[indicator_columns].apply(pd.to_numeric, errors='coerce').astype(np.float64)
+        data = data.replace([np.inf, -np.inf], np.nan)
+        
+        stats = {}
+        if indicator_columns:
+            counts = data.count()
+            means, stds, mins, maxs = data.mean(), data.std(), data.min(), data.max()
+            for col in indicator_columns:
+                if counts[col] == 0:
+                    continue
+                stats[col] = {
+                    'count': int(counts[col]),
+                    'mean': float(means[col]),
+                    'std': float(stds[col]) if counts[col] > 1 else 0.0,
+                    'min': float(mins[col]),
+                    'max': float(maxs[col])
+                }
+        
+        return {
+            "status": "success",
+            "data": data,
+            "message": message,
+            "indicators": indicator_columns,
+            "statistics": stats
+        }
+    
     def _format_result(self, df: pd.DataFrame, message: str, 
                       indicator_columns: List[str] = None) -> Dict:
         """格式化返回结果"""
+        if self.native:
+            return self._native_result(df, message, indicator_columns)
         
         try:
             # 第一步：数据清理
@@ -249,9 +288,9 @@ class IndicatorCalculator:
                 logger.warning(f"[Analytics]RSI 没有有效值")
             
             result_df[rsi_column] = pd.to_numeric(result_df[rsi_column], errors='coerce')
-            # 关键步骤：添加数据清理
-            from common.utils import clean_numeric_data
-            result_df = clean_numeric_data(result_df)
+            # 关键步骤：添加数据清理（原生模式保持float64，不做清理）
+            if not self.native:
+                result_df = clean_numeric_data(result_df)
             
             return self._format_result(result_df, "RSI指标计算完成", [rsi_column])
             
@@ -301,9 +340,9 @@ class IndicatorCalculator:
                 result_df[rsi_column] = pd.to_numeric(result_df[rsi_column], errors='coerce')
                 rsi_columns.append(rsi_column)
             
-            # 数据清理
-            from common.utils import clean_numeric_data
-            result_df = clean_numeric_data(result_df)
+            # 数据清理（原生模式保持float64，不做清理）
+            if not self.native:
+                result_df = clean_numeric_data(result_df)
             
             return self._format_result(result_df, f"多周期RSI指标计算完成，周期: {periods}", rsi_columns)
             
@@ -545,8 +584,8 @@ class IndicatorCalculator:
                         result = calc_func(df, **config)
                         
                         if result['status'] == 'success':
-                            # 合并指标数据
-                            indicator_df = pd.DataFrame(result['data'])
+                            # 合并指标数据（原生模式直接使用DataFrame，无需从字典列表重建）
+                            indicator_df = result['data'] if self.native else pd.DataFrame(result['data'])
                             for col in result.get('indicators', []):
                                 if col in indicator_df.columns:
                                     result_df[col] = indicator_df[col]
@@ -634,6 +673,43 @@ def calculate_adaptive_period(base_period: int,
     else:
         # 默认情况，直接返回基础周期
         return base_period
+
+def calculate_adaptive_periods(base_period: int,
+                               volatility: np.ndarray,
+                               indicator_type: str = 'rsi',
+                               is_short: bool = True,
+                               min_period: int = None,
+                               max_period: int = None) -> np.ndarray:
+    """
+    calculate_adaptive_period 的数组版本：对整段波动率一次计算每行的自适应周期，逐元素结果与之一致
+    :param volatility: 波动率数组（有限值）
+    :return: int64 周期数组
+    """
+    volatility = np.asarray(volatility, dtype=np.float64)
+    if indicator_type.lower() == 'rsi':
+        min_p = min_period or 7
+        max_p = max_period or 21
+        return np.maximum(min_p, np.minimum(max_p, np.trunc(base_period * (1 + volatility)))).astype(np.int64)
+
+    elif indicator_type.lower() == 'ma':
+        vol_factor = np.maximum(0.7, 1 - volatility)
+        if is_short:
+            min_p = min_period or 3
+            max_p = max_period or base_period
+        else:
+            adaptive_short = calculate_adaptive_periods(
+                base_period=int(base_period * 0.3),
+                volatility=volatility,
+                indicator_type='ma',
+                is_short=True
+            )
+            min_p = min_period or (adaptive_short + 5)
+            max_p = max_period or base_period
+        return np.maximum(min_p, np.minimum(max_p, np.trunc(base_period * vol_factor))).astype(np.int64)
+
+    else:
+        return np.full(volatility.shape, base_period, dtype=np.int64)
+
 def get_adaptive_periods_range(base_period: int,
                              indicator_type: str = 'rsi',
                              is_short: bool = True,
@@ -669,8 +745,8 @@ def get_adaptive_periods_range(base_period: int,
     return sorted(list(periods))
 def calculate_indicators_for_rule_configs(df: pd.DataFrame, 
                                     config: Dict) -> Tuple[Dict, pd.DataFrame]:
-    """为策略服务提供的便捷指标计算函数"""
-    calculator = IndicatorCalculator()
+    """为策略服务提供的便捷指标计算函数（原生模式，指标以float64 Series返回）"""
+    calculator = IndicatorCalculator(native=True)
     
     indicators = {}
     
@@ -706,13 +782,13 @@ def calculate_indicators_for_rule_configs(df: pd.DataFrame,
         ma_result = calculator.calculate_moving_averages(df, periods)
         
         if ma_result['status'] == 'success':
-            ma_df = pd.DataFrame(ma_result['data'])
+            ma_df = ma_result['data'].reset_index(drop=True)
             for col in ma_df.columns:
                 if col.startswith('SMA_'):  # 匹配新的命名格式
                     try:
                         # 将SMA_5转换为MA_5格式以保持向后兼容
                         period = col.split('_')[1]
-                        indicators[f'MA_{period}'] = pd.to_numeric(ma_df[col], errors='coerce').fillna(0)
+                        indicators[f'MA_{period}'] = ma_df[col].fillna(0)
                     except Exception as e:
                         logger.warning(f"[Indicator]MA指标 {col} 转换失败: {e}")
                         indicators[f'MA_{period}'] = pd.Series(dtype=float)
@@ -735,12 +811,12 @@ def calculate_indicators_for_rule_configs(df: pd.DataFrame,
             rsi_result = calculator.calculate_multiple_rsi(df, periods)
             
             if rsi_result['status'] == 'success':
-                rsi_df = pd.DataFrame(rsi_result['data'])
+                rsi_df = rsi_result['data'].reset_index(drop=True)
                 for period in periods:
                     rsi_column = f'RSI_{period}'  # 匹配新的命名格式
                     if rsi_column in rsi_df.columns:
                         try:
-                            indicators[f'RSI_{period}'] = pd.to_numeric(rsi_df[rsi_column], errors='coerce').fillna(50)
+                            indicators[f'RSI_{period}'] = rsi_df[rsi_column].fillna(50)
                         except Exception as e:
                             logger.warning(f"[Indicator]RSI指标 {rsi_column} 转换失败: {e}")
                             indicators[f'RSI_{period}'] = pd.Series(dtype=float)
@@ -756,12 +832,12 @@ def calculate_indicators_for_rule_configs(df: pd.DataFrame,
             rsi_result = calculator.calculate_rsi(df, period)
             
             if rsi_result['status'] == 'success':
-                rsi_df = pd.DataFrame(rsi_result['data'])
+                rsi_df = rsi_result['data'].reset_index(drop=True)
                 rsi_column = f'RSI_{period}'
                 if rsi_column in rsi_df.columns:
                     # 修复：返回 pandas Series 而不是 list
                     try:
-                        indicators[rsi_column] = pd.to_numeric(rsi_df[rsi_column], errors='coerce').fillna(50)
+                        indicators[rsi_column] = rsi_df[rsi_column].fillna(50)
                         indicators['RSI'] = indicators[rsi_column]  # 向后兼容
                     except Exception as e:
                         logger.warning(f"[Indicator]RSI指标 {rsi_column} 转换失败: {e}")
@@ -1,10 +1,12 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from core.logger import logger
 from data_providers import get_data_provider
-from common.utils import clean_numeric_data, safe_convert_to_dict, debug_dataframe
+from common.utils import clean_numeric_data, safe_convert_to_dict, debug_dataframe, dataframe_to_ndjson_bytes
 import pandas as pd
 import numpy as np
 import datetime
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
 from app.services.data.processor.data_processor import DataProcessor
 from common.debug_utils import debug_data_provider
 
@@ -37,7 +39,8 @@ def get_all_stocks(source="akshare", market=None, fields=None, page=None, page_s
         # 3.使用标准化数据处理器进行字段标准化和处理
         try:
             result = DataProcessor.process_stock_list_data(
-                df, source, use_chinese=True, core_only=False, fields=fields
+                df, source, use_chinese=True, core_only=False, fields=fields,
+                page=page, page_size=page_size
             )
             df_processed = result["data"]
             available_fields = result["available_fields"]
@@ -51,7 +54,7 @@ def get_all_stocks(source="akshare", market=None, fields=None, page=None, page_s
             logger.error(f"[Service]字段处理失败: {e}")
             return {"status": 'error', "message": str(e)}
         # 4.应用分页处理+补充字段
-        result_data = DataProcessor.apply_pagination(df_processed, page, page_size)
+        result_data = DataProcessor.apply_pagination(df_processed, page, page_size, total=result.get("total"))
         result_data["available_fields"] = available_fields
         return {
             "status": 'success', 
@@ -86,7 +89,8 @@ def get_concept_stocks(source="akshare", fields=None, page=None, page_size=20):
         # 3.使用标准化数据处理器进行字段标准化和处理
         try:
             result = DataProcessor.process_concept_data(
-                df, source, use_chinese=True, core_only=True, fields=fields
+                df, source, use_chinese=True, core_only=True, fields=fields,
+                page=page, page_size=page_size
             )
             df_processed = result["data"]
             available_fields = result["available_fields"]
@@ -102,7 +106,7 @@ def get_concept_stocks(source="akshare", fields=None, page=None, page_size=20):
             return {"status": "error", "message": str(e)}
         
         # 4.应用分页处理+补充字段
-        result_data = DataProcessor.apply_pagination(df_processed, page, page_size)
+        result_data = DataProcessor.apply_pagination(df_processed, page, page_size, total=result.get("total"))
         result_data["available_fields"] = available_fields
         
         return {
@@ -137,22 +141,10 @@ def get_concept_constituent_stocks(source="akshare", concept_identifier=None, fi
     try:
         # 1.调用接口
         data_provider = get_data_provider(source)
-        # 特殊补充：获取板块信息用于返回元数据
+        # 特殊补充：获取板块信息用于返回元数据（共享板块索引，O(1)查找）
         concept_info = None
-        if source == "akshare":
-            concept_list_df = data_provider.get_all_concepts()
-            if concept_identifier in concept_list_df['板块代码'].values:
-                concept_row = concept_list_df[concept_list_df['板块代码'] == concept_identifier].iloc[0]
-                concept_info = {
-                    "板块代码": str(concept_row['板块代码']),
-                    "板块名称": str(concept_row['板块名称'])
-                }
-            elif concept_identifier in concept_list_df['板块名称'].values:
-                concept_row = concept_list_df[concept_list_df['板块名称'] == concept_identifier].iloc[0]
-                concept_info = {
-                    "板块代码": str(concept_row['板块代码']),
-                    "板块名称": str(concept_row['板块名称'])
-                }
+        if hasattr(data_provider, 'resolve_concept'):
+            concept_info = data_provider.resolve_concept(concept_identifier)
         df = data_provider.get_concept_constituent_stocks(concept_identifier)
         
         # 2.判空处理
@@ -163,7 +155,8 @@ def get_concept_constituent_stocks(source="akshare", concept_identifier=None, fi
         # 3.使用标准化数据处理器进行字段标准化和处理
         try:
             result = DataProcessor.process_concept_constituent_stocks_data(
-                df, source, use_chinese=True, core_only=True, fields=fields
+                df, source, use_chinese=True, core_only=True, fields=fields,
+                page=page, page_size=page_size
             )
             df_processed = result["data"]
             available_fields = result["available_fields"]
@@ -178,7 +171,7 @@ def get_concept_constituent_stocks(source="akshare", concept_identifier=None, fi
             return {"status": "error", "message": str(e)}
         
         # 4.应用分页处理+补充字段
-        result_data = DataProcessor.apply_pagination(df_processed, page, page_size)
+        result_data = DataProcessor.apply_pagination(df_processed, page, page_size, total=result.get("total"))
         result_data["concept_info"] = concept_info
         result_data["available_fields"] = available_fields
         
@@ -230,7 +223,8 @@ def get_stock_history(source="akshare", code="000001", market="SH", start_date=N
         # 3.使用标准化数据处理器进行字段标准化和处理
         try:
             result = DataProcessor.process_stock_history_data(
-                df, source, use_chinese=True, core_only=False, fields=fields
+                df, source, use_chinese=True, core_only=False, fields=fields,
+                page=page, page_size=page_size
             )
             
             df_processed = result["data"]
@@ -247,7 +241,7 @@ def get_stock_history(source="akshare", code="000001", market="SH", start_date=N
             return {"status": "error", "message": str(e)}
         
         # 4.应用分页处理+补充字段
-        result_data = DataProcessor.apply_pagination(df_processed, page, page_size)
+        result_data = DataProcessor.apply_pagination(df_processed, page, page_size, total=result.get("total"))
         result_data["symbol"] = f"{code}.{market}"
         result_data["date_range"] = f"{start_date} to {end_date}" if start_date and end_date else "latest"
         result_data["available_fields"] = available_fields
@@ -261,8 +255,161 @@ def get_stock_history(source="akshare", code="000001", market="SH", start_date=N
         logger.error(f"[Data]获取股票历史行情数据失败: {e}")
         return {"status": "error", "message": f"获取失败：{e}"}
 
+# 1.2.2 批量获取多只股票历史记录（并发取数，长表输出）
+BATCH_HISTORY_MAX_WORKERS = int(os.getenv("BATCH_HISTORY_MAX_WORKERS", "8"))
+BATCH_HISTORY_MAX_SYMBOLS = int(os.getenv("BATCH_HISTORY_MAX_SYMBOLS", "6000"))
+
+def infer_market(code: str) -> str:
+    """
+    根据股票代码推断交易所
+    :param code: 6位股票代码
+    :return: SH/SZ/BJ
+    """
+    code = str(code)
+    if code.startswith(('60', '68', '90')):
+        return "SH"
+    if code.startswith(('00', '30', '20')):
+        return "SZ"
+    return "BJ"
+
+def resolve_batch_codes(source="akshare", codes=None, market=None, concept_identifier=None) -> List[str]:
+    """
+    解析批量请求的股票范围（优先级：codes > concept_identifier > market）
+    :param source: 数据源名称
+    :param codes: 股票代码列表或逗号分隔字符串
+    :param market: 交易所（SH/SZ/BJ/KE/CY），取该市场全部股票
+    :param concept_identifier: 概念板块代码或名称，取板块成分股
+    :return: 去重后的股票代码列表
+    """
+    if codes:
+        code_list = codes.split(',') if isinstance(codes, str) else list(codes)
+    elif concept_identifier:
+        df = get_data_provider(source).get_concept_constituent_stocks(concept_identifier)
+        code_list = df['代码'].tolist() if not df.empty else []
+    elif market:
+        df = get_data_provider(source).get_all_stocks(source=source, market=market)
+        code_list = df['code'].tolist() if not df.empty else []
+    else:
+        raise ValueError("codes、concept_identifier、market 至少需要指定一个")
+    code_list = list(dict.fromkeys(str(code).strip() for code in code_list if str(code).strip()))
+    if len(code_list) > BATCH_HISTORY_MAX_SYMBOLS:
+        raise ValueError(f"股票数量 {len(code_list)} 超过上限 {BATCH_HISTORY_MAX_SYMBOLS}")
+    return code_list
+
+def _fetch_symbol_history(data_provider, source, code, start_date, end_date, fields) -> pd.DataFrame:
+    """获取并标准化单只股票的历史数据，首列为 symbol"""
+    df = data_provider.get_stock_history(source=source, code=code, market=infer_market(code), start_date=start_date, end_date=end_date)
+    if df.empty:
+        return df
+    df_processed = DataProcessor.process_stock_history_data(df, source, use_chinese=True, core_only=False, fields=fields)["data"]
+    df_processed.insert(0, 'symbol', code)
+    return df_processed
+
+def iter_batch_stock_history(source="akshare", codes: Optional[List[str]] = None, start_date=None, end_date=None,
+                             fields=None, max_workers=None) -> Iterator[Tuple[str, Optional[pd.DataFrame], Optional[str]]]:
+    """
+    并发获取多只股票历史数据，按完成顺序逐只产出
+    线程池有界，在途任务不超过 2 * max_workers，数千只股票也不会一次性提交；
+    对上游接口的请求频率由各数据源在真正请求上游时限速（见 data_providers/rate_limit.py），响应缓存或本地K线存储命中的请求不占用令牌
+    :param source: 数据源名称
+    :param codes: 股票代码列表
+    :param start_date: 开始日期
+    :param end_date: 结束日期
+    :param fields: 返回字段
+    :param max_workers: 并发线程数，默认且最多 BATCH_HISTORY_MAX_WORKERS
+    :return: 迭代器，元素为 (股票代码, 标准化后的DataFrame或None, 错误信息或None)
+    """
+    data_provider = get_data_provider(source)
+    max_workers = min(max(1, max_workers or BATCH_HISTORY_MAX_WORKERS), BATCH_HISTORY_MAX_WORKERS)
+    pending_codes = iter(codes or [])
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"batch-{source}") as executor:
+        in_flight = {}
+
+        def submit_next(count):
+            for code in pending_codes:
+                future = executor.submit(_fetch_symbol_history, data_provider, source, code, start_date, end_date, fields)
+                in_flight[future] = code
+                count -= 1
+                if count <= 0:
+                    break
+
+        submit_next(2 * max_workers)
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                code = in_flight.pop(future)
+                try:
+                    df = future.result()
+                    if df.empty:
+                        yield code, None, "未查询到数据"
+                    else:
+                        yield code, df, None
+                except Exception as e:
+                    logger.warning(f"[Service]批量历史数据获取失败 {code}: {e}")
+                    yield code, None, str(e)
+            submit_next(len(done))
+
+def get_batch_stock_history(source="akshare", codes=None, market=None, concept_identifier=None,
+                            start_date=None, end_date=None, fields=None, max_workers=None):
+    """
+    批量获取多只股票历史数据，合并为一张带 symbol 列的长表
+    :param source: 数据源名称
+    :param codes: 股票代码列表或逗号分隔字符串
+    :param market: 交易所（未指定codes时取该市场全部股票）
+    :param concept_identifier: 概念板块代码或名称（未指定codes时取板块成分股）
+    :param start_date: 开始日期
+    :param end_date: 结束日期
+    :param fields: 返回字段
+    :param max_workers: 并发线程数
+    :return: 标准化格式的批量历史数据
+    """
+    debug_data_provider("批量获取股票历史记录", {
+        "source": source, "codes": codes, "market": market, "concept_identifier": concept_identifier,
+        "start_date": start_date, "end_date": end_date, "fields": fields
+    })
+    try:
+        code_list = resolve_batch_codes(source, codes, market, concept_identifier)
+        frames, failed = {}, {}
+        for code, df, error_message in iter_batch_stock_history(source, code_list, start_date, end_date, fields, max_workers):
+            if df is None:
+                failed[code] = error_message
+            else:
+                frames[code] = df
+        if not frames:
+            return {"status": "error", "message": "未查询到数据"}
+
+        # 按请求顺序拼接，与完成顺序无关
+        df_all = pd.concat([frames[code] for code in code_list if code in frames], ignore_index=True)
+        return {
+            "status": "success",
+            "data": {
+                "list": safe_convert_to_dict(df_all),
+                "total": len(df_all),
+                "symbols": [code for code in code_list if code in frames],
+                "failed": failed,
+                "date_range": f"{start_date} to {end_date}" if start_date and end_date else "latest",
+            },
+            "message": "批量股票历史数据获取成功"
+        }
+    except Exception as e:
+        logger.error(f"[Data]批量获取股票历史行情数据失败: {e}")
+        return {"status": "error", "message": f"获取失败：{e}"}
+
+def stream_batch_stock_history(source="akshare", codes: Optional[List[str]] = None, start_date=None, end_date=None,
+                               fields=None, max_workers=None) -> Iterator[bytes]:
+    """
+    以NDJSON流式输出批量历史数据：每只股票完成后立即输出其全部K线，失败的股票输出一行 {"symbol", "error"}
+    :param codes: 已解析的股票代码列表（见 resolve_batch_codes）
+    :return: NDJSON字节块迭代器
+    """
+    for code, df, error_message in iter_batch_stock_history(source, codes, start_date, end_date, fields, max_workers):
+        if df is None:
+            yield dataframe_to_ndjson_bytes(pd.DataFrame([{"symbol": code, "error": error_message}]))
+        else:
+            yield dataframe_to_ndjson_bytes(df)
+
 # 1.3.1 获取股票实时数据（标准化流程）
-def get_realtime_quotes(source="akshare", codes=None, fields=None, page=None, page_size=20):
+def get_realtime_quotes(source="akshare", codes=None, fields=None, page=None, page_size=20, since_version=None):
     """
     获取股票实时行情
     :param source: 数据源名称
@@ -270,13 +417,26 @@ def get_realtime_quotes(source="akshare", codes=None, fields=None, page=None, pa
     :param fields: 指定返回字段
     :param page: 页码
     :param page_size: 每页数量
+    :param since_version: 客户端已持有的快照版本号，传入时只返回此后有变化的行（数据源支持快照时）
     :return: 实时行情数据
     """
-    debug_data_provider("获取实时行情", {"source": source, "codes": codes})
+    debug_data_provider("获取实时行情", {"source": source, "codes": codes, "since_version": since_version})
     try:
         # 1.调用数据提供者获取原始数据
         data_provider = get_data_provider(source)
-        df = data_provider.get_realtime_quotes(source=source, codes=codes)
+        version, full_snapshot = None, True
+        if since_version is not None and hasattr(data_provider, 'get_realtime_quote_changes'):
+            version, df, full_snapshot = data_provider.get_realtime_quote_changes(
+                source=source, since_version=since_version, codes=codes)
+            if df.empty and not full_snapshot:
+                # 没有变化：返回空列表和当前版本号
+                return {
+                    "status": "success",
+                    "data": {"list": [], "version": version, "full_snapshot": False},
+                    "message": "实时行情无变化"
+                }
+        else:
+            df = data_provider.get_realtime_quotes(source=source, codes=codes)
 
         # 2.判空处理
         if df.empty:
@@ -286,7 +446,8 @@ def get_realtime_quotes(source="akshare", codes=None, fields=None, page=None, pa
         # 3.使用标准化数据处理器进行字段标准化和处理
         try:
             result = DataProcessor.process_realtime_quotes_data(
-                df, source, use_chinese=True, core_only=True, fields=fields
+                df, source, use_chinese=True, core_only=True, fields=fields,
+                page=page, page_size=page_size
             )
             df_processed = result["data"]
             available_fields = result["available_fields"]
@@ -302,8 +463,11 @@ def get_realtime_quotes(source="akshare", codes=None, fields=None, page=None, pa
             return {"status": "error", "message": str(e)}
         
         # 4.应用分页处理+补充字段
-        result_data = DataProcessor.apply_pagination(df_processed, page, page_size)
+        result_data = DataProcessor.apply_pagination(df_processed, page, page_size, total=result.get("total"))
         result_data["available_fields"] = available_fields
+        if version is not None:
+            result_data["version"] = version
+            result_data["full_snapshot"] = full_snapshot
         
         return {
             "status": "success",
@@ -385,7 +549,7 @@ def get_macro_data(source="akshare", indicator="GDP", start_date=None, end_date=
             return {"status": "error", "message": str(e)}
 
         # 4.应用分页处理+字段补充
-        result_data = DataProcessor.apply_pagination(df_processed, page, page_size)
+        result_data = DataProcessor.apply_pagination(df_processed, page, page_size, total=result.get("total"))
         result_data["indicator_info"] = {
             "indicator": str(indicator.upper()),
             "description": str(get_indicator_description(indicator))
@@ -464,7 +628,7 @@ def get_financial_report(source="akshare", code="000001", market=None, report_ty
             return {"status": "error", "message": str(e)}
         
         # 4.应用分页处理+补充字段
-        result_data = DataProcessor.apply_pagination(df_processed, page, page_size)
+        result_data = DataProcessor.apply_pagination(df_processed, page, page_size, total=result.get("total"))
         result_data["available_fields"] = available_fields
         return {
             "status": "success",
@@ -507,7 +671,8 @@ def get_stock_fund_flow(source="akshare", code="000001", indicator="今日", fie
         # 3.使用标准化数据处理器进行字段标准化和处理
         try:
             result = DataProcessor.process_fund_flow_data(
-                df, source, use_chinese=True, core_only=False, fields=fields
+                df, source, use_chinese=True, core_only=False, fields=fields,
+                page=page, page_size=page_size
             )
             
             df_processed = result["data"]
@@ -520,7 +685,7 @@ def get_stock_fund_flow(source="akshare", code="000001", indicator="今日", fie
             return {"status": "error", "message": str(e)}
         
         # 4.应用分页处理+补充字段
-        result_data = DataProcessor.apply_pagination(df_processed, page, page_size)
+        result_data = DataProcessor.apply_pagination(df_processed, page, page_size, total=result.get("total"))
         result_data["symbol"] = code
         result_data["indicator"] = indicator
         result_data["available_fields"] = available_fields
@@ -558,7 +723,8 @@ def get_dragon_tiger_list(source="akshare", start_date=None, end_date=None, fiel
         # 3.使用标准化数据处理器进行字段标准化和处理
         try:
             result = DataProcessor.process_dragon_tiger_data(
-                df, source, use_chinese=True, core_only=False, fields=fields
+                df, source, use_chinese=True, core_only=False, fields=fields,
+                page=page, page_size=page_size
             )
             df_processed = result["data"]
             available_fields = result["available_fields"]
@@ -570,7 +736,7 @@ def get_dragon_tiger_list(source="akshare", start_date=None, end_date=None, fiel
             return {"status": "error", "message": str(e)}
         
         # 4.应用分页处理+补充字段
-        result_data = DataProcessor.apply_pagination(df_processed, page, page_size)
+        result_data = DataProcessor.apply_pagination(df_processed, page, page_size, total=result.get("total"))
         result_data["date_range"] = f"{start_date} to {end_date}"
         result_data["available_fields"] = available_fields
         return {
@@ -632,7 +798,8 @@ def get_news_sentiment(source="akshare", symbol=None, start_date=None, end_date=
         # 3.使用新的数据处理器进行字段标准化和处理
         try:
             result = DataProcessor.process_news_data(
-                df, source, use_chinese=True, core_only=False, fields=fields
+                df, source, use_chinese=True, core_only=False, fields=fields,
+                page=page, page_size=page_size
             )
             
             df_processed = result["data"]
@@ -645,7 +812,7 @@ def get_news_sentiment(source="akshare", symbol=None, start_date=None, end_date=
             return {"status": "error", "message": str(e)}
         
         # 4.应用分页处理
-        result_data = DataProcessor.apply_pagination(df_processed, page, page_size)
+        result_data = DataProcessor.apply_pagination(df_processed, page, page_size, total=result.get("total"))
         result_data["symbol"] = symbol
         result_data["date_range"] = f"{start_date} to {end_date}" if start_date and end_date else "latest"
         result_data["available_fields"] = available_fields
@@ -36,48 +36,48 @@ class DataProcessor:
         :return: 标准化后的DataFrame
         """
         return df.rename(columns=source_mapping)
-    # 字段过滤
+    # 字段选择（只基于列名计算，不触碰数据）
     @staticmethod
-    def _filter_fields(df, data_type, core_only=False, fields=None, use_chinese=True):
+    def _select_fields(columns, data_type, core_only=False, fields=None):
         """
-        字段过滤
-        :param df: 标准化后的DataFrame
+        计算字段过滤后保留的列名
+        :param columns: 标准化后的列名列表
         :param data_type: 数据类型
         :param core_only: 是否只返回核心字段
         :param fields: 指定返回字段
-        :param use_chinese: 是否使用中文字段名（用于字段名转换）
-        :return: 过滤后的DataFrame
+        :return: 保留的列名列表，None 表示保留全部列
         """
-        # logger.info(f"[_filter_fields] 输入参数 - data_type: {data_type}, core_only: {core_only}, fields: {fields}, use_chinese: {use_chinese}")
-        # logger.info(f"[_filter_fields] DataFrame列名: {list(df.columns)}")
-        
         # 优先处理自定义fields的情况
         if fields:
             # 指定字段过滤
             field_list = [f.strip() for f in fields.split(',')]
-            # logger.info(f"[_filter_fields] 指定字段列表: {field_list}")
-            
-            available_fields = [f for f in field_list if f in df.columns]
-            # logger.info(f"[_filter_fields] 匹配到的字段: {available_fields}")
+            available_fields = [f for f in field_list if f in columns]
             if available_fields:
-                # logger.info(f"[_filter_fields] 返回指定字段: {available_fields}")
-                return df[available_fields]
-            else:
-                # logger.warning(f"[_filter_fields] 指定字段 {field_list} 在DataFrame中未找到，fallback到核心字段")
-                # 如果没有匹配的字段，返回核心字段
-                available_core_fields = [f for f in CORE_FIELDS.get(data_type, []) if f in df.columns]
-                # logger.info(f"[_filter_fields] fallback核心字段: {available_core_fields}")
-                if available_core_fields:
-                    return df[available_core_fields]
+                return available_fields
+            # 如果没有匹配的字段，返回核心字段
+            available_core_fields = [f for f in CORE_FIELDS.get(data_type, []) if f in columns]
+            if available_core_fields:
+                return available_core_fields
         elif core_only:
             # 只有在没有指定 fields 时才考虑 core_only
-            available_core_fields = [f for f in CORE_FIELDS.get(data_type, []) if f in df.columns]
-            # logger.info(f"[_filter_fields] 核心字段: {CORE_FIELDS.get(data_type, [])}")
-            # logger.info(f"[_filter_fields] 可用核心字段: {available_core_fields}")
+            available_core_fields = [f for f in CORE_FIELDS.get(data_type, []) if f in columns]
             if available_core_fields:
-                return df[available_core_fields]
-        # logger.info(f"[_filter_fields] 返回原始DataFrame")
-        return df
+                return available_core_fields
+        return None
+    # 字段过滤
+    @staticmethod
+    def _filter_fields(df, data_type, core_only=False, fields=None, use_chinese=True):
+        """
+        字段过滤
+        :param df: 标准化后的DataFrame
+        :param data_type: 数据类型
+        :param core_only: 是否只返回核心字段
+        :param fields: 指定返回字段
+        :param use_chinese: 是否使用中文字段名（用于字段名转换）
+        :return: 过滤后的DataFrame
+        """
+        selected = DataProcessor._select_fields(list(df.columns), data_type, core_only, fields)
+        return df[selected] if selected is not None else df
     # 中文化处理    
     @staticmethod
     def _apply_chinese_mapping(df, use_chinese=True):
@@ -93,7 +93,8 @@ class DataProcessor:
         return df
     # 通用数据处理流程    
     @staticmethod
-    def _process_data_common(df, source, data_type, use_chinese=True, core_only=False, fields=None, custom_processor=None):
+    def _process_data_common(df, source, data_type, use_chinese=True, core_only=False, fields=None, custom_processor=None,
+                             row_processor=None, page=None, page_size=None):
         """
         通用数据处理流程
         :param df: 原始数据DataFrame
@@ -102,8 +103,11 @@ class DataProcessor:
         :param use_chinese: 是否使用中文字段名
         :param core_only: 是否只返回核心字段
         :param fields: 指定返回字段
-        :param custom_processor: 自定义处理函数
-        :return: 处理后的DataFrame 或 包含数据和元数据的字典
+        :param custom_processor: 自定义处理函数（会改变行集合或顺序，如过滤、排序，需作用于全量数据）
+        :param row_processor: 逐行处理函数（如日期格式化，不改变行集合，分页时只作用于当前页）
+        :param page: 页码（指定时先分页、选字段，再做重命名和逐行处理）
+        :param page_size: 每页数量
+        :return: 包含数据和元数据的字典；已分页时额外包含 total（分页前总记录数）
         """
         # 空数据检查
         if df.empty:
@@ -115,16 +119,39 @@ class DataProcessor:
         if not source_mapping:
             return {"data": df, "available_fields": list(df.columns)}
         
-        # 2. 字段标准化
-        df_standardized = DataProcessor._standardize_fields(df, source_mapping)
-        
         # 记录标准化后的字段列表（英文标准字段名）->只返回标准映射的字段列表
-        # standardized_fields = list(df_standardized.columns)
         standardized_fields = list(source_mapping.values()) 
+        
+        # 分页下推：无全量处理函数时，先按列名计算保留字段、切出当前页，再处理这一页
+        if page is not None and page_size is not None and custom_processor is None:
+            standardized_columns = [source_mapping.get(col, col) for col in df.columns]
+            selected = DataProcessor._select_fields(standardized_columns, data_type, core_only, fields)
+            if selected is None:
+                positions = list(range(len(standardized_columns)))
+            else:
+                positions = [i for name in selected for i, col in enumerate(standardized_columns) if col == name]
+            start_idx = (page - 1) * page_size
+            df_page = df.iloc[start_idx:start_idx + page_size, positions]
+            # 2. 字段标准化（仅当前页）
+            df_page = DataProcessor._standardize_fields(df_page, source_mapping)
+            # 3. 逐行处理（仅当前页）
+            if row_processor:
+                df_page = row_processor(df_page)
+            # 5. 中文化处理
+            return {
+                "data": DataProcessor._apply_chinese_mapping(df_page, use_chinese),
+                "available_fields": standardized_fields,
+                "total": len(df)
+            }
+        
+        # 2. 字段标准化
+        df_standardized = DataProcessor._standardize_fields(df, source_mapping)
 
         # 3. 自定义处理（如日期格式化、报告类型过滤等）
         if custom_processor:
             df_standardized = custom_processor(df_standardized)
+        if row_processor:
+            df_standardized = row_processor(df_standardized)
         
         # 4. 字段过滤
         df_filtered = DataProcessor._filter_fields(
@@ -141,7 +168,7 @@ class DataProcessor:
         }
     # 1.1.1 处理股票列表数据
     @staticmethod
-    def process_stock_list_data(df, source, use_chinese=True, core_only=False, fields=None):
+    def process_stock_list_data(df, source, use_chinese=True, core_only=False, fields=None, page=None, page_size=None):
         """
         处理股票列表数据
         :param df: 原始数据DataFrame
@@ -149,6 +176,8 @@ class DataProcessor:
         :param use_chinese: 是否使用中文字段名
         :param core_only: 是否只返回核心字段
         :param fields: 指定返回字段
+        :param page: 页码（指定时分页下推，只处理当前页）
+        :param page_size: 每页数量
         :return: 处理后的DataFrame
         """
         # def validate_required_fields(df_standardized):
@@ -163,31 +192,32 @@ class DataProcessor:
             logger.info(f"[Processor]使用中文字段: {use_chinese}，使用核心字段：{core_only}，使用指定字段：{fields}")
             return df_standardized
         return DataProcessor._process_data_common(
-            df, source, 'stock_list', use_chinese, core_only, fields, add_debug_logging)
+            df, source, 'stock_list', use_chinese, core_only, fields,
+            row_processor=add_debug_logging, page=page, page_size=page_size)
     
     # 1.1.2 处理概念板块数据
     @staticmethod
-    def process_concept_data(df, source, use_chinese=True, core_only=False, fields=None):
+    def process_concept_data(df, source, use_chinese=True, core_only=False, fields=None, page=None, page_size=None):
         """
         处理概念板块数据
         """
         return DataProcessor._process_data_common(
-            df, source, 'concept_data', use_chinese, core_only, fields)
+            df, source, 'concept_data', use_chinese, core_only, fields, page=page, page_size=page_size)
 
      # 1.1.3 处理概念成分股数据
     
     # 1.1.3 处理概念成分股数据
     @staticmethod
-    def process_concept_constituent_stocks_data(df, source, use_chinese=True, core_only=False, fields=None):
+    def process_concept_constituent_stocks_data(df, source, use_chinese=True, core_only=False, fields=None, page=None, page_size=None):
         """
         处理概念成分股数据
         """
         return DataProcessor._process_data_common(
-            df, source, 'concept_constituent_stocks', use_chinese, core_only, fields) 
+            df, source, 'concept_constituent_stocks', use_chinese, core_only, fields, page=page, page_size=page_size)
     
     # 1.2.1 处理股票历史数据
     @staticmethod
-    def process_stock_history_data(df, source, use_chinese=True, core_only=False, fields=None):
+    def process_stock_history_data(df, source, use_chinese=True, core_only=False, fields=None, page=None, page_size=None):
         """
         处理股票历史数据
         """
@@ -198,17 +228,18 @@ class DataProcessor:
             return df_standardized
         
         return DataProcessor._process_data_common(
-            df, source, 'stock_history', use_chinese, core_only, fields, format_date
+            df, source, 'stock_history', use_chinese, core_only, fields,
+            row_processor=format_date, page=page, page_size=page_size
         )
     
     # 1.3.1 处理实时行情数据
     @staticmethod
-    def process_realtime_quotes_data(df, source, use_chinese=True, core_only=False, fields=None):
+    def process_realtime_quotes_data(df, source, use_chinese=True, core_only=False, fields=None, page=None, page_size=None):
         """
         处理实时行情数据
         """
         return DataProcessor._process_data_common(
-            df, source, 'realtime_quotes', use_chinese, core_only, fields)
+            df, source, 'realtime_quotes', use_chinese, core_only, fields, page=page, page_size=page_size)
     
     # 2.1 处理宏观经济数据
     @staticmethod
@@ -290,16 +321,16 @@ class DataProcessor:
     
     # 3.1 处理资金流向数据
     @staticmethod
-    def process_fund_flow_data(df, source, use_chinese=True, core_only=False, fields=None):
+    def process_fund_flow_data(df, source, use_chinese=True, core_only=False, fields=None, page=None, page_size=None):
         """
         处理资金流向数据
         """
         return DataProcessor._process_data_common(
-            df, source, 'fund_flow', use_chinese, core_only, fields)
+            df, source, 'fund_flow', use_chinese, core_only, fields, page=page, page_size=page_size)
     
     # 3.2 处理龙虎榜数据
     @staticmethod
-    def process_dragon_tiger_data(df, source, use_chinese=True, core_only=False, fields=None):
+    def process_dragon_tiger_data(df, source, use_chinese=True, core_only=False, fields=None, page=None, page_size=None):
         """
         处理龙虎榜数据
         """
@@ -308,16 +339,17 @@ class DataProcessor:
             return df_standardized
         
         return DataProcessor._process_data_common(
-            df, source, 'dragon_tiger', use_chinese, core_only, fields, add_debug_logging)
+            df, source, 'dragon_tiger', use_chinese, core_only, fields,
+            row_processor=add_debug_logging, page=page, page_size=page_size)
     
     # 4.1 处理财务新闻数据
     @staticmethod
-    def process_news_data(df, source, use_chinese=True, core_only=False, fields=None):
+    def process_news_data(df, source, use_chinese=True, core_only=False, fields=None, page=None, page_size=None):
         """
         处理新闻数据
         """
         return DataProcessor._process_data_common(
-            df, source, 'news_sentiment', use_chinese, core_only, fields)
+            df, source, 'news_sentiment', use_chinese, core_only, fields, page=page, page_size=page_size)
     
     @staticmethod
     def get_available_fields(source, data_type):
@@ -331,20 +363,24 @@ class DataProcessor:
         return list(mapping.values())  # 返回标准字段名列表
     
     @staticmethod
-    def apply_pagination(df, page=None, page_size=20):
+    def apply_pagination(df, page=None, page_size=20, total=None):
         """
         应用分页处理
         :param df: DataFrame
         :param page: 页码
         :param page_size: 每页数量
+        :param total: 分页前总记录数。传入时表示df已是处理流程中切好的当前页，不再切片
         :return: 分页结果字典
         """
-        total_records = len(df)
+        total_records = len(df) if total is None else total
         
         if page is not None and page_size is not None:
-            start_idx = (page - 1) * page_size
-            end_idx = start_idx + page_size
-            paged_df = df.iloc[start_idx:end_idx]
+            if total is None:
+                start_idx = (page - 1) * page_size
+                end_idx = start_idx + page_size
+                paged_df = df.iloc[start_idx:end_idx]
+            else:
+                paged_df = df
             
             return {
                 "list": safe_convert_to_dict(paged_df),
@@ -211,7 +211,7 @@ class EventDrivenStrategyManager:
                     processed_events = self.processor.process_events(all_events)
                     
                     # 生成信号
-                    signals = self.signal_generator.generate_signals(processed_events)
+                    signals = self.signal_generator.generate_signals(processed_events, publish=True)
                     
                     if signals:
                         logger.info(f"生成了 {len(signals)} 个事件驱动信号")
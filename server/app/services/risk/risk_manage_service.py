@@ -251,6 +251,116 @@ def comprehensive_performance_analysis(portfolio_values, trades, returns=None, r
         return {"status": "error", "message": f"分析失败: {e}"}
 
 
+# ============ 组合价值跟踪 ============
+class EquityTracker:
+    """
+    组合价值跟踪器：逐根K线更新运行峰值、当前回撤、最大回撤及其起止位置，每次更新 O(1)
+    回撤均为相对峰值的正比例（0.1 表示较峰值回落10%），与 BasicRiskManager.max_drawdown 口径一致
+    """
+    def __init__(self):
+        self.peak: Optional[float] = None
+        self.peak_label = None
+        self.value: Optional[float] = None
+        self.count = 0
+        self.max_drawdown = 0.0
+        self.max_drawdown_start = None  # 最大回撤开始（峰值）位置
+        self.max_drawdown_end = None    # 最大回撤结束（谷底）位置
+    
+    def update(self, value: float, label=None) -> None:
+        """
+        记录一个组合价值
+        :param value: 组合价值
+        :param label: 位置标签（如K线序号或日期），默认为已记录的个数
+        """
+        label = self.count if label is None else label
+        if self.peak is None or value > self.peak:
+            self.peak = value
+            self.peak_label = label
+        drawdown = (self.peak - value) / self.peak if self.peak > 0 else 0
+        if drawdown > self.max_drawdown:
+            self.max_drawdown = drawdown
+            self.max_drawdown_start = self.peak_label
+            self.max_drawdown_end = label
+        self.value = value
+        self.count += 1
+    
+    def update_many(self, values: np.ndarray, labels=None) -> None:
+        """
+        批量记录一段组合价值（结果与逐个 update 相同）
+        :param values: 组合价值数组
+        :param labels: 位置标签序列，默认为已记录的个数起连续编号
+        """
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return
+        labels = range(self.count, self.count + len(values)) if labels is None else labels
+        previous_peak = values[0] if self.peak is None else self.peak
+        peaks = np.maximum(np.maximum.accumulate(values), previous_peak)
+        drawdowns = np.divide(peaks - values, peaks, out=np.zeros(len(values)), where=peaks > 0)
+        trough = int(np.argmax(drawdowns))
+        if drawdowns[trough] > self.max_drawdown:
+            self.max_drawdown = float(drawdowns[trough])
+            head = values[:trough + 1]
+            new_peak = self.peak is None or head.max() > self.peak
+            self.max_drawdown_start = labels[int(np.argmax(head))] if new_peak else self.peak_label
+            self.max_drawdown_end = labels[trough]
+        top = int(np.argmax(values))
+        if self.peak is None or values[top] > self.peak:
+            self.peak = values[top]
+            self.peak_label = labels[top]
+        self.value = values[-1]
+        self.count += len(values)
+    
+    def drawdown_of(self, value: float, default_peak: Optional[float] = None) -> float:
+        """
+        给定组合价值相对当前峰值的回撤（不记录该值）
+        :param value: 组合价值
+        :param default_peak: 尚无记录时使用的峰值（如初始资金）
+        """
+        peak = self.peak if self.peak is not None else default_peak
+        if peak is None:
+            return 0
+        return (peak - value) / peak if peak > 0 else 0
+    
+    @property
+    def current_drawdown(self) -> float:
+        """最近记录值的回撤"""
+        return self.drawdown_of(self.value) if self.value is not None else 0
+    
+    def risk_context(self, portfolio_value: float, current_value: Optional[float] = None,
+                     default_peak: Optional[float] = None, **extra) -> Dict[str, Any]:
+        """
+        构造风控上下文（供 RiskManager.should_enter_position / should_exit_position 使用）
+        :param portfolio_value: 可用资金
+        :param current_value: 当前组合价值，用于计算当前回撤，默认为 portfolio_value
+        :param default_peak: 尚无记录时使用的峰值
+        :param extra: 其他上下文字段
+        """
+        current_value = portfolio_value if current_value is None else current_value
+        context = {
+            'portfolio_value': portfolio_value,
+            'current_drawdown': self.drawdown_of(current_value, default_peak),
+            'peak_value': self.peak if self.peak is not None else default_peak,
+            'max_drawdown': self.max_drawdown,
+        }
+        context.update(extra)
+        return context
+    
+    def summary(self, labels=None) -> Dict[str, Any]:
+        """
+        回撤汇总
+        :param labels: 位置标签到展示值（如日期）的映射序列，为空时直接返回位置标签
+        """
+        resolve = (lambda label: labels[label] if label is not None else None) if labels is not None else (lambda label: label)
+        return {
+            'peak_value': self.peak,
+            'current_drawdown': self.current_drawdown,
+            'max_drawdown': self.max_drawdown,
+            'max_drawdown_start': resolve(self.max_drawdown_start),
+            'max_drawdown_end': resolve(self.max_drawdown_end),
+        }
+
+
 # ============ 抽象基类 ============
 class RiskManager(ABC):
     """风控管理器抽象基类"""
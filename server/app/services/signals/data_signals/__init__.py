@@ -5,6 +5,8 @@ from .basic_rules import BasicSignalRules, BASIC_RULES_METADATA
 from .parameterized_rules import ParameterizedRuleFactory, PARAMETERIZED_RULE_CREATORS
 from .filter_rules import FilterRules, ParameterizedFilterFactory, DEFAULT_FILTERS, STRICT_FILTERS
 from .registry import SignalRuleRegistry, rule_registry
+from .vectorized import VectorizedSignalFrame, VectorizedRuleResult, build_signal_frame
+from .market_context import precompute_market_context
 
 # 向后兼容的导出
 __all__ = [
@@ -17,6 +19,10 @@ __all__ = [
     'ParameterizedFilterFactory',
     'SignalRuleRegistry',
     'rule_registry',
+    'VectorizedSignalFrame',
+    'VectorizedRuleResult',
+    'build_signal_frame',
+    'precompute_market_context',
     'DEFAULT_FILTERS',
     'STRICT_FILTERS'
 ]
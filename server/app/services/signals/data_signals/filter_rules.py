@@ -86,6 +86,8 @@ class ParameterizedFilterFactory:
             
             volume_ratio = volume / avg_volume
             return volume_ratio > volume_multiplier
+        # 声明使用的均量窗口，生成器据此预计算 avg_volume_{N}
+        filter_func.volume_windows = (lookback_days,)
         return filter_func
     
     @staticmethod
@@ -103,6 +105,9 @@ class ParameterizedFilterFactory:
             adx = context.indicators.get('ADX', 0)
             return adx >= min_adx
         return filter_func
+# 成交量确认过滤读取20日均量
+FilterRules.volume_confirmation_filter.volume_windows = (20,)
+
 # 过滤规则元数据
 FILTER_RULES_METADATA = {
     'volume_confirmation': {
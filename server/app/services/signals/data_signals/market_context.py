@@ -0,0 +1,115 @@
+"""
+市场环境上下文预计算
+
+一次滚动计算整段序列的市场环境列，规则和过滤器按行号读取：
+- volatility: 最近20期收益率的年化波动率（数据不足或无效时为0.2）
+- avg_volume: 最近21期成交量均值（剔除超过中位数100倍的异常值）
+- avg_volume_{N}: 最近N期成交量简单均值（供成交量确认过滤器使用）
+- price_momentum: 最近N期价格涨跌幅
+"""
+import warnings
+from typing import Dict, Iterable, Optional
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+DEFAULT_VOLATILITY = 0.2
+DEFAULT_AVG_VOLUME = 1000000  # 默认一个大值，使之不满足
+VOLATILITY_WINDOW = 20
+DEFAULT_VOLUME_WINDOWS = (5, 10, 20, 30, 60)
+DEFAULT_MOMENTUM_PERIOD = 5
+
+
+def _find_column(df: pd.DataFrame, *names) -> Optional[str]:
+    """按优先级查找列名（中文列名优先）"""
+    for name in names:
+        if name in df.columns:
+            return name
+    return None
+
+
+def _trailing_windows(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    构造每行的尾部滑动窗口视图，序列开头不足window的部分用NaN补齐
+    :return: 形状为 (len(values), window) 的二维视图
+    """
+    padded = np.concatenate([np.full(window - 1, np.nan), values])
+    return sliding_window_view(padded, window)
+
+
+def rolling_volatility(close: pd.Series, window: int = VOLATILITY_WINDOW) -> np.ndarray:
+    """
+    滚动年化波动率
+    :param close: 收盘价序列
+    :param window: 收益率窗口（默认20个收益率，即21根K线）
+    :return: float64 数组，无效值为默认波动率
+    """
+    returns = pd.to_numeric(close, errors='coerce').pct_change().to_numpy(dtype=np.float64)
+    windows = _trailing_windows(returns, window)
+    with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        valid_count = np.sum(~np.isnan(windows), axis=1)
+        daily_volatility = np.nanstd(windows, axis=1, ddof=1)
+    daily_volatility = np.where(valid_count >= 2, daily_volatility, np.nan)
+    volatility = daily_volatility * np.sqrt(252)
+    invalid = ~np.isfinite(volatility) | (volatility <= 0)
+    return np.where(invalid, DEFAULT_VOLATILITY, volatility)
+
+
+def rolling_avg_volume(volume: pd.Series, window: int = VOLATILITY_WINDOW + 1) -> np.ndarray:
+    """
+    滚动平均成交量（剔除超过窗口中位数100倍的异常值）
+    :param volume: 成交量序列
+    :param window: 窗口长度（包含当前行）
+    :return: float64 数组
+    """
+    values = pd.to_numeric(volume, errors='coerce').to_numpy(dtype=np.float64)
+    windows = _trailing_windows(values, window)
+    with warnings.catch_warnings(), np.errstate(invalid='ignore'):
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        median_volume = np.nanmedian(windows, axis=1)
+        outlier = (median_volume[:, None] > 0) & (windows > median_volume[:, None] * 100)
+        avg_volume = np.nanmean(np.where(outlier, np.nan, windows), axis=1)
+    invalid = np.isnan(avg_volume) | (avg_volume <= 0) | (avg_volume > 1e12)
+    fallback = np.where(median_volume > 0, median_volume, DEFAULT_AVG_VOLUME)
+    return np.where(invalid, fallback, avg_volume)
+
+
+def precompute_market_context(df: pd.DataFrame,
+                              volume_windows: Iterable[int] = DEFAULT_VOLUME_WINDOWS,
+                              momentum_period: int = DEFAULT_MOMENTUM_PERIOD) -> Dict[str, np.ndarray]:
+    """
+    一次性计算整段序列的市场环境列
+    :param df: 价格数据（支持中英文列名）
+    :param volume_windows: 需要计算的均量窗口，生成 avg_volume_{N} 列
+    :param momentum_period: 价格动量周期
+    :return: {列名: 与df等长的 float64 数组}
+    """
+    n = len(df)
+    close_col = _find_column(df, '收盘价', 'close', '收盘')
+    volume_col = _find_column(df, '成交量', 'volume')
+
+    context = {}
+    if close_col and n > 0:
+        context['volatility'] = rolling_volatility(df[close_col])
+        close = pd.to_numeric(df[close_col], errors='coerce')
+        momentum = close.pct_change(periods=momentum_period).to_numpy(dtype=np.float64)
+        context['price_momentum'] = np.where(np.isfinite(momentum), momentum, 0.0)
+    else:
+        context['volatility'] = np.full(n, DEFAULT_VOLATILITY)
+        context['price_momentum'] = np.zeros(n)
+
+    if volume_col and n > 0:
+        volume = pd.to_numeric(df[volume_col], errors='coerce')
+        context['avg_volume'] = rolling_avg_volume(volume)
+        for window in volume_windows:
+            # 均量无法计算时为0，过滤器在均量为0时默认放行
+            context[f'avg_volume_{window}'] = (
+                volume.rolling(window, min_periods=1).mean().fillna(0.0).to_numpy(dtype=np.float64)
+            )
+    else:
+        context['avg_volume'] = np.full(n, float(DEFAULT_AVG_VOLUME))
+        for window in volume_windows:
+            context[f'avg_volume_{window}'] = np.zeros(n)
+
+    return context
@@ -1,11 +1,17 @@
 from math import log
-from typing import Dict, Optional, Callable
+from typing import Dict, Optional, Callable, Tuple
 import pandas as pd  # 添加这行
 import numpy as np   # 也建议添加这行，因为volatility是numpy.float64类型
 from .core import TechnicalSignalContext, SignalRuleFunc, ParameterizedRuleCreator, SignalType, RuleType
 from .filter_rules import ParameterizedFilterFactory
+from .vectorized import (
+    VectorizedSignalFrame, VectorizedRuleResult,
+    front_filter_mask, gather_by_period, sanitize_volatility
+)
 from core.logger import logger
-from app.services.analytics.indicator_service import calculate_adaptive_period, get_adaptive_periods_range
+from app.services.analytics.indicator_service import (
+    calculate_adaptive_period, calculate_adaptive_periods, get_adaptive_periods_range
+)
 from common.debug_utils import debug_signals
 class ParameterizedRuleFactory:
     """参数化规则工厂"""
@@ -157,6 +163,10 @@ class ParameterizedRuleFactory:
                 (f'启用自适应模式：根据市场波动率同时调整均线周期和交叉阈值。波动率高时周期缩短(最短3周期)，交叉阈值放宽；波动率低时周期接近设定值，阈值收紧。需要volatility指标支持。' if adaptive else 
                 f'固定模式：使用固定的短期({short_period})、长期({long_period})周期和波动率阈值({volatility_threshold})。')
         }
+        rule.vectorized = _create_vectorized_ma_rule(
+            short_period, long_period, volatility_threshold, adaptive, filter_config
+        )
+        rule.volume_windows = volume_filter_windows(filter_config)
         return rule
     
     @staticmethod
@@ -283,8 +293,117 @@ class ParameterizedRuleFactory:
                 (f'启用自适应模式：根据市场波动率同时调整RSI计算周期和超买超卖阈值。波动率高时周期延长、阈值范围扩大(超卖降低、超买提高)；波动率低时周期缩短、阈值收紧。周期范围7-21，需要volatility指标支持。' if adaptive else 
                 f'固定模式：使用固定的计算周期({period})、超卖阈值({oversold})和超买阈值({overbought})。')
         }
+        rule.vectorized = _create_vectorized_rsi_rule(
+            period, oversold, overbought, adaptive, filter_config
+        )
+        rule.volume_windows = volume_filter_windows(filter_config)
         return rule
 
+def _create_vectorized_ma_rule(short_period: int,
+                               long_period: int,
+                               volatility_threshold: float,
+                               adaptive: bool,
+                               filter_config: Optional[Dict]) -> Callable[[VectorizedSignalFrame], VectorizedRuleResult]:
+    """创建均线规则的向量化版本，逐行结果与 create_ma_rule 完全一致"""
+    def vectorized(frame: VectorizedSignalFrame) -> VectorizedRuleResult:
+        passed = front_filter_mask(frame, filter_config)
+        if adaptive:
+            volatility = sanitize_volatility(frame.get_market_context('volatility', 0.1))
+            short_periods = calculate_adaptive_periods(short_period, volatility, indicator_type='ma', is_short=True)
+            long_periods = calculate_adaptive_periods(long_period, volatility, indicator_type='ma', is_short=False)
+            threshold = volatility_threshold * (1 + volatility)
+        else:
+            short_periods = np.full(len(frame), short_period, dtype=np.int64)
+            long_periods = np.full(len(frame), long_period, dtype=np.int64)
+            threshold = np.full(len(frame), volatility_threshold, dtype=np.float64)
+
+        ma_short = gather_by_period(frame, 'MA_', short_periods, 0)
+        ma_long = gather_by_period(frame, 'MA_', long_periods, 0)
+        mask = passed & (ma_long != 0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            crossover_ratio = np.abs(ma_short - ma_long) / ma_long
+        buy = mask & (ma_short > ma_long) & (crossover_ratio > threshold)
+        sell = mask & (ma_short < ma_long) & (crossover_ratio > threshold)
+        signal = np.where(buy, SignalType.BUY, np.where(sell, SignalType.SELL, SignalType.HOLD))
+        strength = np.where(buy | sell, np.minimum(crossover_ratio * 10, 1.0), 0.0)
+
+        # 只对产生信号的行格式化原因文本
+        short_list, long_list = ma_short.tolist(), ma_long.tolist()
+        reasons = {}
+        for i in np.flatnonzero(mask).tolist():
+            fs, fl = int(short_periods[i]), int(long_periods[i])
+            if buy[i]:
+                reasons[i] = f'MA金叉自适应({fs}/{fl}): {short_list[i]:.2f} > {long_list[i]:.2f}'
+            elif sell[i]:
+                reasons[i] = f'MA死叉自适应({fs}/{fl}): {short_list[i]:.2f} < {long_list[i]:.2f}'
+            else:
+                reasons[i] = f'MA平行: MA{fs}({short_list[i]:.2f}) ≈ MA{fl}({long_list[i]:.2f})'
+
+        return VectorizedRuleResult(
+            mask=mask,
+            signal=signal,
+            strength=strength,
+            reasons=reasons,
+            rule_name='参数化均线规则',
+            category=RuleType.TREND_FOLLOWING
+        )
+    return vectorized
+
+def _create_vectorized_rsi_rule(period: int,
+                                oversold: float,
+                                overbought: float,
+                                adaptive: bool,
+                                filter_config: Optional[Dict]) -> Callable[[VectorizedSignalFrame], VectorizedRuleResult]:
+    """创建RSI规则的向量化版本，逐行结果与 create_rsi_rule 完全一致"""
+    def vectorized(frame: VectorizedSignalFrame) -> VectorizedRuleResult:
+        mask = front_filter_mask(frame, filter_config)
+        if adaptive:
+            volatility = sanitize_volatility(frame.get_market_context('volatility', 0.1))
+            periods = calculate_adaptive_periods(period, volatility, indicator_type='rsi')
+            oversold_adj = np.maximum(20, oversold * (1 - volatility * 0.5))
+            overbought_adj = np.minimum(80, overbought * (1 + volatility * 0.5))
+        else:
+            periods = np.full(len(frame), period, dtype=np.int64)
+            oversold_adj = np.full(len(frame), oversold, dtype=np.float64)
+            overbought_adj = np.full(len(frame), overbought, dtype=np.float64)
+
+        rsi = gather_by_period(frame, 'RSI_', periods, 50)
+        buy = mask & (rsi < oversold_adj)
+        sell = mask & ~buy & (rsi > overbought_adj)
+        signal = np.where(buy, SignalType.BUY, np.where(sell, SignalType.SELL, SignalType.HOLD))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            strength = np.where(
+                buy, np.minimum((oversold_adj - rsi) / oversold_adj, 1.0),
+                np.where(sell, np.minimum((rsi - overbought_adj) / (100 - overbought_adj), 1.0), 0.0)
+            )
+
+        rsi_list = rsi.tolist()
+        oversold_list, overbought_list = oversold_adj.tolist(), overbought_adj.tolist()
+        reasons = {}
+        for i in np.flatnonzero(mask).tolist():
+            if buy[i]:
+                reasons[i] = f'RSI超卖({int(periods[i])}周期): {rsi_list[i]:.2f} < {oversold_list[i]:.1f}'
+            elif sell[i]:
+                reasons[i] = f'RSI超买({int(periods[i])}周期): {rsi_list[i]:.2f} > {overbought_list[i]:.1f}'
+            else:
+                reasons[i] = f'RSI正常: {rsi_list[i]:.2f} (30-70区间)'
+
+        return VectorizedRuleResult(
+            mask=mask,
+            signal=signal,
+            strength=strength,
+            reasons=reasons,
+            rule_name='参数化RSI规则',
+            category=RuleType.MOMENTUM
+        )
+    return vectorized
+
+def volume_filter_windows(filter_config: Optional[Dict]) -> Tuple[int, ...]:
+    """前置成交量确认过滤器使用的均量窗口（需要预计算 avg_volume_{N}）"""
+    vol_config = (filter_config or {}).get('front_signal_filters', {}).get('volume_confirmation', {})
+    return (int(vol_config.get('lookback_days', 20)),) if vol_config.get('enable', False) else ()
+
 def _apply_front_signal_filters(context: TechnicalSignalContext, filter_config: Dict) -> bool:
     """应用前置过滤器 - 在信号计算前执行"""
     front_filters = filter_config.get('front_signal_filters', {})
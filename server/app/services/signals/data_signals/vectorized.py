@@ -0,0 +1,205 @@
+"""
+向量化信号计算支持
+
+规则可以通过 rule.vectorized 属性声明一个列式计算函数：
+    vectorized(frame: VectorizedSignalFrame) -> VectorizedRuleResult
+生成器会一次性对整段序列求值，再按行输出与逐行模式完全相同的信号字典。
+未声明 vectorized 的规则仍然走 TechnicalSignalContext 逐行路径。
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any
+import numpy as np
+import pandas as pd
+
+from .core import TechnicalSignalContext
+from ..signal_batch import SignalBatch
+
+# 缺失值保持NaN（而不是置0）的指标前缀，与逐行模式 _extract_indicators 保持一致
+NAN_PRESERVED_PREFIXES = ('RSI', 'MACD', 'MA')
+
+
+@dataclass
+class VectorizedSignalFrame:
+    """向量化信号计算所需的列式数据"""
+    symbols: List[Any]
+    timestamps: List[Any]
+    price: np.ndarray
+    volume: np.ndarray
+    indicators: Dict[str, np.ndarray]
+    market_context: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+    def get_indicator(self, name: str, default: float = 0.0) -> np.ndarray:
+        """
+        获取整列指标值，语义与 context.indicators.get(name, default) 一致
+        :param name: 指标名称
+        :param default: 指标缺失（或超出指标序列长度）时的默认值
+        :return: 与价格序列等长的 float64 数组
+        """
+        values = self.indicators.get(name)
+        if values is None:
+            return np.full(len(self), float(default))
+        if len(values) >= len(self):
+            return values[:len(self)]
+        padded = np.full(len(self), float(default))
+        padded[:len(values)] = values
+        return padded
+
+    def get_market_context(self, name: str, default: float = 0.0) -> np.ndarray:
+        """获取整列市场环境值，语义与 context.market_context.get(name, default) 一致"""
+        values = self.market_context.get(name)
+        if values is None:
+            return np.full(len(self), float(default))
+        return values
+
+    def context_at(self, index: int) -> TechnicalSignalContext:
+        """构建第index行的技术信号上下文（供未向量化的规则和过滤器使用）"""
+        return TechnicalSignalContext(
+            symbol=self.symbols[index],
+            timestamp=self.timestamps[index],
+            price=float(self.price[index]),
+            volume=float(self.volume[index]),
+            indicators={
+                name: float(values[index])
+                for name, values in self.indicators.items()
+                if index < len(values)
+            },
+            market_context={
+                name: float(values[index])
+                for name, values in self.market_context.items()
+            }
+        )
+
+
+@dataclass
+class VectorizedRuleResult:
+    """向量化规则的计算结果（结构化数组）"""
+    mask: np.ndarray        # 该行是否产生信号（对应逐行模式中规则返回非None）
+    signal: np.ndarray      # 信号方向 1/-1/0
+    strength: np.ndarray    # 信号强度
+    reasons: Dict[int, str]  # 行号 -> 信号原因（仅包含 mask 为 True 的行）
+    rule_name: str
+    category: str
+
+    def signal_at(self, index: int, frame: VectorizedSignalFrame) -> Optional[Dict]:
+        """输出第index行的信号字典，字段与逐行规则返回值一致"""
+        if not self.mask[index]:
+            return None
+        return {
+            'symbol': frame.symbols[index],
+            'signal': int(self.signal[index]),
+            'strength': float(self.strength[index]),
+            'reason': self.reasons[index],
+            'timestamp': frame.timestamps[index],
+            'rule_name': self.rule_name,
+            'category': self.category
+        }
+
+    def to_batch(self, frame: VectorizedSignalFrame, rows: np.ndarray) -> SignalBatch:
+        """输出指定行（须为 mask 为 True 的行）组成的列式信号批，字段与 signal_at 一致"""
+        return SignalBatch.from_columns(
+            [frame.timestamps[i] for i in rows],
+            [frame.symbols[i] for i in rows],
+            self.signal[rows],
+            self.strength[rows],
+            [self.reasons[i] for i in rows],
+            rule_name=self.rule_name,
+            category=self.category
+        )
+
+
+def build_signal_frame(df: pd.DataFrame, indicators: Dict[str, pd.Series]) -> VectorizedSignalFrame:
+    """
+    将价格数据和指标转换为列式数组
+    数值转换规则与逐行模式保持一致：价格/成交量无效时为0，RSI/MACD/MA类指标缺失保持NaN，其他指标缺失为0
+    :param df: 价格数据
+    :param indicators: 指标字典 {指标名: Series}
+    :return: VectorizedSignalFrame
+    """
+    n = len(df)
+
+    def _column(*names, default=None):
+        for name in names:
+            if name in df.columns:
+                return df[name]
+        return default
+
+    price_col = _column('收盘价', 'close', '收盘')
+    volume_col = _column('成交量', 'volume')
+    price = (pd.to_numeric(price_col, errors='coerce').fillna(0.0).to_numpy(dtype=np.float64)
+             if price_col is not None else np.zeros(n))
+    volume = (pd.to_numeric(volume_col, errors='coerce').fillna(0.0).to_numpy(dtype=np.float64)
+              if volume_col is not None else np.zeros(n))
+
+    symbol_col = _column('证券代码', 'symbol')
+    symbols = symbol_col.tolist() if symbol_col is not None else ['UNKNOWN'] * n
+    timestamp_col = _column('日期', 'date')
+    timestamps = timestamp_col.tolist() if timestamp_col is not None else [pd.Timestamp.now()] * n
+
+    indicator_arrays = {}
+    for name, series in indicators.items():
+        series = pd.Series(series)
+        raw_missing = series.isna().to_numpy()
+        values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64)
+        if not name.startswith(NAN_PRESERVED_PREFIXES):
+            values = np.where(raw_missing, 0.0, values)
+        indicator_arrays[name] = values
+
+    return VectorizedSignalFrame(
+        symbols=symbols,
+        timestamps=timestamps,
+        price=price,
+        volume=volume,
+        indicators=indicator_arrays
+    )
+
+
+def front_filter_mask(frame: VectorizedSignalFrame, filter_config: Optional[Dict]) -> np.ndarray:
+    """
+    前置过滤器的向量化版本，与 _apply_front_signal_filters 逐行结果一致
+    :return: 布尔数组，True 表示该行通过前置过滤
+    """
+    passed = np.ones(len(frame), dtype=bool)
+    if not filter_config:
+        return passed
+    front_filters = filter_config.get('front_signal_filters', {})
+
+    if front_filters.get('volatility_filter', {}).get('enable', False):
+        vol_config = front_filters['volatility_filter']
+        volatility = frame.get_market_context('volatility', 0)
+        passed &= ((vol_config.get('min_volatility', 0.01) <= volatility)
+                   & (volatility <= vol_config.get('max_volatility', 0.5)))
+
+    if front_filters.get('trend_strength_filter', {}).get('enable', False):
+        adx = frame.get_indicator('ADX', 0)
+        passed &= ~(adx < front_filters['trend_strength_filter'].get('min_adx', 25))
+
+    if front_filters.get('volume_confirmation', {}).get('enable', False):
+        vol_config = front_filters['volume_confirmation']
+        avg_volume = frame.get_market_context(f"avg_volume_{vol_config.get('lookback_days', 20)}", 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            volume_ratio = frame.volume / avg_volume
+        passed &= (avg_volume == 0) | (volume_ratio > vol_config.get('volume_multiplier', 1.2))
+
+    return passed
+
+
+def gather_by_period(frame: VectorizedSignalFrame, prefix: str, periods: np.ndarray, default: float) -> np.ndarray:
+    """
+    按行选取不同周期的指标值（自适应模式下每行周期可能不同）
+    :param prefix: 指标前缀，如 'MA_'、'RSI_'
+    :param periods: 每行使用的周期
+    :param default: 指标缺失时的默认值
+    """
+    result = np.empty(len(frame), dtype=np.float64)
+    for period in np.unique(periods):
+        rows = periods == period
+        result[rows] = frame.get_indicator(f'{prefix}{int(period)}', default)[rows]
+    return result
+
+
+def sanitize_volatility(volatility: np.ndarray, default: float = 0.1) -> np.ndarray:
+    """与逐行规则一致：波动率为NaN或非正时使用默认值"""
+    return np.where(np.isnan(volatility) | (volatility <= 0), default, volatility)
@@ -0,0 +1,285 @@
+"""
+列式信号批（struct-of-arrays）
+
+信号在生成器、合并、回测之间通常以字典列表传递，每条信号重复保存 reason / rule_name / category 等键和字符串。
+SignalBatch 把同一批信号按列存放：
+- timestamp int64（纳秒）、direction int8（1/-1/0）、strength float32、source int8（数据/事件驱动）
+- symbol / rule / reason / event_id 为字符串池下标（int32 / int16，-1 表示缺失），相同字符串只存一份
+- 规则类别按规则存放（categories 与 rules 一一对应）
+
+拼接时合并字符串池并重映射下标，排序、过滤都是数组下标操作；与字典列表之间用 from_dicts / to_dicts 转换（供 API 使用）
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 信号来源，source 列保存下标
+SIGNAL_SOURCES = ('data_driven', 'event_driven')
+DATA_DRIVEN = 0
+EVENT_DRIVEN = 1
+
+
+def _intern(values: Sequence, dtype) -> Tuple[np.ndarray, List]:
+    """字符串列转为 (下标数组, 字符串池)，None/NaN 的下标为 -1"""
+    codes, uniques = pd.factorize(pd.Series(list(values), dtype=object))
+    return codes.astype(dtype), list(uniques)
+
+
+def _merge_pools(pools: List[List]) -> Tuple[List, List[np.ndarray]]:
+    """合并多个字符串池，返回 (合并后的池, 各池下标到新下标的映射数组)"""
+    merged: List = []
+    positions: Dict = {}
+    mappings = []
+    for pool in pools:
+        mapping = np.empty(len(pool), dtype=np.int64)
+        for i, value in enumerate(pool):
+            position = positions.get(value)
+            if position is None:
+                position = positions[value] = len(merged)
+                merged.append(value)
+            mapping[i] = position
+        mappings.append(mapping)
+    return merged, mappings
+
+
+def _remap(codes: np.ndarray, mapping: np.ndarray) -> np.ndarray:
+    """按映射数组重写下标（-1 保持为 -1）"""
+    if len(mapping) == 0:
+        return codes.copy()
+    return np.where(codes >= 0, mapping[np.maximum(codes, 0)], -1).astype(codes.dtype)
+
+
+@dataclass
+class SignalBatch:
+    """列式信号批"""
+    timestamp: np.ndarray                 # int64 纳秒
+    symbol: np.ndarray                    # int32，symbols 下标
+    direction: np.ndarray                 # int8，1买入 / -1卖出 / 0持有
+    strength: np.ndarray                  # float32
+    rule: np.ndarray                      # int16，rules 下标
+    reason: np.ndarray                    # int32，reasons 下标
+    source: np.ndarray                    # int8，SIGNAL_SOURCES 下标
+    event_id: np.ndarray                  # int32，event_ids 下标
+    symbols: List[str] = field(default_factory=list)
+    rules: List[str] = field(default_factory=list)
+    categories: List[Optional[str]] = field(default_factory=list)
+    reasons: List[str] = field(default_factory=list)
+    event_ids: List[str] = field(default_factory=list)
+
+    _CODE_POOLS = (('symbol', 'symbols'), ('reason', 'reasons'), ('event_id', 'event_ids'))
+    _COLUMNS = ('timestamp', 'symbol', 'direction', 'strength', 'rule', 'reason', 'source', 'event_id')
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    @property
+    def nbytes(self) -> int:
+        """数组部分占用的字节数（不含字符串池）"""
+        return sum(getattr(self, column).nbytes for column in self._COLUMNS)
+
+    # ---- 构造 ----
+    @classmethod
+    def empty(cls) -> 'SignalBatch':
+        return cls(timestamp=np.zeros(0, dtype=np.int64), symbol=np.zeros(0, dtype=np.int32),
+                   direction=np.zeros(0, dtype=np.int8), strength=np.zeros(0, dtype=np.float32),
+                   rule=np.zeros(0, dtype=np.int16), reason=np.zeros(0, dtype=np.int32),
+                   source=np.zeros(0, dtype=np.int8), event_id=np.zeros(0, dtype=np.int32))
+
+    @classmethod
+    def from_columns(cls, timestamps, symbols: Sequence, direction, strength, reasons: Sequence,
+                     rule_name: Optional[str] = None, category: Optional[str] = None,
+                     source: int = DATA_DRIVEN, event_ids: Optional[Sequence] = None) -> 'SignalBatch':
+        """
+        由列数据构造（同一批来自同一规则时使用，如向量化规则的输出）
+        :param timestamps: 时间戳序列（任意 pd.to_datetime 可解析的格式）
+        :param symbols: 标的序列
+        :param direction: 信号方向数组
+        :param strength: 信号强度数组
+        :param reasons: 信号原因序列
+        :param rule_name: 规则名称
+        :param category: 规则类别
+        :param source: DATA_DRIVEN 或 EVENT_DRIVEN
+        :param event_ids: 事件ID序列
+        """
+        n = len(direction)
+        symbol_codes, symbol_pool = _intern(symbols, np.int32)
+        reason_codes, reason_pool = _intern(reasons, np.int32)
+        if event_ids is not None:
+            event_codes, event_pool = _intern(event_ids, np.int32)
+        else:
+            event_codes, event_pool = np.full(n, -1, dtype=np.int32), []
+        rules = [rule_name] if rule_name is not None else []
+        return cls(
+            timestamp=pd.to_datetime(list(timestamps)).asi8.astype(np.int64) if n else np.zeros(0, dtype=np.int64),
+            symbol=symbol_codes,
+            direction=np.asarray(direction, dtype=np.int8),
+            strength=np.asarray(strength, dtype=np.float32),
+            rule=np.full(n, 0 if rules else -1, dtype=np.int16),
+            reason=reason_codes,
+            source=np.full(n, source, dtype=np.int8),
+            event_id=event_codes,
+            symbols=symbol_pool, rules=rules, categories=[category] if rules else [],
+            reasons=reason_pool, event_ids=event_pool,
+        )
+
+    @classmethod
+    def from_dicts(cls, signals: Iterable[Dict], source: Optional[int] = None) -> 'SignalBatch':
+        """
+        由信号字典列表构造
+        :param signals: 生成器输出的信号字典（symbol、signal、strength、reason、timestamp、rule_name、category、event_id），
+                        也接受统一信号结构（direction 代替 signal，type 表示来源）
+        :param source: 信号来源，默认按字典的 type 字段或有无 event_id 判断
+        """
+        signals = list(signals)
+        if not signals:
+            return cls.empty()
+        rule_codes, rule_pool = _intern([s.get('rule_name') for s in signals], np.int16)
+        category_of = {}
+        for signal, code in zip(signals, rule_codes):
+            if code >= 0 and code not in category_of:
+                category_of[code] = signal.get('category')
+        if source is None:
+            sources = np.array([SIGNAL_SOURCES.index(s['type']) if s.get('type') in SIGNAL_SOURCES
+                                else (EVENT_DRIVEN if s.get('event_id') is not None else DATA_DRIVEN)
+                                for s in signals], dtype=np.int8)
+        else:
+            sources = np.full(len(signals), source, dtype=np.int8)
+        batch = cls.from_columns(
+            [s.get('timestamp') for s in signals],
+            [s.get('symbol') for s in signals],
+            [s.get('direction', s.get('signal', 0)) for s in signals],
+            [s.get('strength', 0.5) for s in signals],
+            [s.get('reason') for s in signals],
+            event_ids=[s.get('event_id') for s in signals],
+        )
+        batch.rule = rule_codes
+        batch.rules = rule_pool
+        batch.categories = [category_of.get(i) for i in range(len(rule_pool))]
+        batch.source = sources
+        return batch
+
+    # ---- 输出 ----
+    def to_dicts(self) -> List[Dict]:
+        """
+        转为信号字典列表（字段同生成器输出，另含 type 来源；时间戳为 pd.Timestamp，强度按 float32 最短表示还原）
+        """
+        if not len(self):
+            return []
+        symbols = np.asarray(self.symbols + [None], dtype=object)[self.symbol]
+        reasons = np.asarray(self.reasons + [None], dtype=object)[self.reason]
+        rules = np.asarray(self.rules + [None], dtype=object)[self.rule]
+        categories = np.asarray(self.categories + [None], dtype=object)[self.rule]
+        event_ids = np.asarray(self.event_ids + [None], dtype=object)[self.event_id]
+        sources = np.asarray(SIGNAL_SOURCES, dtype=object)[self.source]
+        timestamps = pd.to_datetime(self.timestamp)
+        strengths = self.strength.astype(str).astype(np.float64).tolist()
+        directions = self.direction.tolist()
+        result = []
+        for i in range(len(self)):
+            signal = {
+                'symbol': symbols[i],
+                'signal': directions[i],
+                'strength': strengths[i],
+                'reason': reasons[i],
+                'timestamp': timestamps[i],
+                'rule_name': rules[i],
+                'category': categories[i],
+                'type': sources[i],
+            }
+            if event_ids[i] is not None:
+                signal['event_id'] = event_ids[i]
+            result.append(signal)
+        return result
+
+    # ---- 变换 ----
+    def take(self, indices) -> 'SignalBatch':
+        """按下标取子集（字符串池共享，不复制）"""
+        indices = np.asarray(indices)
+        columns = {column: getattr(self, column)[indices] for column in self._COLUMNS}
+        return SignalBatch(**columns, symbols=self.symbols, rules=self.rules, categories=self.categories,
+                           reasons=self.reasons, event_ids=self.event_ids)
+
+    def filter(self, mask: np.ndarray) -> 'SignalBatch':
+        """按布尔掩码过滤"""
+        return self.take(np.flatnonzero(mask))
+
+    def select(self, symbols: Optional[Sequence[str]] = None, direction: Optional[int] = None,
+               min_strength: Optional[float] = None, start=None, end=None) -> 'SignalBatch':
+        """
+        按条件过滤
+        :param symbols: 标的列表
+        :param direction: 信号方向
+        :param min_strength: 最小强度
+        :param start: 起始时间（含）
+        :param end: 结束时间（含）
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if symbols is not None:
+            wanted = {value for value in symbols}
+            mask &= np.isin(self.symbol, [i for i, value in enumerate(self.symbols) if value in wanted])
+        if direction is not None:
+            mask &= self.direction == direction
+        if min_strength is not None:
+            mask &= self.strength >= np.float32(min_strength)
+        if start is not None:
+            mask &= self.timestamp >= pd.Timestamp(start).value
+        if end is not None:
+            mask &= self.timestamp <= pd.Timestamp(end).value
+        return self.filter(mask)
+
+    def sort(self, by_symbol: bool = False) -> 'SignalBatch':
+        """按时间稳定排序（by_symbol 时先按标的再按时间）"""
+        if by_symbol:
+            order = np.lexsort((self.timestamp, np.asarray(self.symbols + [''], dtype=object)[self.symbol].astype(str)))
+        else:
+            order = np.argsort(self.timestamp, kind='stable')
+        return self.take(order)
+
+    @classmethod
+    def concat(cls, batches: Sequence['SignalBatch']) -> 'SignalBatch':
+        """拼接多个信号批（合并字符串池并重映射下标）"""
+        batches = [batch for batch in batches if batch is not None]
+        if not batches:
+            return cls.empty()
+        if len(batches) == 1:
+            return batches[0]
+        columns = {}
+        pools = {}
+        for code_column, pool_name in cls._CODE_POOLS:
+            pools[pool_name], mappings = _merge_pools([getattr(batch, pool_name) for batch in batches])
+            columns[code_column] = np.concatenate([_remap(getattr(batch, code_column), mapping)
+                                                   for batch, mapping in zip(batches, mappings)])
+        # 规则按 (名称, 类别) 合并
+        rule_pool, mappings = _merge_pools([list(zip(batch.rules, batch.categories)) for batch in batches])
+        columns['rule'] = np.concatenate([_remap(batch.rule, mapping) for batch, mapping in zip(batches, mappings)])
+        for column in ('timestamp', 'direction', 'strength', 'source'):
+            columns[column] = np.concatenate([getattr(batch, column) for batch in batches])
+        return cls(**columns, **pools, rules=[name for name, _ in rule_pool],
+                   categories=[category for _, category in rule_pool])
+
+    def deduplicate(self, time_window) -> 'SignalBatch':
+        """
+        时间窗口内同一标的、同一方向的信号只保留强度最高的（规则同 UnifiedSignalManager._optimize_signals，输入须按时间排序）
+        时间戳为 NaT 的信号不参与去重，原样保留
+        :param time_window: 时间窗口（pd.Timedelta 或可解析的字符串）
+        """
+        window = pd.Timedelta(time_window).value
+        timestamps = self.timestamp.tolist()
+        strengths = self.strength.tolist()
+        keys = (self.symbol.astype(np.int64) * 256 + (self.direction.astype(np.int64) + 128)).tolist()
+        kept: List[Optional[int]] = []
+        latest: Dict[int, int] = {}
+        for i, key in enumerate(keys):
+            if timestamps[i] == pd.NaT.value:
+                kept.append(i)
+                continue
+            slot = latest.get(key)
+            if slot is not None and timestamps[i] - timestamps[kept[slot]] <= window:
+                if strengths[i] <= strengths[kept[slot]]:
+                    continue
+                kept[slot] = None
+            latest[key] = len(kept)
+            kept.append(i)
+        return self.take([i for i in kept if i is not None])
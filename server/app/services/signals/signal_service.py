@@ -1,7 +1,9 @@
 from core.logger import logger
+import os
+import threading
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 
 from common.debug_utils import debug_signals, debug_indicators
@@ -13,8 +15,13 @@ from .data_signals import (
     default_rsi_rule,
     trend_strength_filter_rule,
     support_resistance_breakout_rule,
-    rule_registry
+    rule_registry,
+    ParameterizedRuleFactory,
+    BASIC_RULES_METADATA
 )
+from .data_signals.vectorized import build_signal_frame
+from .data_signals.market_context import precompute_market_context, DEFAULT_VOLUME_WINDOWS
+from .signal_batch import SignalBatch, DATA_DRIVEN, EVENT_DRIVEN
 
 # 导入事件驱动相关
 from app.services.events.event_service import MarketEvent, EventType, EventSeverity
@@ -24,6 +31,66 @@ from .event_signals.event_signal_rules import (
     keyword_trigger_rule
 )
 
+# 统一信号去重的默认时间窗口（pandas 时间间隔字符串，如 1D、30min）
+SIGNAL_DEDUP_WINDOW = pd.Timedelta(os.getenv("SIGNAL_DEDUP_WINDOW", "1D"))
+
+# ============ 信号监听 ============
+# 实时入口（事件监控、显式 publish=True 的信号生成）产生的新信号会推送给已注册的监听器（如实时推送服务），
+# 监听器签名: listener(signal_kind, signals)。回测、参数优化、全市场扫描等历史计算默认不推送
+_signal_listeners = []
+# 每个 (信号类型, 标的) 已推送的最新信号时间（纳秒）及该时间上已推送的信号标识，
+# 更早的信号和同一时间上已推送过的信号不再推送
+_published_watermarks: Dict[Tuple[str, str], Tuple[int, set]] = {}
+_published_lock = threading.Lock()
+
+def add_signal_listener(listener):
+    """注册信号监听器"""
+    if listener not in _signal_listeners:
+        _signal_listeners.append(listener)
+
+def remove_signal_listener(listener):
+    """移除信号监听器"""
+    if listener in _signal_listeners:
+        _signal_listeners.remove(listener)
+
+def _signal_identity(signal: Dict) -> tuple:
+    """同一标的、同一时间上区分不同信号的标识"""
+    return signal.get('signal'), signal.get('rule_name'), signal.get('reason'), signal.get('event_id')
+
+def publish_signals(signal_kind: str, signals: List[Dict]):
+    """
+    向监听器推送新信号（无监听器时不做任何事，监听器异常不影响信号生成）
+    实时入口会反复生成同一批信号（如事件监控轮询），每条信号只推送一次：
+    同一标的早于已推送时间的信号、同一时间上已推送过的信号、没有时间戳的信号都会被丢弃
+    :param signal_kind: 'data_driven' 或 'event_driven'
+    :param signals: 信号字典列表
+    """
+    if not signals or not _signal_listeners:
+        return
+    fresh = []
+    with _published_lock:
+        for signal in signals:
+            timestamp = pd.to_datetime(signal.get('timestamp'), errors='coerce')
+            if pd.isna(timestamp):
+                continue
+            key = (signal_kind, str(signal.get('symbol')))
+            watermark, published = _published_watermarks.get(key, (timestamp.value, set()))
+            identity = _signal_identity(signal)
+            if timestamp.value < watermark or (timestamp.value == watermark and identity in published):
+                continue
+            if timestamp.value > watermark:
+                published = set()
+            published.add(identity)
+            _published_watermarks[key] = (timestamp.value, published)
+            fresh.append(signal)
+    if not fresh:
+        return
+    for listener in list(_signal_listeners):
+        try:
+            listener(signal_kind, fresh)
+        except Exception as e:
+            logger.error(f"[SignalService]信号监听器执行失败: {e}")
+
 # ============ 数据驱动信号生成器 ============
 class DataSignalGenerator:
     """数据驱动信号生成器"""
@@ -32,6 +99,8 @@ class DataSignalGenerator:
         self.signal_rules = []
         self.filter_rules = []
         self.weight_rules = []
+        # 始终预计算的均量窗口（生成 market_context 中的 avg_volume_{N}），规则/过滤器声明的窗口另行加入
+        self.volume_windows = DEFAULT_VOLUME_WINDOWS
     
     def add_signal_rule(self, rule_func):
         """添加信号生成规则"""
@@ -44,9 +113,27 @@ class DataSignalGenerator:
     def add_weight_rule(self, weight_func):
         """添加信号权重规则"""
         self.weight_rules.append(weight_func)
+
+    def required_volume_windows(self) -> List[int]:
+        """
+        需要预计算的均量窗口：默认窗口与各规则、过滤器声明的成交量回看窗口（volume_windows 属性）的并集
+        未预计算的 avg_volume_{N} 读为0，成交量确认会直接通过
+        """
+        windows = set(self.volume_windows)
+        for func in self.signal_rules + self.filter_rules:
+            windows.update(getattr(func, 'volume_windows', ()))
+        return sorted(windows)
     
-    def generate_signals(self, df: pd.DataFrame, indicators: Dict[str, pd.Series]) -> List[Dict]:
-        """生成技术信号"""
+    def generate_signals(self, df: pd.DataFrame, indicators: Dict[str, pd.Series], vectorized: bool = True,
+                         publish: bool = False) -> List[Dict]:
+        """
+        生成技术信号
+        :param df: 价格数据
+        :param indicators: 指标字典 {指标名: Series}
+        :param vectorized: 是否启用向量化规则（声明了 rule.vectorized 的规则整段求值），关闭时全部走逐行模式
+        :param publish: 是否把最新一根K线上的信号推送给监听器（仅实时入口使用）
+        :return: 信号列表
+        """
         signals = []
         rule_names = []
         logger.debug(f"[SignalService]开始生成数据信号，数据行数: {len(df)}, 信号规则数量: {len(self.signal_rules)}")
@@ -80,50 +167,34 @@ class DataSignalGenerator:
                 rule_name = getattr(rule, 'chinese_name', rule.__name__ if hasattr(rule, '__name__') else f'规则{len(rule_signal_counts)}')
             rule_signal_counts[rule_name] = 0
         
+        # 列式数据：价格、成交量、指标、市场环境一次性转换为数组
+        frame = build_signal_frame(df, indicators)
+        frame.market_context = precompute_market_context(df, volume_windows=self.required_volume_windows())
+        
+        # 向量化规则整段求值，未向量化的规则回退到逐行上下文模式
+        vectorized_results = {}
+        if vectorized:
+            for rule_idx, rule in enumerate(self.signal_rules):
+                vectorized_func = getattr(rule, 'vectorized', None)
+                if vectorized_func is None:
+                    continue
+                try:
+                    vectorized_results[rule_idx] = vectorized_func(frame)
+                except Exception as e:
+                    logger.warning(f"[SignalService]规则{rule_idx}向量化计算失败，回退逐行模式: {e}")
+        logger.debug(f"[SignalService]向量化规则数量: {len(vectorized_results)}/{len(self.signal_rules)}")
+        
         for i in range(1, len(df)):  # 从第二行开始，确保有前一期数据
-            row = df.iloc[i]
-            prev_row = df.iloc[i-1]
-            
-            # 获取价格和成交量，确保是数值类型
-            price_raw = row.get('收盘价', row.get('close', row.get('收盘', 0)))
-            volume_raw = row.get('成交量', row.get('volume', 0))
-            
-            # 转换为数值类型
-            try:
-                price = float(pd.to_numeric(price_raw, errors='coerce'))
-                if pd.isna(price):
-                    price = 0.0
-            except (ValueError, TypeError):
-                price = 0.0
-                
-            try:
-                volume = float(pd.to_numeric(volume_raw, errors='coerce'))
-                if pd.isna(volume):
-                    volume = 0.0
-            except (ValueError, TypeError):
-                volume = 0.0
-            
-            # 提取指标值
-            extracted_indicators = self._extract_indicators(indicators, i, prev_row)
-            market_context = self._calculate_market_context(df, i)
-            
-            # 构建技术信号上下文
-            context = TechnicalSignalContext(
-                symbol=row.get('证券代码', row.get('symbol', 'UNKNOWN')),
-                timestamp=row.get('日期', row.get('date', pd.Timestamp.now())),
-                price=price,  # 使用转换后的数值
-                volume=volume,  # 使用转换后的数值
-                indicators=extracted_indicators,
-                market_context=market_context
-            )
+            context = None  # 按需构建，全部规则已向量化且无过滤/权重规则时不需要上下文
             
             if i == 10:
+                context = frame.context_at(i)
                 debug_indicators(f"第{i}行上下文", {
-                    "价格": price,
-                    "成交量": volume,
-                    "指标数量": len(extracted_indicators)
+                    "价格": context.price,
+                    "成交量": context.volume,
+                    "指标数量": len(context.indicators)
                 })
-                debug_indicators(f"第{i}行指标值", extracted_indicators)
+                debug_indicators(f"第{i}行指标值", context.indicators)
             
             # 应用所有信号规则
             for rule_idx, rule in enumerate(self.signal_rules):
@@ -134,8 +205,14 @@ class DataSignalGenerator:
                         rule_name = rule.metadata.get('chinese_name', f'规则{rule_idx}')
                     else:
                         rule_name = getattr(rule, 'chinese_name', rule.__name__ if hasattr(rule, '__name__') else f'规则{rule_idx}')
-                    signal = rule(context)
+                    if rule_idx in vectorized_results:
+                        signal = vectorized_results[rule_idx].signal_at(i, frame)
+                    else:
+                        context = context or frame.context_at(i)
+                        signal = rule(context)
                     if signal:
+                        if self.filter_rules or self.weight_rules:
+                            context = context or frame.context_at(i)
                         if self._apply_filters(signal, context):
                             # 应用权重规则
                             signal = self._apply_weights(signal, context)
@@ -153,119 +230,44 @@ class DataSignalGenerator:
         for signal in signals:
             signal_type = signal.get('signal', 'unknown')
             signal_type_stats[signal_type] = signal_type_stats.get(signal_type, 0) + 1
+        if publish and len(df):
+            latest = frame.timestamps[-1]
+            publish_signals('data_driven', [signal for signal in signals if signal.get('timestamp') == latest])
         return signals
     
-    def _extract_indicators(self, indicators: Dict, index: int, prev_row) -> Dict[str, float]:
-        """提取当前时点的指标值"""
-        result = {}
-        for name, series in indicators.items():
-            if index < len(series):
-                # 确保指标值是数值类型
-                value = series.iloc[index]
-                if pd.notna(value):
-                    try:
-                        converted_value = float(pd.to_numeric(value, errors='coerce'))
-                        result[name] = converted_value
-                    except (ValueError, TypeError) as e:
-                        # 对于RSI等技术指标，保持NaN而不是设为0
-                        if name.startswith('RSI') or name.startswith('MACD') or name.startswith('MA'):
-                            result[name] = np.nan
-                        else:
-                            result[name] = 0.0
-                else:
-                    # 对于RSI等技术指标，保持NaN而不是设为0
-                    if name.startswith('RSI') or name.startswith('MACD') or name.startswith('MA'):
-                        result[name] = np.nan
-                    else:
-                        result[name] = 0.0
-                
-                # 处理前一期值
-                # if index > 0:
-                #     prev_value = series.iloc[index-1]
-                #     if pd.notna(prev_value):
-                #         try:
-                #             converted_prev_value = float(pd.to_numeric(prev_value, errors='coerce'))
-                #             result[f'{name}_prev'] = converted_prev_value
-                #         except (ValueError, TypeError) as e:
-                #             if name.startswith('RSI') or name.startswith('MACD') or name.startswith('MA'):
-                #                 result[f'{name}_prev'] = np.nan
-                #             else:
-                #                 result[f'{name}_prev'] = 0.0
-                #     else:
-                #         if name.startswith('RSI') or name.startswith('MACD') or name.startswith('MA'):
-                #             result[f'{name}_prev'] = np.nan
-                #         else:
-                #             result[f'{name}_prev'] = 0.0
-        return result
-    
-    def _calculate_market_context(self, df: pd.DataFrame, index: int) -> Dict[str, float]:
-        """计算市场环境上下文"""
-        # 计算最近20期的波动率
-        start_idx = max(0, index - 20)
-        recent_data = df.iloc[start_idx:index+1]
+    def generate_signal_batch(self, df: pd.DataFrame, indicators: Dict[str, pd.Series], publish: bool = False) -> SignalBatch:
+        """
+        生成列式信号批，信号顺序与 generate_signals 一致（按行，同一行内按规则顺序）
+        全部规则都已向量化且没有过滤/权重规则时直接由向量化结果的数组构造，不经过逐行信号字典；否则由 generate_signals 的结果转换
+        :param df: 价格数据
+        :param indicators: 指标字典 {指标名: Series}
+        :param publish: 是否把最新一根K线上的信号推送给监听器（仅实时入口使用）
+        """
+        vectorized_funcs = [getattr(rule, 'vectorized', None) for rule in self.signal_rules]
+        if self.filter_rules or self.weight_rules or None in vectorized_funcs or not vectorized_funcs:
+            return SignalBatch.from_dicts(self.generate_signals(df, indicators, publish=publish), source=DATA_DRIVEN)
         
-        # 确保至少有2行数据才计算波动率
-        if len(recent_data) > 1:
-            # 优先使用中文列名，再尝试英文列名
-            close_col = None
-            if '收盘价' in recent_data.columns:
-                close_col = '收盘价'
-            elif 'close' in recent_data.columns:
-                close_col = 'close'
-            elif '收盘' in recent_data.columns:
-                close_col = '收盘'
-            
-            if close_col:
-                returns = recent_data[close_col].pct_change().dropna()
-                if len(returns) > 0:
-                    daily_volatility = returns.std()
-                    # 强化NaN检查
-                    if pd.isna(daily_volatility) or daily_volatility <= 0 or not np.isfinite(daily_volatility):
-                        volatility = 0.2  # 默认波动率
-                    else:
-                        volatility = daily_volatility * np.sqrt(252)
-                        # 再次检查年化后的波动率
-                        if pd.isna(volatility) or volatility <= 0 or not np.isfinite(volatility):
-                            volatility = 0.2
-                else:
-                    volatility = 0.2
-            else:
-                volatility = 0.2
-        else:
-            # 数据不足时直接使用默认值
-            volatility = 0.2
-        
-        # 计算平均成交量，确保不返回NaN
-        volume_col = None
-        if '成交量' in recent_data.columns:
-            volume_col = '成交量'
-        elif 'volume' in recent_data.columns:
-            volume_col = 'volume'
-        
-        if volume_col and not recent_data[volume_col].empty:
-            # 先转换为数值类型，过滤异常值
-            volume_series = pd.to_numeric(recent_data[volume_col], errors='coerce')
-            volume_series = volume_series.dropna()
-            
-            if len(volume_series) > 0:
-                # 过滤异常值：去除超过中位数100倍的值
-                median_volume = volume_series.median()
-                if median_volume > 0:
-                    volume_series = volume_series[volume_series <= median_volume * 100]
-                
-                avg_volume = volume_series.mean()
-                # 确保avg_volume不是NaN且在合理范围内
-                if pd.isna(avg_volume) or avg_volume <= 0 or avg_volume > 1e12:
-                    avg_volume = median_volume if median_volume > 0 else 1000000  # 默认一个大值，使之不满足
-            else:
-                avg_volume = 1000000  # 默认一个大值，使之不满足
-        else:
-            avg_volume = 1000000  # 默认一个大值，使之不满足
+        frame = build_signal_frame(df, indicators)
+        frame.market_context = precompute_market_context(df, volume_windows=self.required_volume_windows())
+        batches, rows, rule_ids = [], [], []
+        for rule_idx, vectorized_func in enumerate(vectorized_funcs):
+            try:
+                result = vectorized_func(frame)
+            except Exception as e:
+                logger.warning(f"[SignalService]规则{rule_idx}向量化计算失败，回退逐行模式: {e}")
+                return SignalBatch.from_dicts(self.generate_signals(df, indicators, publish=publish), source=DATA_DRIVEN)
+            selected = np.flatnonzero(result.mask[1:]) + 1  # 与逐行模式一致，从第二行开始
+            batches.append(result.to_batch(frame, selected))
+            rows.append(selected)
+            rule_ids.append(np.full(len(selected), rule_idx))
         
-        return {
-            'volatility': volatility,
-            'avg_volume': avg_volume
-        }
+        batch = SignalBatch.concat(batches)
+        batch = batch.take(np.lexsort((np.concatenate(rule_ids), np.concatenate(rows))))
+        logger.info(f"[SignalService]列式信号生成完成: {len(batch)} 个信号")
+        if publish and _signal_listeners and len(batch):
+            latest = pd.Timestamp(frame.timestamps[-1]).value
+            publish_signals('data_driven', batch.filter(batch.timestamp == latest).to_dicts())
+        return batch
     
     def _apply_filters(self, signal: Dict, context: TechnicalSignalContext) -> bool:
         """应用过滤规则"""
@@ -280,6 +282,56 @@ class DataSignalGenerator:
             signal = weight_rule(signal, context)
         return signal
 
+def build_data_signal_generator(data_signal_config: Dict) -> Tuple[DataSignalGenerator, List[str]]:
+    """
+    按数据信号配置构建生成器（RSI、MA交叉规则，参数化或默认规则）
+    :param data_signal_config: 数据信号配置，格式同 generate_unified_signals_with_configs
+    :return: (生成器, 启用的规则名列表)
+    """
+    data_generator = DataSignalGenerator()
+    # 检查是否有启用的数据信号规则
+    enabled_data_rules = []
+
+    # 处理RSI规则
+    if data_signal_config.get('rsi', {}).get('enable', True):
+        rsi_config = data_signal_config.get('rsi', {})
+        if rsi_config.get('use_parameterized', False): # 使用参数化规则
+            config_rsi_rule = ParameterizedRuleFactory.create_rsi_rule(
+                period=rsi_config.get('period', 14),
+                oversold=rsi_config.get('oversold', 30),
+                overbought=rsi_config.get('overbought', 70),
+                adaptive=rsi_config.get('adaptive', False),  # 新增自适应参数
+                filter_config=rsi_config.get('filter_config')  # 传入独立的过滤配置
+            )
+            data_generator.add_signal_rule(config_rsi_rule)
+            debug_signals(f"配置参数化RSI规则: 周期={rsi_config.get('period', 14)}, 超卖={rsi_config.get('oversold', 30)}, 超买={rsi_config.get('overbought', 70)}{', 参数将会自适应' if rsi_config.get('adaptive', False) else ''}")
+        else: # 使用默认参数
+            basic_rsi_rule = default_rsi_rule
+            basic_rsi_rule.metadata = BASIC_RULES_METADATA['rsi']
+            data_generator.add_signal_rule(basic_rsi_rule)
+            debug_signals("配置默认的RSI规则")
+        enabled_data_rules.append('rsi')
+
+    # 处理MA交叉规则
+    if data_signal_config.get('ma_crossover', {}).get('enable', True):
+        ma_config = data_signal_config.get('ma_crossover', {})
+        if ma_config.get('use_parameterized', False):
+            config_ma_rule = ParameterizedRuleFactory.create_ma_rule(
+                short_period=ma_config.get('short_period', 5),
+                long_period=ma_config.get('long_period', 20),
+                adaptive=ma_config.get('adaptive', False),
+                filter_config=ma_config.get('filter_config')  # 传入独立的过滤配置
+            )
+            data_generator.add_signal_rule(config_ma_rule)
+            debug_signals(f"配置参数化MA规则: 短周期={ma_config.get('short_period', 5)}, 长周期={ma_config.get('long_period', 20)}{', 参数将会自适应' if ma_config.get('adaptive', False) else ''}")
+        else: # 使用默认参数
+            basic_ma_rule = default_ma_crossover_rule
+            basic_ma_rule.metadata = BASIC_RULES_METADATA['ma_crossover']
+            data_generator.add_signal_rule(basic_ma_rule)
+            debug_signals("配置默认的MA规则")
+        enabled_data_rules.append('ma_crossover')
+    return data_generator, enabled_data_rules
+
 # ============ 事件驱动信号生成器 ============
 class EventSignalGenerator:
     def __init__(self):
@@ -289,8 +341,12 @@ class EventSignalGenerator:
         """添加信号生成规则"""
         self.signal_rules.append(rule_func)
     
-    def generate_signals(self, events: List[MarketEvent]) -> List[Dict]:
-        """根据事件生成交易信号"""
+    def generate_signals(self, events: List[MarketEvent], publish: bool = False) -> List[Dict]:
+        """
+        根据事件生成交易信号
+        :param events: 市场事件列表
+        :param publish: 是否把生成的信号推送给监听器（仅实时入口使用）
+        """
         signals = []
         
         # 开始日志
@@ -327,16 +383,26 @@ class EventSignalGenerator:
             signal_type = signal.get('signal', 'unknown')
             signal_type_stats[signal_type] = signal_type_stats.get(signal_type, 0) + 1
         logger.info(f"[EventSignalService]信号类型分布: {signal_type_stats}")
+        if publish:
+            publish_signals('event_driven', signals)
         
         return signals
+    
+    def generate_signal_batch(self, events: List[MarketEvent], publish: bool = False) -> SignalBatch:
+        """根据事件生成列式信号批"""
+        return SignalBatch.from_dicts(self.generate_signals(events, publish=publish), source=EVENT_DRIVEN)
 
 # ============ 统一信号管理器 ============
 class UnifiedSignalManager:
     """统一信号管理器 - 整合数据驱动和事件驱动信号"""
     
-    def __init__(self):
+    def __init__(self, dedup_window=None):
+        """
+        :param dedup_window: 信号去重时间窗口（pd.Timedelta 或可解析的字符串，如 '30min'），默认 SIGNAL_DEDUP_WINDOW
+        """
         self.data_generator = DataSignalGenerator()
         self.event_generator = EventSignalGenerator()
+        self.dedup_window = pd.Timedelta(dedup_window) if dedup_window is not None else SIGNAL_DEDUP_WINDOW
     
     def generate_combined_signals(self, 
                                 price_data: pd.DataFrame, 
@@ -349,7 +415,11 @@ class UnifiedSignalManager:
         }
     # 将原始信号结构转为统一信号结构
     def merge_signals(self, data_signals: List[Dict], event_signals: List[Dict]) -> List[Dict]:
-        """合并数据驱动和事件驱动信号"""
+        """
+        合并数据驱动和事件驱动信号
+        没有时间戳的信号（None 和 NaT）都会被丢弃。早期版本只丢弃 None、保留 NaT，
+        但 NaT 与任何时间比较都为 False，排序结果不确定，现与 merge_signal_batches 一致
+        """
         unified_signals = []
         
         # 添加数据驱动信号
@@ -370,8 +440,8 @@ class UnifiedSignalManager:
                 'indicators_used': signal.get('indicators_used', []),
                 'metadata': signal
             }
-            # 只有当timestamp存在时才添加信号
-            if unified_signal['timestamp'] is not None:
+            # 只有当timestamp存在（非空、非NaT）时才添加信号，与 merge_signal_batches 一致
+            if not pd.isna(unified_signal['timestamp']):
                 unified_signals.append(unified_signal)
         
         # 添加事件驱动信号
@@ -393,8 +463,8 @@ class UnifiedSignalManager:
                 'event_id': signal.get('event_id'),  # 保留事件ID
                 'metadata': signal
             }
-            # 只有当timestamp存在时才添加信号
-            if unified_signal['timestamp'] is not None:
+            # 只有当timestamp存在（非空、非NaT）时才添加信号，与 merge_signal_batches 一致
+            if not pd.isna(unified_signal['timestamp']):
                 unified_signals.append(unified_signal)
         
         # 按时间排序
@@ -405,40 +475,56 @@ class UnifiedSignalManager:
         
         return optimized_signals
     
-    def _optimize_signals(self, signals: List[Dict]) -> List[Dict]:
-        """优化信号：去重、合并同类信号等"""
+    def merge_signal_batches(self, data_batch: SignalBatch, event_batch: SignalBatch, time_window=None) -> SignalBatch:
+        """
+        列式版本的 merge_signals：拼接、按时间稳定排序、去重（规则同 _optimize_signals），不再为每条信号包装统一结构
+        与 merge_signals 一样丢弃没有时间戳（NaT）的信号
+        :param data_batch: 数据驱动信号批
+        :param event_batch: 事件驱动信号批
+        :param time_window: 去重时间窗口，默认使用 self.dedup_window
+        """
+        merged = SignalBatch.concat([data_batch, event_batch])
+        merged = merged.filter(merged.timestamp != pd.NaT.value).sort()
+        return merged.deduplicate(time_window if time_window is not None else self.dedup_window)
+    
+    def _optimize_signals(self, signals: List[Dict], time_window=None) -> List[Dict]:
+        """
+        优化信号：相同时间窗口内同一标的的同类信号只保留强度最高的
+        信号已按时间排序，同一 (标的, 信号类型) 已保留的信号两两间隔都超过窗口，
+        因此新信号只需与该类最近保留的一条比较：单趟扫描，时间戳只解析一次
+        时间戳无法解析（NaT）的信号与任何信号都不算重复，原样保留
+        :param signals: 按时间排序的统一信号列表
+        :param time_window: 时间窗口，默认使用 self.dedup_window
+        """
         if not signals:
             return signals
         
-        # 简单的去重逻辑：相同时间窗口内的同类信号只保留强度最高的
-        optimized = []
-        # time_window = pd.Timedelta(minutes=30)  # 30分钟时间窗口
-        time_window = pd.Timedelta(days=1)  # 1天时间窗口
-
-        for signal in signals:
-            should_add = True
-            signal_time = pd.to_datetime(signal['timestamp'])
-            
-            for existing in optimized:
-                existing_time = pd.to_datetime(existing['timestamp'])
-                
-                # 如果在时间窗口内且是同类信号
-                if (abs(signal_time - existing_time) <= time_window and 
-                    signal['signal_type'] == existing['signal_type'] and
-                    signal['symbol'] == existing['symbol']):
-                    
-                    # 如果新信号强度更高，替换现有信号
-                    if signal['strength'] > existing['strength']:
-                        optimized.remove(existing)
-                        break
-                    else:
-                        should_add = False
-                        break
-            
-            if should_add:
-                optimized.append(signal)
+        window = pd.Timedelta(time_window).value if time_window is not None else self.dedup_window.value
+        times = pd.to_datetime([signal['timestamp'] for signal in signals]).asi8
+        is_nat = times == pd.NaT.value
+        order = range(len(signals))
+        if (np.diff(times[~is_nat]) < 0).any():
+            # 时间戳格式不一致导致原排序不是时间顺序时，按解析后的时间稳定排序
+            order = np.argsort(times, kind='stable').tolist()
+        
+        kept = []    # 保留的信号，被替换的位置置为 None
+        latest = {}  # (标的, 信号类型) -> 该类最近保留信号在 kept 中的位置
+        for i in order:
+            signal = signals[i]
+            if is_nat[i]:
+                kept.append((i, signal))
+                continue
+            key = (signal['symbol'], signal['signal_type'])
+            slot = latest.get(key)
+            if slot is not None and times[i] - times[kept[slot][0]] <= window:
+                # 新信号强度更高时替换已保留的信号，否则丢弃新信号
+                if signal['strength'] <= kept[slot][1]['strength']:
+                    continue
+                kept[slot] = None
+            latest[key] = len(kept)
+            kept.append((i, signal))
         
-        return optimized
+        return [entry[1] for entry in kept if entry is not None]
     
     def create_default_data_generator(self):
         """创建默认数据信号生成器"""
@@ -0,0 +1,300 @@
+"""
+全市场信号扫描
+
+逐只调用 generate_unified_signals_with_configs 做每日选股时，每只股票都要重建规则、单独计算指标和信号，数千只股票串行执行。
+本模块按以下方式扫描整个股票池：
+- 历史数据由线程池并发获取（复用 iter_batch_stock_history 及数据源限速），每只只取回看窗口内的K线
+- 取到的股票按块分发到进程池；规则在每个工作进程初始化时按配置构建一次
+- 同一块内的股票拼成一张长表，指标和信号整块计算一次，再取每只股票最后一根K线上的信号
+  （指标都是固定窗口的滚动计算，回看窗口不短于所需预热长度时，最后一根K线的结果与用完整历史计算一致）
+- 返回最新交易日的可操作信号（买入/卖出）及各阶段耗时
+"""
+import datetime
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from core.logger import logger
+from data_providers import get_data_provider
+
+from app.services.analytics.indicator_service import calculate_indicators_for_rule_configs, get_adaptive_periods_range
+from app.services.data.data_service import iter_batch_stock_history, resolve_batch_codes
+from .data_signals.market_context import DEFAULT_MOMENTUM_PERIOD, VOLATILITY_WINDOW
+from .signal_service import DataSignalGenerator, build_data_signal_generator, publish_signals
+
+UNIVERSE_SCAN_MAX_WORKERS = int(os.getenv("UNIVERSE_SCAN_MAX_WORKERS", str(os.cpu_count() or 1)))
+UNIVERSE_SCAN_CHUNK_SIZE = int(os.getenv("UNIVERSE_SCAN_CHUNK_SIZE", "100"))
+# 每只股票参与计算的K线数（不足所需预热长度时自动放大）
+UNIVERSE_SCAN_LOOKBACK = int(os.getenv("UNIVERSE_SCAN_LOOKBACK", "120"))
+
+STAGES = ('fetch', 'indicators', 'signals')
+
+
+def required_history(data_signal_config: Dict) -> int:
+    """
+    按配置计算最后一根K线的信号所需的最少K线数（最长滚动窗口 + 前一根K线）
+    :param data_signal_config: 数据信号配置
+    """
+    generator, _ = build_data_signal_generator(data_signal_config)
+    windows = [max(generator.required_volume_windows()), VOLATILITY_WINDOW + 1, DEFAULT_MOMENTUM_PERIOD + 1]
+    ma_config = data_signal_config.get('ma_crossover', {})
+    if ma_config.get('enable', True):
+        for key, default, is_short in (('short_period', 5, True), ('long_period', 20, False)):
+            period = ma_config.get(key, default)
+            if ma_config.get('adaptive', False):
+                period = max(get_adaptive_periods_range(base_period=period, indicator_type='ma', is_short=is_short))
+            windows.append(period)
+    rsi_config = data_signal_config.get('rsi', {})
+    if rsi_config.get('enable', True):
+        period = rsi_config.get('period', 14)
+        if rsi_config.get('adaptive', False):
+            period = max(get_adaptive_periods_range(base_period=period, indicator_type='rsi'))
+        windows.append(period + 1)  # RSI 基于价格差分
+    return max(windows) + 1
+
+
+def _date_column(df: pd.DataFrame) -> Optional[str]:
+    for name in ('日期', 'date'):
+        if name in df.columns:
+            return name
+    return None
+
+
+# ============ 按块计算 ============
+def scan_symbol_frames(frames: List[Tuple[str, pd.DataFrame]], generator: DataSignalGenerator,
+                       data_signal_config: Dict, lookback: int) -> Tuple[List[Dict], Dict[str, float]]:
+    """
+    一组股票共享计算指标和信号，返回每只股票最后一根K线上的可操作信号
+    K线数不少于 lookback 的股票截取最近 lookback 根后拼成长表整体计算；较短的（如次新股）单独计算，避免窗口跨越相邻股票
+    :param frames: [(股票代码, 按时间升序的历史数据)]
+    :param generator: 数据信号生成器
+    :param data_signal_config: 数据信号配置（用于计算指标）
+    :param lookback: 回看K线数，须不小于 required_history(data_signal_config)
+    :return: ([{'symbol', 'date', 'close', 'signals'}], {'indicators': 秒, 'signals': 秒})
+    """
+    timings = {'indicators': 0.0, 'signals': 0.0}
+    panels, singles = [], []
+    for symbol, df in frames:
+        if len(df) < 2 or _date_column(df) is None:
+            continue
+        df = df.iloc[-lookback:]
+        (panels if len(df) >= lookback else singles).append((symbol, df))
+
+    results = []
+    for group in ([panels] if panels else []) + [[item] for item in singles]:
+        # 结果按请求的代码归属，统一以其作为 symbol 列
+        panel = pd.concat([df for _, df in group], ignore_index=True).drop(columns=['证券代码'], errors='ignore')
+        lengths = [len(df) for _, df in group]
+        panel['symbol'] = np.repeat([symbol for symbol, _ in group], lengths)
+        last_rows = np.cumsum(lengths) - 1
+
+        start = time.perf_counter()
+        indicators, _ = calculate_indicators_for_rule_configs(panel, data_signal_config)
+        timings['indicators'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch = generator.generate_signal_batch(panel, indicators)
+        # 每只股票的最后一根K线
+        date_col = _date_column(panel)
+        last_bars = {panel['symbol'].iat[i]: (pd.Timestamp(panel[date_col].iat[i]).value, i) for i in last_rows}
+        pool_last = np.array([last_bars.get(symbol, (np.iinfo(np.int64).min, -1))[0] for symbol in batch.symbols] + [0],
+                             dtype=np.int64)
+        actionable = batch.filter((batch.direction != 0) & (batch.timestamp == pool_last[batch.symbol]))
+        signals_by_symbol: Dict[str, List[Dict]] = {}
+        for signal in actionable.to_dicts():
+            signals_by_symbol.setdefault(signal['symbol'], []).append(signal)
+        close_col = next((name for name in ('收盘价', 'close', '收盘') if name in panel.columns), None)
+        for symbol, (timestamp, row) in last_bars.items():
+            results.append({
+                'symbol': symbol,
+                'date': pd.Timestamp(timestamp),
+                'close': float(panel[close_col].iat[row]) if close_col else None,
+                'signals': signals_by_symbol.get(symbol, []),
+            })
+        timings['signals'] += time.perf_counter() - start
+    return results, timings
+
+
+# ============ 工作进程 ============
+_worker_state: Dict = {}
+
+
+def _init_worker(data_signal_config: Dict, lookback: int) -> None:
+    generator, _ = build_data_signal_generator(data_signal_config)
+    _worker_state.update(generator=generator, config=data_signal_config, lookback=lookback)
+
+
+def _scan_in_worker(frames: List[Tuple[str, pd.DataFrame]]) -> Tuple[List[Dict], Dict[str, float]]:
+    state = _worker_state
+    return scan_symbol_frames(frames, state['generator'], state['config'], state['lookback'])
+
+
+def _chunked(items: Iterator, size: int) -> Iterator[List]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ============ 扫描主流程 ============
+def iter_universe_scan(frames: Iterable[Tuple[str, pd.DataFrame]], data_signal_config: Dict,
+                       max_workers: Optional[int] = None, chunk_size: Optional[int] = None,
+                       lookback: Optional[int] = None, timings: Optional[Dict[str, float]] = None) -> Iterator[Dict]:
+    """
+    扫描股票池，按完成顺序逐只产出最后一根K线的结果
+    :param frames: (股票代码, 历史数据) 迭代器，按需推进（可以是边获取边产出的生成器）
+    :param data_signal_config: 数据信号配置，格式同 generate_unified_signals_with_configs
+    :param max_workers: 进程数，默认 UNIVERSE_SCAN_MAX_WORKERS；为1时在当前进程执行
+    :param chunk_size: 每个任务包含的股票数，默认 UNIVERSE_SCAN_CHUNK_SIZE
+    :param lookback: 回看K线数，默认 UNIVERSE_SCAN_LOOKBACK（不小于所需预热长度）
+    :param timings: 传入时累加各阶段耗时（秒）：fetch 为等待数据的时间，indicators / signals 为各进程计算时间之和
+    :return: 迭代器，元素为 {'symbol', 'date', 'close', 'signals'}
+    """
+    timings = timings if timings is not None else {}
+    for stage in STAGES:
+        timings.setdefault(stage, 0.0)
+    lookback = max(lookback or UNIVERSE_SCAN_LOOKBACK, required_history(data_signal_config))
+    chunk_size = max(1, chunk_size or UNIVERSE_SCAN_CHUNK_SIZE)
+    max_workers = max(1, max_workers or UNIVERSE_SCAN_MAX_WORKERS)
+
+    def timed_frames():
+        iterator = iter(frames)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                timings['fetch'] += time.perf_counter() - start
+            yield item
+
+    def collect(outcome):
+        results, chunk_timings = outcome
+        for stage, elapsed in chunk_timings.items():
+            timings[stage] += elapsed
+        return results
+
+    chunks = _chunked(timed_frames(), chunk_size)
+    if max_workers == 1:
+        generator, _ = build_data_signal_generator(data_signal_config)
+        for chunk in chunks:
+            yield from collect(scan_symbol_frames(chunk, generator, data_signal_config, lookback))
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(data_signal_config, lookback)) as executor:
+        in_flight = {}
+
+        def submit_next(count):
+            for chunk in chunks:
+                in_flight[executor.submit(_scan_in_worker, [(symbol, df.iloc[-lookback:]) for symbol, df in chunk])] = chunk
+                count -= 1
+                if count <= 0:
+                    break
+
+        # 在途任务保持为进程数的2倍，数据获取与计算交替推进
+        submit_next(2 * max_workers)
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = in_flight.pop(future)
+                try:
+                    yield from collect(future.result())
+                except Exception as e:
+                    logger.warning(f"[UniverseScan]{len(chunk)} 只股票扫描失败（{chunk[0][0]} 等）: {e}")
+            submit_next(len(done))
+
+
+def universe_signal_scan(symbols: Optional[List[str]] = None, data_signal_config: Optional[Dict] = None,
+                         source: str = "akshare", market: Optional[str] = None, end_date: Optional[str] = None,
+                         as_of: Optional[str] = None, max_workers: Optional[int] = None,
+                         chunk_size: Optional[int] = None, lookback: Optional[int] = None,
+                         fetch_workers: Optional[int] = None, publish: bool = False) -> Dict:
+    """
+    全市场（或指定股票池）信号扫描：返回最新交易日各股票的可操作信号
+    :param symbols: 股票代码列表，为空时取 market 指定交易所或全部A股（get_all_stocks）
+    :param data_signal_config: 数据信号配置，格式同 generate_unified_signals_with_configs
+    :param source: 数据源名称
+    :param market: 交易所（SH/SZ/BJ/KE/CY），仅在未指定 symbols 时使用
+    :param end_date: 历史数据截止日期（YYYYMMDD），默认今天
+    :param as_of: 信号日期，默认为扫描到的最新交易日；最后一根K线早于该日期的股票（停牌等）不产出信号
+    :param max_workers: 计算进程数
+    :param chunk_size: 每个任务包含的股票数
+    :param lookback: 回看K线数
+    :param fetch_workers: 数据获取线程数
+    :param publish: 是否把信号日的信号推送给信号监听器（盘中/收盘后的定时选股使用；回溯扫描历史日期时不要开启）
+    :return: {'signals': {股票代码: {'date', 'close', 'signals'}}, 'scanned', 'stale', 'failed', 'timings', ...}
+    """
+    if data_signal_config is None:
+        data_signal_config = {
+            'ma_crossover': {'enable': True, 'use_parameterized': True, 'short_period': 5, 'long_period': 20},
+            'rsi': {'enable': True, 'use_parameterized': True, 'period': 14, 'oversold': 30, 'overbought': 70}
+        }
+    try:
+        total_start = time.perf_counter()
+        start = time.perf_counter()
+        if symbols or market:
+            code_list = resolve_batch_codes(source, codes=symbols, market=market)
+        else:
+            df = get_data_provider(source).get_all_stocks(source=source, market=None)
+            code_list = list(dict.fromkeys(str(code).strip() for code in df['code'])) if not df.empty else []
+        resolve_elapsed = time.perf_counter() - start
+        if not code_list:
+            return {"status": "error", "message": "股票池为空"}
+
+        rows = max(lookback or UNIVERSE_SCAN_LOOKBACK, required_history(data_signal_config))
+        end = pd.Timestamp(end_date) if end_date else pd.Timestamp(datetime.date.today())
+        start_date = (end - pd.Timedelta(days=int(rows * 1.5) + 30)).strftime('%Y%m%d')  # 交易日换算为自然日，留出长假余量
+
+        failed: Dict[str, str] = {}
+
+        def fetched_frames():
+            for code, df, error_message in iter_batch_stock_history(source, code_list, start_date, end.strftime('%Y%m%d'),
+                                                                    max_workers=fetch_workers):
+                if df is None:
+                    failed[code] = error_message
+                else:
+                    yield code, df
+
+        timings = {'resolve': resolve_elapsed}
+        results = list(iter_universe_scan(fetched_frames(), data_signal_config, max_workers=max_workers,
+                                          chunk_size=chunk_size, lookback=rows, timings=timings))
+        if not results:
+            return {"status": "error", "message": "未获取到任何股票的历史数据"}
+
+        as_of_date = pd.Timestamp(as_of).normalize() if as_of else max(result['date'] for result in results).normalize()
+        signals, stale = {}, []
+        positions = {code: i for i, code in enumerate(code_list)}
+        for result in sorted(results, key=lambda item: positions.get(item['symbol'], len(positions))):  # 按请求顺序输出
+            if result['date'].normalize() != as_of_date:
+                stale.append(result['symbol'])
+            elif result['signals']:
+                signals[result['symbol']] = {'date': result['date'], 'close': result['close'], 'signals': result['signals']}
+        if publish:
+            publish_signals('data_driven', [signal for item in signals.values() for signal in item['signals']])
+        timings['total'] = time.perf_counter() - total_start
+        logger.info(f"[UniverseScan]扫描 {len(results)} 只股票，{len(signals)} 只有信号，耗时 {timings['total']:.1f}s")
+        return {
+            "status": "success",
+            "data": {
+                "as_of": as_of_date.strftime('%Y-%m-%d'),
+                "signals": signals,
+                "scanned": len(results),
+                "stale": stale,
+                "failed": failed,
+                "lookback": rows,
+                "timings": {stage: round(elapsed, 3) for stage, elapsed in timings.items()},
+            },
+            "message": f"扫描完成：{len(results)} 只股票，{len(signals)} 只产生信号"
+        }
+    except Exception as e:
+        logger.error(f"[UniverseScan]全市场信号扫描失败: {e}")
+        return {"status": "error", "message": f"扫描失败：{e}"}
@@ -57,6 +57,9 @@ class EnhancedBacktestService:
             if 'timestamp' in signals_df.columns:
                 signals_df['date'] = pd.to_datetime(signals_df['timestamp']).dt.date
             
+            # 信号按日期分桶（只解析一次日期），每日查找只取当日信号
+            signals_by_date = self._index_signals_by_date(signals_df)
+            
             # 遍历每个交易日
             total_days = len(price_data.index)
             signal_days = 0
@@ -64,7 +67,7 @@ class EnhancedBacktestService:
             
             for i, date in enumerate(price_data.index):
                 # 获取当日信号
-                daily_signals = self._get_daily_signals(signals_df, date)
+                daily_signals = self._get_daily_signals(signals_by_date, date)
                 
                 # 添加调试信息
                 if daily_signals:
@@ -182,7 +185,16 @@ class EnhancedBacktestService:
         except Exception as e:
             logger.error(f"[Backtest]增强版回测失败: {e}")
             return {'status': 'error', 'message': f'回测失败: {e}'}
-    
+
+    def portfolio_backtest(self, price_data: pd.DataFrame, signals) -> Dict:
+        """
+        多标的组合回测（日期 × 标的价格面板，按标的分别持仓和估值），使用当前回测配置
+        :param price_data: 宽表（索引为日期、列为标的）或长表（含 date、symbol、close）
+        :param signals: 信号字典列表、长表或信号宽表
+        """
+        from app.services.strategy.portfolio_backtest import portfolio_backtest
+        return portfolio_backtest(price_data, signals, self.config)
+
     def _calculate_trading_costs(self, trade_amount: float, price: float, trade_type: str) -> float:
         """
         计算交易成本
@@ -508,34 +520,50 @@ class EnhancedBacktestService:
                 avg_loss_pct = np.mean([p['return_pct'] for p in losing])
                 print(f"平均亏损百分比: {avg_loss_pct:.2f}%")
         return pairs
-    def _get_daily_signals(self, signals_df: pd.DataFrame, date) -> List[Dict]:
+    def _index_signals_by_date(self, signals_df: pd.DataFrame) -> Dict:
         """
-        获取指定日期的信号
+        把信号按日期分桶：日期 -> 当日信号记录列表（保持原有顺序）
+        优先使用date列，没有时使用timestamp列；信号记录中的date列统一为日期类型
         """
         if signals_df.empty:
-            return []
-        
-        # 统一日期格式处理
-        if hasattr(date, 'date'):
-            target_date = date.date()
-        elif hasattr(date, 'strftime'):
-            target_date = date.date() if hasattr(date, 'date') else date
-        else:
-            target_date = pd.to_datetime(date).date()
+            return {}
         
-        # 筛选当日信号
         if 'date' in signals_df.columns:
             # 确保date列是日期类型
             signals_df['date'] = pd.to_datetime(signals_df['date']).dt.date
-            daily_signals = signals_df[signals_df['date'] == target_date]
+            signal_dates = signals_df['date']
         elif 'timestamp' in signals_df.columns:
             # 确保timestamp列是日期时间类型
             signals_df['timestamp'] = pd.to_datetime(signals_df['timestamp'])
-            daily_signals = signals_df[signals_df['timestamp'].dt.date == target_date]
+            signal_dates = signals_df['timestamp'].dt.date
         else:
+            return {}
+        
+        signals_by_date = {}
+        for signal_date, record in zip(signal_dates, signals_df.to_dict('records')):
+            if pd.isna(signal_date):
+                continue
+            signals_by_date.setdefault(signal_date, []).append(record)
+        return signals_by_date
+    
+    def _get_daily_signals(self, signals_by_date: Dict, date) -> List[Dict]:
+        """
+        获取指定日期的信号
+        :param signals_by_date: _index_signals_by_date 生成的日期索引
+        :param date: 交易日
+        """
+        if not signals_by_date:
             return []
         
-        return daily_signals.to_dict('records')
+        # 统一日期格式处理
+        if hasattr(date, 'date'):
+            target_date = date.date()
+        elif hasattr(date, 'strftime'):
+            target_date = date.date() if hasattr(date, 'date') else date
+        else:
+            target_date = pd.to_datetime(date).date()
+        
+        return signals_by_date.get(target_date, [])
     def _execute_trades_with_costs(self, signals: List[Dict], price_data: pd.Series, portfolio: Dict) -> List[Dict]:
         """
         执行交易并计算交易成本
@@ -0,0 +1,286 @@
+"""
+并行参数优化器
+
+- 参数组合惰性生成：网格过大时按序号随机抽样，不再物化全部组合
+- 进程池并行：价格数据放入共享内存，每个工作进程在初始化时挂载一次，任务只传参数字典
+- 结果流式返回：按完成顺序逐个产出，调用方可边收边处理
+- 可取消：传入 threading.Event，置位后停止提交并取消排队中的任务
+"""
+import os
+import pickle
+import random
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from itertools import product
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from core.logger import logger
+
+OPTIMIZER_MAX_WORKERS = int(os.getenv("OPTIMIZER_MAX_WORKERS", str(os.cpu_count() or 1)))
+
+# 评估函数：evaluate(df, strategy_func, params, metric) -> (score, performance) 或 None（该组合无效）
+Evaluator = Callable[[pd.DataFrame, Callable, Dict, str], Optional[Tuple[float, Dict]]]
+
+
+# ============ 参数组合 ============
+def count_param_combinations(param_ranges: Dict[str, Sequence]) -> int:
+    """参数网格的组合总数"""
+    total = 1
+    for values in param_ranges.values():
+        total *= len(values)
+    return total
+
+
+def combination_at(param_ranges: Dict[str, Sequence], index: int) -> Dict:
+    """
+    按序号取出第 index 个参数组合（与 itertools.product 的顺序一致，最后一个参数变化最快）
+    """
+    names = list(param_ranges.keys())
+    params = {}
+    for name in reversed(names):
+        values = param_ranges[name]
+        index, offset = divmod(index, len(values))
+        params[name] = values[offset]
+    return {name: params[name] for name in names}
+
+
+def iter_param_combinations(param_ranges: Dict[str, Sequence], max_iterations: int = None,
+                            seed: Optional[int] = None) -> Iterator[Tuple[int, Dict]]:
+    """
+    惰性生成参数组合
+    :param param_ranges: 参数范围字典
+    :param max_iterations: 最大组合数，网格超过该数量时不放回随机抽样
+    :param seed: 随机种子
+    :return: (组合序号, 参数字典) 迭代器
+    """
+    names = list(param_ranges.keys())
+    total = count_param_combinations(param_ranges)
+    if max_iterations is None or total <= max_iterations:
+        for index, combo in enumerate(product(*(param_ranges[name] for name in names))):
+            yield index, dict(zip(names, combo))
+        return
+    # range 上抽样不会物化组合列表
+    for index in random.Random(seed).sample(range(total), max_iterations):
+        yield index, combination_at(param_ranges, index)
+
+
+# ============ 共享内存价格数据 ============
+@dataclass
+class SharedFrameSpec:
+    """共享内存中DataFrame的描述（可pickle，传给工作进程）"""
+    shm_name: str
+    length: int
+    columns: List[Any]
+    numeric: List[Tuple[Any, str, int]]               # (列名, dtype, 字节偏移)
+    others: Dict[Any, Any] = field(default_factory=dict)  # 非数值列（日期、代码等），随初始化参数传递一次
+    index: Any = None
+
+
+class SharedFrame:
+    """
+    把DataFrame的数值列放入一块共享内存，工作进程按描述挂载为numpy视图
+    """
+    def __init__(self, df: pd.DataFrame):
+        numeric_cols = [col for col in df.columns
+                        if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])]
+        arrays = [np.ascontiguousarray(df[col].to_numpy()) for col in numeric_cols]
+        size = max(1, sum(array.nbytes for array in arrays))
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        numeric, offset = [], 0
+        for col, array in zip(numeric_cols, arrays):
+            np.ndarray(array.shape, dtype=array.dtype, buffer=self.shm.buf, offset=offset)[:] = array
+            numeric.append((col, array.dtype.str, offset))
+            offset += array.nbytes
+        others = {col: df[col].to_numpy() for col in df.columns if col not in numeric_cols}
+        index = None if isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1 else df.index
+        self.spec = SharedFrameSpec(self.shm.name, len(df), list(df.columns), numeric, others, index)
+
+    @staticmethod
+    def attach(spec: SharedFrameSpec) -> Tuple[pd.DataFrame, shared_memory.SharedMemory]:
+        """
+        在工作进程中挂载共享内存并重建DataFrame（每个进程只做一次）
+        数值列逐列包装为不复制的 Series，且不让 pandas 合并成一个块（合并会把共享内存复制成进程私有数组）；
+        视图设为只读，策略函数原地修改价格列会报错，而不是影响其他进程
+        :return: (DataFrame, 共享内存句柄)；句柄需在进程存活期间保持引用
+        """
+        shm = shared_memory.SharedMemory(name=spec.shm_name)
+        views = {}
+        for col, dtype, offset in spec.numeric:
+            view = np.ndarray((spec.length,), dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            view.flags.writeable = False
+            views[col] = pd.Series(view, copy=False)
+        data = {col: views[col] if col in views else spec.others[col] for col in spec.columns}
+        df = pd.DataFrame(data, copy=False)
+        if spec.index is not None:
+            df.index = spec.index
+        return df, shm
+
+    def close(self) -> None:
+        """释放共享内存（主进程在优化结束后调用）"""
+        self.shm.close()
+        self.shm.unlink()
+
+
+# ============ 工作进程 ============
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_worker(spec: SharedFrameSpec, evaluate: Evaluator, strategy_func: Callable, metric: str) -> None:
+    df, shm = SharedFrame.attach(spec)
+    _worker_state.update(df=df, shm=shm, evaluate=evaluate, strategy_func=strategy_func, metric=metric)
+
+
+def _window(df: pd.DataFrame, window: Optional[int]) -> pd.DataFrame:
+    """取最近 window 行（为空时为全量数据）"""
+    return df if window is None or window >= len(df) else df.iloc[len(df) - window:]
+
+
+def _run_in_worker(params: Dict, window: Optional[int] = None) -> Optional[Tuple[float, Dict]]:
+    state = _worker_state
+    return state['evaluate'](_window(state['df'], window), state['strategy_func'], params, state['metric'])
+
+
+def _is_picklable(*objects) -> bool:
+    try:
+        pickle.dumps(objects)
+        return True
+    except Exception:
+        return False
+
+
+# ============ 评估池 ============
+class EvaluationPool:
+    """
+    参数组合评估池：进程池和共享内存在多轮评估之间复用（供多轮搜索策略使用）
+    策略函数或评估函数无法pickle（如闭包、lambda）或 n_jobs=1 时在当前进程串行执行
+    """
+    def __init__(self, df: pd.DataFrame, strategy_func: Callable, evaluate: Evaluator, metric: str,
+                 n_jobs: Optional[int] = None, cancel_event: Optional[threading.Event] = None):
+        """
+        :param df: 价格数据
+        :param strategy_func: 策略函数
+        :param evaluate: 评估函数
+        :param metric: 优化目标指标
+        :param n_jobs: 进程数，默认 OPTIMIZER_MAX_WORKERS
+        :param cancel_event: 取消信号
+        """
+        self.df = df
+        self.strategy_func = strategy_func
+        self.evaluate = evaluate
+        self.metric = metric
+        self.n_jobs = max(1, n_jobs or OPTIMIZER_MAX_WORKERS)
+        self.cancel_event = cancel_event
+        self.parallel = self.n_jobs > 1 and _is_picklable(strategy_func, evaluate)
+        if self.n_jobs > 1 and not self.parallel:
+            logger.warning("[Optimizer]策略函数或评估函数无法序列化，改为单进程串行优化")
+        self._shared: Optional[SharedFrame] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._shared = SharedFrame(self.df)
+            self._executor = ProcessPoolExecutor(max_workers=self.n_jobs, initializer=_init_worker,
+                                                 initargs=(self._shared.spec, self.evaluate, self.strategy_func, self.metric))
+        return self._executor
+
+    @staticmethod
+    def _to_result(index, params, outcome=None, error=None, window=None) -> Dict:
+        if outcome is None:
+            result = {'index': index, 'params': params, 'error': error or '组合无效'}
+        else:
+            score, performance = outcome
+            result = {'index': index, 'params': params, 'score': score, 'performance': performance}
+        if window is not None:
+            result['window'] = window
+        return result
+
+    def run(self, combinations: Iterable[Tuple[int, Dict]], window: Optional[int] = None) -> Iterator[Dict]:
+        """
+        评估参数组合，按完成顺序流式产出结果
+        :param combinations: (组合序号, 参数字典) 迭代器，按需推进
+        :param window: 只用最近 window 行数据评估（为空时用全量数据）
+        :return: 结果迭代器，元素为 {'index', 'params', 'score', 'performance'}，无效组合为 {'index', 'params', 'error'}
+        """
+        combinations = iter(combinations)
+        if not self.parallel:
+            df = _window(self.df, window)
+            for index, params in combinations:
+                if self.cancelled:
+                    return
+                try:
+                    yield self._to_result(index, params, self.evaluate(df, self.strategy_func, params, self.metric), window=window)
+                except Exception as e:
+                    yield self._to_result(index, params, error=str(e), window=window)
+            return
+
+        executor = self._ensure_executor()
+        in_flight = {}
+
+        def submit_next(count):
+            for index, params in combinations:
+                in_flight[executor.submit(_run_in_worker, params, window)] = (index, params)
+                count -= 1
+                if count <= 0:
+                    break
+
+        try:
+            # 在途任务保持为进程数的2倍，组合迭代器按需推进
+            submit_next(2 * self.n_jobs)
+            while in_flight and not self.cancelled:
+                done, _ = wait(in_flight, timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, params = in_flight.pop(future)
+                    try:
+                        yield self._to_result(index, params, future.result(), window=window)
+                    except Exception as e:
+                        yield self._to_result(index, params, error=str(e), window=window)
+                if not self.cancelled:
+                    submit_next(len(done))
+            if self.cancelled:
+                logger.info(f"[Optimizer]优化已取消，丢弃在途任务 {len(in_flight)} 个")
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def close(self) -> None:
+        """关闭进程池并释放共享内存"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        if self._shared is not None:
+            self._shared.close()
+            self._shared = None
+
+
+# ============ 优化主流程 ============
+def iter_optimization_results(df: pd.DataFrame, strategy_func: Callable, evaluate: Evaluator,
+                              combinations: Iterator[Tuple[int, Dict]], metric: str,
+                              n_jobs: Optional[int] = None,
+                              cancel_event: Optional[threading.Event] = None) -> Iterator[Dict]:
+    """
+    评估参数组合，按完成顺序流式产出结果（单轮评估，结束后释放进程池）
+    :param df: 价格数据
+    :param strategy_func: 策略函数
+    :param evaluate: 评估函数
+    :param combinations: (组合序号, 参数字典) 迭代器
+    :param metric: 优化目标指标
+    :param n_jobs: 进程数，默认 OPTIMIZER_MAX_WORKERS
+    :param cancel_event: 取消信号
+    :return: 结果迭代器，见 EvaluationPool.run
+    """
+    with EvaluationPool(df, strategy_func, evaluate, metric, n_jobs=n_jobs, cancel_event=cancel_event) as pool:
+        yield from pool.run(combinations)
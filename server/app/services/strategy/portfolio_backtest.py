@@ -0,0 +1,354 @@
+"""
+多标的组合回测
+
+以 日期 × 标的 的二维价格面板（NumPy 数组）驱动，适用于上千只股票、十年日线的组合回测：
+- 每个标的独立记录持仓股数和持仓均价；组合价值 = 现金 + 持仓股数 × 估值价，对整个面板一次计算
+- 交易成本口径与 EnhancedBacktestService._calculate_trading_costs 一致（佣金含最低佣金、卖出印花税、过户费、滑点、大额冲击）
+- 单个标的持仓市值不超过 组合价值 × max_position_size
+- 只在有信号的交易日执行逻辑，当日所有有信号的标的一次向量化处理，不做逐标的循环
+
+信号面板取值：正数为买入（数值为信号强度），负数为卖出（绝对值为卖出持仓的比例），0为无操作
+交易规则：
+- 同一交易日先卖后买；卖出股数 = 持仓 × 卖出比例（取整）
+- 买入金额 = 组合价值 × max_position_size × 信号强度，且不超过该标的剩余仓位额度，按整手（100股）向下取整，不足一手不买
+- 当日买入按信号强度从高到低依次占用现金，现金不足时强度较低的买入不再成交
+- 价格缺失（未上市、停牌）的标的当日不交易，估值沿用最近一个有效价格
+- 回测结束按最后估值价强制平仓
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from core.logger import logger
+from app.services.strategy.backtest_service import BacktestConfig, TradingCost
+
+TRADING_DAYS = 252
+LOT_SIZE = 100
+# 与 EnhancedBacktestService 一致：信号强度低于该值的买入信号不交易
+MIN_SIGNAL_STRENGTH = 0.3
+# 成交额超过该值时计入市场冲击成本
+MARKET_IMPACT_THRESHOLD = 100000
+
+
+# ============ 面板构造 ============
+def build_price_panel(price_data: pd.DataFrame, price_col: str = 'close') -> Tuple[pd.DatetimeIndex, List[str], np.ndarray]:
+    """
+    把价格数据整理为 日期 × 标的 面板
+    :param price_data: 宽表（索引为日期、列为标的代码）或长表（含 symbol、价格列，日期取 date 列或索引）
+    :param price_col: 长表的价格列名，缺少时使用'收盘'
+    :return: (日期索引, 标的代码列表, 价格面板 float 数组)
+    """
+    if 'symbol' in price_data.columns:
+        col = price_col if price_col in price_data.columns else '收盘'
+        if col not in price_data.columns:
+            raise ValueError("未找到收盘价数据")
+        long = pd.DataFrame({
+            'date': pd.to_datetime(price_data['date'] if 'date' in price_data.columns else price_data.index),
+            'symbol': price_data['symbol'].astype(str).to_numpy(),
+            'price': pd.to_numeric(price_data[col], errors='coerce').to_numpy(),
+        })
+        wide = long.drop_duplicates(['date', 'symbol'], keep='last').pivot(index='date', columns='symbol', values='price')
+    else:
+        wide = price_data.copy()
+        wide.index = pd.to_datetime(wide.index)
+        if not all(pd.api.types.is_numeric_dtype(dtype) for dtype in wide.dtypes):
+            wide = wide.apply(pd.to_numeric, errors='coerce')
+    wide = wide.sort_index()
+    if wide.index.has_duplicates:
+        raise ValueError("价格面板存在重复日期")
+    return pd.DatetimeIndex(wide.index), [str(symbol) for symbol in wide.columns], wide.to_numpy(dtype=float)
+
+
+def build_signal_panel(signals, dates: pd.DatetimeIndex, symbols: List[str]) -> np.ndarray:
+    """
+    把信号整理为与价格面板对齐的信号面板
+    :param signals: 宽表（索引为日期、列为标的，取值同信号面板），
+                    或信号字典列表/长表（含 symbol、action、可选 strength，日期取 date 或 timestamp 字段）
+    :param dates: 价格面板的日期索引
+    :param symbols: 价格面板的标的代码列表
+    :return: 信号面板 (日期数, 标的数)；不在面板内的日期、标的被忽略，同一标的同一天多条信号以最后一条为准
+    """
+    panel = np.zeros((len(dates), len(symbols)))
+    if signals is None or len(signals) == 0:
+        return panel
+    if isinstance(signals, pd.DataFrame) and 'symbol' not in signals.columns:
+        wide = signals.copy()
+        wide.index = pd.to_datetime(wide.index).normalize()
+        wide.columns = [str(symbol) for symbol in wide.columns]
+        wide = wide[~wide.index.duplicated(keep='last')]
+        return wide.reindex(index=dates.normalize(), columns=symbols).fillna(0).to_numpy(dtype=float)
+
+    frame = pd.DataFrame(signals)
+    time_col = 'date' if 'date' in frame.columns else 'timestamp'
+    if time_col not in frame.columns or 'symbol' not in frame.columns or 'action' not in frame.columns:
+        raise ValueError("信号缺少日期、标的或交易方向字段")
+    rows = dates.normalize().get_indexer(pd.to_datetime(frame[time_col]).dt.normalize())
+    cols = pd.Index(symbols).get_indexer(frame['symbol'].astype(str))
+    side = frame['action'].map({'buy': 1.0, 'sell': -1.0}).fillna(0).to_numpy()
+    if 'strength' in frame.columns:
+        strength = pd.to_numeric(frame['strength'], errors='coerce').fillna(0.5).to_numpy()
+    else:
+        strength = np.full(len(frame), 0.5)
+    valid = (rows >= 0) & (cols >= 0) & (side != 0)
+    keys = rows[valid].astype(np.int64) * len(symbols) + cols[valid]
+    values = (side * strength)[valid]
+    # 倒序后取每个位置第一次出现，即原顺序的最后一条
+    keys, first = np.unique(keys[::-1], return_index=True)
+    panel.ravel()[keys] = values[::-1][first]
+    return panel
+
+
+def _forward_fill(panel: np.ndarray) -> np.ndarray:
+    """沿日期方向前向填充 NaN（首个有效值之前保持 NaN）"""
+    n_days, n_symbols = panel.shape
+    last_valid = np.where(np.isnan(panel), 0, np.arange(n_days)[:, None])
+    np.maximum.accumulate(last_valid, axis=0, out=last_valid)
+    return panel[last_valid, np.arange(n_symbols)]
+
+
+# ============ 交易成本 ============
+def panel_trading_costs(amount: np.ndarray, cost: TradingCost, trade_type: str) -> np.ndarray:
+    """
+    向量化计算交易成本（口径与 EnhancedBacktestService._calculate_trading_costs 一致）
+    :param amount: 成交额数组
+    :param cost: 交易成本模型
+    :param trade_type: 'buy' 或 'sell'
+    """
+    commission = np.maximum(amount * cost.commission_rate, cost.min_commission)
+    stamp_tax = amount * cost.stamp_tax_rate if trade_type == 'sell' else 0
+    transfer_fee = amount * cost.transfer_fee_rate
+    slippage = amount * cost.slippage_rate
+    market_impact = np.where(amount > MARKET_IMPACT_THRESHOLD, amount * cost.market_impact_factor * 0.0001, 0)
+    return commission + stamp_tax + transfer_fee + slippage + market_impact
+
+
+# ============ 组合模拟 ============
+def simulate_portfolio(prices: np.ndarray, signals: np.ndarray, initial_capital: float = 1000000,
+                       trading_cost: Optional[TradingCost] = None, max_position_size: float = 0.2,
+                       min_signal_strength: float = MIN_SIGNAL_STRENGTH, lot_size: int = LOT_SIZE) -> Dict:
+    """
+    在价格面板上执行组合回测
+    :param prices: 价格面板 (日期数, 标的数)，缺失为 NaN
+    :param signals: 信号面板，形状同 prices
+    :param initial_capital: 初始资金
+    :param trading_cost: 交易成本模型
+    :param max_position_size: 单个标的最大仓位（占组合价值比例）
+    :param min_signal_strength: 买入信号的最小强度
+    :param lot_size: 每手股数
+    :return: {'equity', 'cash', 'positions_value', 'positions_count', 'holdings', 'trades', 'liquidation'}，
+             前四项形状为 (日期数,)，holdings 为每日收盘后持仓 (日期数, 标的数)，
+             trades / liquidation 为按列存放的成交数组字典（day, col, side, shares, price, amount, cost, strength, pnl）
+    """
+    trading_cost = trading_cost or TradingCost()
+    prices = np.asarray(prices, dtype=float)
+    signals = np.asarray(signals, dtype=float)
+    if prices.shape != signals.shape:
+        raise ValueError(f"信号面板形状 {signals.shape} 与价格面板 {prices.shape} 不一致")
+    n_days, n_symbols = prices.shape
+    if n_days == 0 or n_symbols == 0:
+        raise ValueError("价格面板为空")
+
+    tradable = np.isfinite(prices) & (prices > 0)
+    mark = np.nan_to_num(_forward_fill(np.where(tradable, prices, np.nan)))
+    signals = np.where(tradable, np.nan_to_num(signals), 0)
+
+    holdings = np.zeros(n_symbols, dtype=np.int64)
+    avg_price = np.zeros(n_symbols)
+    cash = float(initial_capital)
+    cash_delta = np.zeros(n_days)
+    parts = []
+
+    def record(day, cols, side, shares, price, amount, fees, strength, pnl):
+        parts.append((np.full(len(cols), day), cols, np.full(len(cols), side), shares, price, amount, fees, strength, pnl))
+
+    for day in np.flatnonzero(np.any(signals != 0, axis=1)):
+        row = signals[day]
+        price = prices[day]
+        cash_before = cash
+
+        # 卖出：按比例减仓，已实现盈亏按持仓均价计算
+        cols = np.flatnonzero((row < 0) & (holdings > 0))
+        if cols.size:
+            ratio = np.minimum(-row[cols], 1.0)
+            shares = (holdings[cols] * ratio).astype(np.int64)
+            keep = shares > 0
+            cols, shares, ratio = cols[keep], shares[keep], ratio[keep]
+            px = price[cols]
+            amount = shares * px
+            fees = panel_trading_costs(amount, trading_cost, 'sell')
+            record(day, cols, -1, shares, px, amount, fees, ratio, (px - avg_price[cols]) * shares - fees)
+            cash += float((amount - fees).sum())
+            holdings[cols] -= shares
+            avg_price[cols[holdings[cols] == 0]] = 0
+
+        # 买入：目标金额受单标的仓位上限约束，按信号强度从高到低占用现金
+        cols = np.flatnonzero(row >= min_signal_strength)
+        if cols.size and cash > 0:
+            cap = (cash + float(holdings @ mark[day])) * max_position_size
+            strength = row[cols]
+            px = price[cols]
+            target = np.minimum(cap * strength, cap - holdings[cols] * px)
+            shares = (np.floor(np.maximum(target, 0) / px / lot_size) * lot_size).astype(np.int64)
+            keep = shares > 0
+            cols, shares, strength, px = cols[keep], shares[keep], strength[keep], px[keep]
+            amount = shares * px
+            fees = panel_trading_costs(amount, trading_cost, 'buy')
+            order = np.argsort(-strength, kind='stable')
+            order = order[np.cumsum((amount + fees)[order]) <= cash]
+            if order.size:
+                cols, shares, strength, px, amount, fees = (a[order] for a in (cols, shares, strength, px, amount, fees))
+                record(day, cols, 1, shares, px, amount, fees, strength, np.zeros(len(cols)))
+                held = holdings[cols]
+                avg_price[cols] = (held * avg_price[cols] + shares * px) / (held + shares)
+                holdings[cols] = held + shares
+                cash -= float((amount + fees).sum())
+
+        cash_delta[day] = cash - cash_before
+
+    trades = _stack_trades(parts)
+    # 每日收盘后持仓：成交股数按日期累加，估值一次完成
+    holdings_panel = np.zeros((n_days, n_symbols), dtype=np.int64)
+    np.add.at(holdings_panel, (trades['day'], trades['col']), trades['side'] * trades['shares'])
+    np.cumsum(holdings_panel, axis=0, out=holdings_panel)
+    positions_value = np.einsum('ij,ij->i', holdings_panel, mark)
+    cash_series = initial_capital + np.cumsum(cash_delta)
+
+    # 期末强制平仓
+    cols = np.flatnonzero(holdings > 0)
+    liquidation = []
+    if cols.size:
+        shares = holdings[cols]
+        px = mark[-1, cols]
+        amount = shares * px
+        fees = panel_trading_costs(amount, trading_cost, 'sell')
+        liquidation.append((np.full(len(cols), n_days - 1), cols, np.full(len(cols), -1), shares, px, amount, fees,
+                            np.ones(len(cols)), (px - avg_price[cols]) * shares - fees))
+    return {
+        'equity': cash_series + positions_value,
+        'cash': cash_series,
+        'positions_value': positions_value,
+        'positions_count': np.count_nonzero(holdings_panel, axis=1),
+        'holdings': holdings_panel,
+        'trades': trades,
+        'liquidation': _stack_trades(liquidation),
+    }
+
+
+_TRADE_FIELDS = ('day', 'col', 'side', 'shares', 'price', 'amount', 'cost', 'strength', 'pnl')
+
+
+def _stack_trades(parts: List[Tuple]) -> Dict[str, np.ndarray]:
+    if not parts:
+        empty = {field: np.zeros(0) for field in _TRADE_FIELDS}
+        for field in ('day', 'col', 'side', 'shares'):
+            empty[field] = np.zeros(0, dtype=np.int64)
+        return empty
+    return {field: np.concatenate([part[i] for part in parts]) for i, field in enumerate(_TRADE_FIELDS)}
+
+
+def _trade_records(trades: Dict[str, np.ndarray], dates: pd.DatetimeIndex, symbols: List[str],
+                   force_close: bool = False) -> List[Dict]:
+    """成交数组转为交易记录（字段与 realistic_backtest 的交易记录一致）"""
+    if len(trades['day']) == 0:
+        return []
+    frame = pd.DataFrame({
+        'symbol': np.asarray(symbols, dtype=object)[trades['col']],
+        'action': np.where(trades['side'] > 0, 'buy', 'sell'),
+        'shares': trades['shares'],
+        'price': trades['price'],
+        'amount': trades['amount'],
+        'trading_cost': trades['cost'],
+        'timestamp': dates[trades['day']],
+        'signal_strength': trades['strength'],
+        'realized_pnl': np.where(trades['side'] > 0, np.nan, trades['pnl']),
+    })
+    if force_close:
+        frame['force_close'] = True
+    return frame.to_dict('records')
+
+
+def _portfolio_metrics(equity: np.ndarray, risk_free_rate: float) -> Dict:
+    """组合绩效指标（口径与 EnhancedBacktestService._calculate_enhanced_metrics 一致）"""
+    if len(equity) < 2:
+        return {}
+    returns = equity[1:] / equity[:-1] - 1
+    total_return = equity[-1] / equity[0] - 1
+    annual_return = (1 + total_return) ** (TRADING_DAYS / len(returns)) - 1
+    volatility = returns.std(ddof=1) * np.sqrt(TRADING_DAYS) if len(returns) > 1 else 0.0
+    peak = np.maximum.accumulate(equity)
+    return {
+        'total_return': float(total_return),
+        'annual_return': float(annual_return),
+        'volatility': float(volatility),
+        'sharpe_ratio': float((annual_return - risk_free_rate) / volatility) if volatility > 0 else 0,
+        'max_drawdown': float(((equity - peak) / peak).min()),
+    }
+
+
+def portfolio_backtest(price_data: pd.DataFrame, signals, config: BacktestConfig = None,
+                       price_col: str = 'close') -> Dict:
+    """
+    多标的组合回测
+    :param price_data: 价格数据，格式见 build_price_panel
+    :param signals: 信号，格式见 build_signal_panel
+    :param config: 回测配置（初始资金、交易成本、单标的最大仓位、无风险利率）
+    :param price_col: 长表的价格列名
+    :return: 回测结果
+    """
+    config = config or BacktestConfig()
+    logger.info("[Backtest]开始组合回测")
+    try:
+        dates, symbols, prices = build_price_panel(price_data, price_col)
+        signal_panel = build_signal_panel(signals, dates, symbols)
+        result = simulate_portfolio(prices, signal_panel, config.initial_capital, config.trading_cost,
+                                    config.max_position_size)
+        trades = result['trades']
+        liquidation = result['liquidation']
+        trades_history = (_trade_records(trades, dates, symbols)
+                          + _trade_records(liquidation, dates, symbols, force_close=True))
+
+        equity = result['equity']
+        portfolio_history = pd.DataFrame({
+            'date': dates,
+            'value': equity,
+            'cash': result['cash'],
+            'positions_value': result['positions_value'],
+            'positions_count': result['positions_count'],
+        }).to_dict('records')
+
+        sells = trades['side'] < 0
+        realized = np.concatenate([trades['pnl'][sells], liquidation['pnl']])
+        final_cash = float(result['cash'][-1] + (liquidation['amount'] - liquidation['cost']).sum())
+        trade_statistics = {
+            'total_trades': len(trades_history),
+            'buy_trades': int((trades['side'] > 0).sum()),
+            'sell_trades': int(sells.sum() + len(liquidation['day'])),
+            'profitable_trades': int((realized > 0).sum()),
+            'losing_trades': int((realized < 0).sum()),
+            'win_rate': float((realized > 0).mean()) if len(realized) else 0,
+            'realized_pnl': float(realized.sum()),
+            'total_trading_costs': float(trades['cost'].sum() + liquidation['cost'].sum()),
+            'symbols_traded': int(len(np.unique(trades['col']))),
+            'max_positions_held': int(result['positions_count'].max()),
+            'initial_capital': config.initial_capital,
+            'final_portfolio_value': final_cash,
+            'total_return_amount': final_cash - config.initial_capital,
+            'total_return_pct': (final_cash - config.initial_capital) / config.initial_capital * 100,
+        }
+        logger.info(f"[Backtest]组合回测完成: {len(dates)} 个交易日, {len(symbols)} 个标的, {len(trades_history)} 笔交易")
+
+        return {
+            'status': 'success',
+            'data': {
+                'portfolio_history': portfolio_history,
+                'trades_history': trades_history,
+                'performance_metrics': _portfolio_metrics(equity, config.risk_free_rate),
+                'trade_statistics': trade_statistics,
+                'symbols': symbols,
+                'config': config.__dict__
+            },
+            'message': f'组合回测完成，{len(symbols)}个标的，共{len(trades_history)}笔交易'
+        }
+    except Exception as e:
+        logger.error(f"[Backtest]组合回测失败: {e}")
+        return {'status': 'error', 'message': f'回测失败: {e}'}
@@ -0,0 +1,117 @@
+"""
+按时间点查询价格的索引
+
+event_driven_backtest / multi_driven_backtest 在每个信号、每个持仓上都要取"某时间点及之前的最新价格"：
+- AsOfPriceIndex：价格数据按标的分组、组内按日期稳定排序，as-of 查找用二分（searchsorted），每次 O(log n)
+- MarkToMarketCache：记住每个标的上次查到的价格及其有效区间 [该K线日期, 下一K线日期)，
+  回测时间单调推进时持仓估值多数直接命中缓存，只在跨过新K线时重新查找
+
+查找口径与原先的 price_data[(symbol == s) & (date <= t)].tail(1) 一致：同一日期有多行时取原数据中靠后的一行
+"""
+from typing import Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+_NOT_FOUND = (None, np.iinfo(np.int64).min, np.iinfo(np.int64).max)
+
+
+def _to_ns(timestamp) -> int:
+    """时间点转为纳秒整数（与索引中的日期同一口径）"""
+    return pd.Timestamp(timestamp).value
+
+
+class AsOfPriceIndex:
+    """按标的分组、按日期排序的价格索引"""
+
+    def __init__(self, price_data: pd.DataFrame, price_col: str = 'close', date_col: str = 'date',
+                 symbol_col: Optional[str] = 'symbol'):
+        """
+        :param price_data: 价格数据（含日期列和价格列）
+        :param price_col: 价格列名
+        :param date_col: 日期列名
+        :param symbol_col: 标的列名；为 None 或数据中没有该列时，所有行视为同一标的（查找时忽略 symbol）
+        """
+        self.by_symbol = symbol_col is not None and symbol_col in price_data.columns
+        dates = pd.to_datetime(price_data[date_col]).to_numpy(dtype='datetime64[ns]').view(np.int64)
+        prices = price_data[price_col].to_numpy()
+        valid = dates != np.iinfo(np.int64).min  # 去掉 NaT，原先的比较对 NaT 恒为 False
+        dates, prices = dates[valid], prices[valid]
+
+        self._series: Dict[Hashable, Tuple[np.ndarray, np.ndarray]] = {}
+        if self.by_symbol:
+            symbols = price_data[symbol_col].to_numpy()[valid]
+            for symbol, rows in pd.Series(np.arange(len(symbols))).groupby(symbols, sort=False).indices.items():
+                self._series[symbol] = self._sorted(dates[rows], prices[rows])
+        else:
+            self._series[None] = self._sorted(dates, prices)
+
+    @staticmethod
+    def _sorted(dates: np.ndarray, prices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        order = np.argsort(dates, kind='stable')
+        return dates[order], prices[order]
+
+    def _key(self, symbol) -> Hashable:
+        return symbol if self.by_symbol else None
+
+    def lookup(self, symbol, timestamp) -> Tuple[Optional[float], int, int]:
+        """
+        as-of 查找
+        :return: (价格, 该K线日期, 下一K线日期)，日期为纳秒整数；没有不晚于 timestamp 的数据时价格为 None
+        """
+        series = self._series.get(self._key(symbol))
+        if series is None:
+            return _NOT_FOUND
+        dates, prices = series
+        position = int(np.searchsorted(dates, _to_ns(timestamp), side='right')) - 1
+        if position < 0:
+            return None, _NOT_FOUND[1], int(dates[0])
+        valid_until = int(dates[position + 1]) if position + 1 < len(dates) else np.iinfo(np.int64).max
+        return prices[position], int(dates[position]), valid_until
+
+    def price_at(self, symbol, timestamp) -> Optional[float]:
+        """timestamp 及之前的最新价格，没有时返回 None"""
+        return self.lookup(symbol, timestamp)[0]
+
+    def latest_price(self, symbol) -> Optional[float]:
+        """该标的最后一个价格，没有数据时返回 None"""
+        series = self._series.get(self._key(symbol))
+        return series[1][-1] if series is not None and len(series[0]) else None
+
+
+class MarkToMarketCache:
+    """持仓估值缓存：按标的缓存 as-of 价格及其有效区间"""
+
+    def __init__(self, index: AsOfPriceIndex):
+        self.index = index
+        self._cache: Dict[Hashable, Tuple[Optional[float], int, int]] = {}
+        self.lookups = 0
+        self.hits = 0
+
+    def price_at(self, symbol, timestamp) -> Optional[float]:
+        """timestamp 及之前的最新价格，时间仍在上次查到的K线区间内时直接复用"""
+        key = self.index._key(symbol)
+        ns = _to_ns(timestamp)
+        cached = self._cache.get(key)
+        self.lookups += 1
+        if cached is not None and cached[1] <= ns < cached[2]:
+            self.hits += 1
+            return cached[0]
+        cached = self.index.lookup(symbol, timestamp)
+        self._cache[key] = cached
+        return cached[0]
+
+    def portfolio_value(self, cash: float, positions: Dict, timestamp) -> float:
+        """
+        现金 + 持仓市值（按持仓字典顺序累加，没有价格的标的不计入）
+        :param cash: 现金
+        :param positions: {标的: 股数}
+        :param timestamp: 估值时间点
+        """
+        value = cash
+        for symbol, shares in positions.items():
+            if shares > 0:
+                price = self.price_at(symbol, timestamp)
+                if price is not None:
+                    value += shares * price
+        return value
@@ -0,0 +1,401 @@
+"""
+参数搜索策略
+
+在 EvaluationPool 之上按不同方式选择要回测的参数组合，用更少的回测次数逼近网格最优：
+- grid：全网格，组合数超过预算时随机抽样（原有行为）
+- coarse_to_fine：先在稀疏网格上评估，再围绕当前最优逐步缩小步长细化
+- successive_halving：大量候选先在最近一段较短数据上回测，每轮保留前 1/eta 并加长数据窗口，最后一轮使用全量数据
+- bayesian：高斯过程代理模型 + UCB 采集函数，每轮选择最有希望的组合
+
+所有策略共用 SearchTracker 记录评估次数、数据成本（按全量数据折算的回测次数）和找到最终最优时的评估次数（evaluations_to_best）
+"""
+import math
+import random
+from abc import ABC, abstractmethod
+from itertools import product
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from core.logger import logger
+from .optimizer import EvaluationPool, combination_at, count_param_combinations, iter_param_combinations
+
+
+# ============ 组合序号 <-> 各参数位置 ============
+def positions_of(param_ranges: Dict[str, Sequence], index: int) -> List[int]:
+    """组合序号 -> 各参数取值的位置（与 combination_at 顺序一致）"""
+    positions = []
+    for values in reversed(list(param_ranges.values())):
+        index, offset = divmod(index, len(values))
+        positions.append(offset)
+    return positions[::-1]
+
+
+def index_of(param_ranges: Dict[str, Sequence], positions: Sequence[int]) -> int:
+    """各参数取值的位置 -> 组合序号"""
+    index = 0
+    for values, position in zip(param_ranges.values(), positions):
+        index = index * len(values) + position
+    return index
+
+
+# ============ 评估记录 ============
+class SearchTracker:
+    """
+    记录搜索过程：评估次数、数据成本、全量数据上的最优结果及其出现时的评估次数
+    只有全量数据上的结果参与最优比较；缩短窗口的评估只计入次数和成本
+    """
+    def __init__(self, pool: EvaluationPool, param_ranges: Dict[str, Sequence], budget: int,
+                 patience: Optional[int] = None, on_result: Optional[Callable[[Dict], None]] = None):
+        """
+        :param pool: 评估池
+        :param param_ranges: 参数范围字典
+        :param budget: 预算（按全量数据折算的回测次数）
+        :param patience: 连续多少次全量评估没有改进时提前停止，为空时不提前停止
+        :param on_result: 每个评估完成时的回调
+        """
+        self.pool = pool
+        self.param_ranges = param_ranges
+        self.total_combinations = count_param_combinations(param_ranges)
+        self.budget = budget
+        self.patience = patience
+        self.on_result = on_result
+        self.rows = len(pool.df)
+
+        self.evaluations = 0
+        self.cost = 0.0
+        self.results: List[Dict] = []           # 全量数据上的有效结果
+        self.evaluated: Dict[int, Optional[float]] = {}  # 全量数据上已评估的组合序号 -> 分数（无效为None）
+        self.best: Optional[Dict] = None
+        self.evaluations_to_best = 0
+        self._since_improvement = 0
+
+    @property
+    def remaining(self) -> float:
+        return self.budget - self.cost
+
+    @property
+    def stopped(self) -> bool:
+        """预算耗尽、已取消或触发提前停止"""
+        if self.pool.cancelled or self.remaining < 1e-9:
+            return True
+        return self.patience is not None and self._since_improvement >= self.patience
+
+    def _is_better(self, result: Dict) -> bool:
+        score = result['score']
+        if not math.isfinite(score):
+            return False
+        if self.best is None or score > self.best['score']:
+            return True
+        # 同分时取组合序号靠前者，与网格顺序一致
+        return score == self.best['score'] and result['index'] < self.best['index']
+
+    def evaluate(self, combinations: Iterable[Tuple[int, Dict]], window: Optional[int] = None) -> List[Dict]:
+        """
+        评估一批组合（超出预算的部分不提交；全量数据上已评估过的组合跳过）
+        :param combinations: (组合序号, 参数字典) 迭代器
+        :param window: 只用最近 window 行数据评估，为空时用全量数据
+        :return: 本批结果
+        """
+        full = window is None or window >= self.rows
+        window = None if full else window
+        unit = 1.0 if full else window / self.rows
+
+        def admitted():
+            for index, params in combinations:
+                if self.stopped or self.remaining < unit - 1e-9:
+                    return
+                if full and index in self.evaluated:
+                    continue
+                if full:
+                    self.evaluated[index] = None
+                self.cost += unit
+                yield index, params
+
+        batch = []
+        for result in self.pool.run(admitted(), window=window):
+            self.evaluations += 1
+            batch.append(result)
+            if full:
+                self._record(result)
+            if self.on_result is not None:
+                self.on_result(result)
+        return batch
+
+    def _record(self, result: Dict) -> None:
+        if 'error' in result:
+            if result['error'] != '组合无效':
+                logger.warning(f"[Optimizer]参数组合 {tuple(result['params'].values())} 评估失败: {result['error']}")
+            self._since_improvement += 1
+            return
+        self.evaluated[result['index']] = result['score']
+        self.results.append(result)
+        if self._is_better(result):
+            self.best = result
+            self.evaluations_to_best = self.evaluations
+            self._since_improvement = 0
+        else:
+            self._since_improvement += 1
+        best_score = self.best['score'] if self.best else float('-inf')
+        logger.info(f"[Optimizer]优化进度: 评估 {self.evaluations} 次，成本 {self.cost:.1f}/{self.budget}，当前最佳: {best_score:.4f}")
+
+    def summary(self) -> Dict:
+        """搜索结果汇总"""
+        return {
+            'best': self.best,
+            'results': self.results,
+            'evaluations': self.evaluations,
+            'evaluation_cost': round(self.cost, 4),
+            'evaluations_to_best': self.evaluations_to_best,
+            'cancelled': self.pool.cancelled,
+        }
+
+
+# ============ 搜索策略 ============
+class SearchStrategy(ABC):
+    """搜索策略抽象基类：在预算内选择组合交给 tracker 评估"""
+    name = ''
+
+    @abstractmethod
+    def search(self, tracker: SearchTracker, seed: Optional[int] = None) -> None:
+        """在 tracker 的预算内搜索参数组合"""
+        pass
+
+
+class GridSearch(SearchStrategy):
+    """全网格，组合数超过预算时不放回随机抽样"""
+    name = 'grid'
+
+    def search(self, tracker: SearchTracker, seed: Optional[int] = None) -> None:
+        tracker.evaluate(iter_param_combinations(tracker.param_ranges, int(tracker.budget), seed=seed))
+
+
+class CoarseToFineSearch(SearchStrategy):
+    """
+    由粗到细的网格搜索：
+    每个参数先取 coarse_points 个等距值评估，之后在当前最优附近按步长 ±step 评估邻居，
+    最优没有变化时步长减半，步长为1且无改进时结束
+    """
+    name = 'coarse_to_fine'
+
+    def __init__(self, coarse_points: int = 5):
+        self.coarse_points = coarse_points
+
+    def search(self, tracker: SearchTracker, seed: Optional[int] = None) -> None:
+        ranges = tracker.param_ranges
+        sizes = [len(values) for values in ranges.values()]
+
+        # 稀疏网格，点数超过预算一半时逐步减少
+        points = self.coarse_points
+        while points > 2 and points ** len(sizes) > tracker.budget / 2:
+            points -= 1
+        axes = [sorted({round(p) for p in np.linspace(0, size - 1, min(size, points))}) for size in sizes]
+        tracker.evaluate((index, combination_at(ranges, index))
+                         for index in (index_of(ranges, pos) for pos in product(*axes)))
+        if tracker.best is None:
+            return
+
+        steps = [max(1, math.ceil((size - 1) / max(1, len(axis) - 1) / 2)) for size, axis in zip(sizes, axes)]
+        while not tracker.stopped:
+            center = positions_of(ranges, tracker.best['index'])
+            neighbours = product(*(
+                sorted({min(size - 1, max(0, c + offset)) for offset in (-step, 0, step)})
+                for c, step, size in zip(center, steps, sizes)
+            ))
+            candidates = [index_of(ranges, pos) for pos in neighbours]
+            candidates = [index for index in candidates if index not in tracker.evaluated]
+            previous = tracker.best['index']
+            tracker.evaluate((index, combination_at(ranges, index)) for index in candidates)
+            if tracker.best['index'] != previous:
+                continue
+            if max(steps) == 1:
+                break
+            steps = [max(1, step // 2) for step in steps]
+
+
+class SuccessiveHalvingSearch(SearchStrategy):
+    """
+    逐次减半：候选先在最近较短的数据窗口上回测，每轮保留得分前 1/eta 的组合，
+    窗口扩大 eta 倍，最后一轮在全量数据上评估
+    候选数量按预算反推：每轮成本约为 候选数 / eta^(轮数-1) 次全量回测
+    """
+    name = 'successive_halving'
+
+    def __init__(self, eta: int = 3, min_rows: int = 250, max_rungs: int = 4):
+        """
+        :param eta: 每轮淘汰比例（保留 1/eta）
+        :param min_rows: 最短数据窗口行数，太短时长周期参数无法产生信号
+        :param max_rungs: 最多轮数
+        """
+        self.eta = eta
+        self.min_rows = min_rows
+        self.max_rungs = max_rungs
+
+    def search(self, tracker: SearchTracker, seed: Optional[int] = None) -> None:
+        rows, eta = tracker.rows, self.eta
+        rungs = 1
+        while rungs < self.max_rungs and rows / eta ** rungs >= self.min_rows:
+            rungs += 1
+        count = min(tracker.total_combinations, int(tracker.budget * eta ** (rungs - 1) / rungs))
+        if rungs == 1 or count <= eta:
+            GridSearch().search(tracker, seed)
+            return
+
+        candidates = list(iter_param_combinations(tracker.param_ranges, count, seed=seed))
+        for rung in range(rungs):
+            window = int(rows / eta ** (rungs - 1 - rung))
+            results = tracker.evaluate(candidates, window=window)
+            if rung == rungs - 1 or tracker.stopped:
+                break
+            scored = {r['index']: r['score'] for r in results
+                      if 'error' not in r and math.isfinite(r['score'])}
+            keep = max(1, len(candidates) // eta)
+            candidates = sorted((c for c in candidates if c[0] in scored),
+                                key=lambda c: (-scored[c[0]], c[0]))[:keep]
+            logger.info(f"[Optimizer]逐次减半第{rung + 1}轮: 窗口 {window} 行，保留 {len(candidates)} 个组合")
+            if not candidates:
+                break
+
+
+class BayesianSearch(SearchStrategy):
+    """
+    代理模型搜索：参数按取值位置归一化到 [0, 1]，用RBF核高斯过程拟合已评估的分数，
+    在随机候选集上按 UCB（均值 + kappa * 标准差）选点；一批选多个点时用"常数谎言"占位避免扎堆
+    """
+    name = 'bayesian'
+
+    def __init__(self, initial_fraction: float = 0.2, candidates: int = 2000, kappa: float = 2.0,
+                 length_scale: float = 0.15, noise: float = 1e-4):
+        """
+        :param initial_fraction: 随机初始化使用的预算比例
+        :param candidates: 每轮采集函数评估的候选组合数
+        :param kappa: UCB 探索系数
+        :param length_scale: RBF核长度尺度（归一化坐标）
+        :param noise: 观测噪声
+        """
+        self.initial_fraction = initial_fraction
+        self.candidates = candidates
+        self.kappa = kappa
+        self.length_scale = length_scale
+        self.noise = noise
+
+    def _encode(self, sizes: List[int], indices: Iterable[int], ranges) -> np.ndarray:
+        scale = np.array([max(1, size - 1) for size in sizes], dtype=float)
+        return np.array([positions_of(ranges, index) for index in indices], dtype=float).reshape(-1, len(sizes)) / scale
+
+    def _kernel(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        distance = ((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=2)
+        return np.exp(-distance / (2 * self.length_scale ** 2))
+
+    def _posterior(self, x: np.ndarray, y: np.ndarray, query: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        mean, std = y.mean(), y.std() or 1.0
+        target = (y - mean) / std
+        chol = np.linalg.cholesky(self._kernel(x, x) + self.noise * np.eye(len(x)))
+        alpha = np.linalg.solve(chol.T, np.linalg.solve(chol, target))
+        cross = self._kernel(query, x)
+        mu = cross @ alpha
+        v = np.linalg.solve(chol, cross.T)
+        sigma = np.sqrt(np.clip(1.0 - (v ** 2).sum(axis=0), 1e-12, None))
+        return mu * std + mean, sigma * std
+
+    def _candidate_pool(self, tracker: SearchTracker, rng: random.Random) -> List[int]:
+        total = tracker.total_combinations
+        if total - len(tracker.evaluated) <= self.candidates:
+            return [index for index in range(total) if index not in tracker.evaluated]
+        pool = set()
+        for _ in range(self.candidates * 2):
+            index = rng.randrange(total)
+            if index not in tracker.evaluated:
+                pool.add(index)
+            if len(pool) >= self.candidates:
+                break
+        # 当前最优的邻居也作为候选，保证局部精修
+        if tracker.best is not None:
+            center = positions_of(tracker.param_ranges, tracker.best['index'])
+            sizes = [len(values) for values in tracker.param_ranges.values()]
+            for dim in range(len(center)):
+                for offset in (-1, 1):
+                    position = list(center)
+                    position[dim] = min(sizes[dim] - 1, max(0, position[dim] + offset))
+                    index = index_of(tracker.param_ranges, position)
+                    if index not in tracker.evaluated:
+                        pool.add(index)
+        return sorted(pool)
+
+    def search(self, tracker: SearchTracker, seed: Optional[int] = None) -> None:
+        ranges = tracker.param_ranges
+        sizes = [len(values) for values in ranges.values()]
+        rng = random.Random(seed)
+        initial = max(2 * len(sizes) + 1, int(tracker.budget * self.initial_fraction))
+        tracker.evaluate(iter_param_combinations(ranges, min(initial, tracker.total_combinations), seed=seed))
+
+        batch_size = tracker.pool.n_jobs
+        while not tracker.stopped and len(tracker.evaluated) < tracker.total_combinations:
+            observed = [(index, score) for index, score in tracker.evaluated.items()
+                        if score is not None and math.isfinite(score)]
+            candidates = self._candidate_pool(tracker, rng)
+            if len(observed) < 2 or not candidates:
+                # 有效观测不足时退回随机抽样（候选池已排序，按 rng 抽取而不是取前几个）
+                sampled = rng.sample(candidates, min(batch_size, len(candidates)))
+                tracker.evaluate((index, combination_at(ranges, index)) for index in sampled)
+                if not candidates:
+                    break
+                continue
+
+            x = self._encode(sizes, (index for index, _ in observed), ranges)
+            y = np.array([score for _, score in observed], dtype=float)
+            query = self._encode(sizes, candidates, ranges)
+            chosen = []
+            for _ in range(min(batch_size, len(candidates))):
+                mu, sigma = self._posterior(x, y, query)
+                ucb = mu + self.kappa * sigma
+                ucb[chosen] = -np.inf
+                pick = int(np.argmax(ucb))
+                chosen.append(pick)
+                # 常数谎言：假设该点得分为当前均值，降低其邻域的不确定性
+                x = np.vstack([x, query[pick]])
+                y = np.append(y, y.mean())
+            tracker.evaluate((candidates[i], combination_at(ranges, candidates[i])) for i in chosen)
+
+
+SEARCH_STRATEGIES = {
+    GridSearch.name: GridSearch,
+    CoarseToFineSearch.name: CoarseToFineSearch,
+    SuccessiveHalvingSearch.name: SuccessiveHalvingSearch,
+    BayesianSearch.name: BayesianSearch,
+}
+
+
+def get_search_strategy(search) -> SearchStrategy:
+    """
+    获取搜索策略
+    :param search: 策略名称（grid / coarse_to_fine / successive_halving / bayesian）或 SearchStrategy 实例
+    """
+    if isinstance(search, SearchStrategy):
+        return search
+    if search not in SEARCH_STRATEGIES:
+        raise ValueError(f"未知的搜索策略: {search}，可选: {', '.join(SEARCH_STRATEGIES)}")
+    return SEARCH_STRATEGIES[search]()
+
+
+def run_search(pool: EvaluationPool, param_ranges: Dict[str, Sequence], search='grid', budget: int = 100,
+               patience: Optional[int] = None, on_result: Optional[Callable[[Dict], None]] = None,
+               seed: Optional[int] = None) -> Dict:
+    """
+    在评估池上执行参数搜索
+    :param pool: 评估池
+    :param param_ranges: 参数范围字典
+    :param search: 搜索策略名称或实例
+    :param budget: 预算（按全量数据折算的回测次数）
+    :param patience: 连续多少次全量评估没有改进时提前停止
+    :param on_result: 每个评估完成时的回调
+    :param seed: 随机种子
+    :return: SearchTracker.summary()，另含 search_strategy
+    """
+    strategy = get_search_strategy(search)
+    tracker = SearchTracker(pool, param_ranges, budget, patience=patience, on_result=on_result)
+    strategy.search(tracker, seed=seed)
+    summary = tracker.summary()
+    summary['search_strategy'] = strategy.name
+    logger.info(f"[Optimizer]{strategy.name} 搜索结束: 评估 {summary['evaluations']} 次，"
+                f"成本 {summary['evaluation_cost']}，第 {summary['evaluations_to_best']} 次评估找到最优")
+    return summary
@@ -0,0 +1,161 @@
+"""
+单标的信号回测的模拟内核
+
+simple_backtest / enhanced_backtest / enhanced_backtest_with_position_management / pluggable_backtest 共用：
+- 价格、信号预先转为连续的 float 数组，组合价值写入预分配数组
+- 只在可能发生交易的K线上执行逻辑：空仓时只看买入信号，持仓时看卖出信号；
+  无持仓检查钩子时，两次信号之间的组合价值按数组切片一次算出
+- 仓位、风控逻辑以钩子形式注入，只在其能起作用的K线上调用：
+  size_entry 在空仓且出现买入信号时调用，check_hold 在持仓且无卖出信号的K线上调用
+
+交易规则与原逐行回测一致：空仓遇买入信号开仓，持仓遇卖出信号全部卖出，手续费按成交额比例
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from app.services.risk.risk_manage_service import EquityTracker
+
+
+class SimulationState:
+    """模拟过程中的账户状态（钩子可读取）"""
+    __slots__ = ('prices', 'equity', 'tracker', 'cash', 'positions', 'trades', 'entry_trade', 'labels',
+                 'initial_capital', 'commission')
+
+    def __init__(self, prices: np.ndarray, labels: List, initial_capital: float, commission: float):
+        self.prices = prices
+        self.labels = labels
+        self.equity = np.empty(len(prices))
+        # 已写入组合价值的K线的峰值/回撤（位置标签为K线序号）
+        self.tracker = EquityTracker()
+        self.cash = initial_capital
+        self.positions = 0
+        self.trades: List[Dict] = []
+        self.entry_trade: Optional[Dict] = None
+        self.initial_capital = initial_capital
+        self.commission = commission
+
+    def date_at(self, i: int):
+        """第i根K线的日期（无date列时为行索引）"""
+        return self.labels[i]
+
+    def peak_before(self, i: int) -> float:
+        """第i根K线之前的组合价值峰值（无历史时为初始资金），钩子在第i根K线上调用时 tracker 恰好记录到第i-1根"""
+        return self.tracker.peak if self.tracker.count else self.initial_capital
+
+    def record(self, i: int, price: float) -> None:
+        """写入第i根K线的组合价值"""
+        self.equity[i] = self.cash + self.positions * price
+        self.tracker.update(self.equity[i], i)
+
+    def value_at(self, price: float) -> float:
+        """按给定价格计算的当前组合价值"""
+        return self.cash + self.positions * price
+
+
+# size_entry(i, price, state) -> (股数, 买入记录附加字段) 或 None（不开仓）
+EntryHook = Callable[[int, float, SimulationState], Optional[Tuple[int, Dict]]]
+# on_exit(i, price, proceeds, state) -> 卖出记录附加字段
+ExitHook = Callable[[int, float, float, SimulationState], Dict]
+# check_hold(i, price, state) -> 平仓动作名称（如 stop_loss）或 None（继续持有）
+HoldHook = Callable[[int, float, SimulationState], Optional[str]]
+
+
+def prepare_signal_arrays(signals) -> Optional[Tuple[pd.DataFrame, str, np.ndarray, np.ndarray, List]]:
+    """
+    把信号数据转为回测数组
+    :param signals: 信号 DataFrame 或字典列表（含 close/收盘、signal、可选 date 列）
+    :return: (signals_df, 价格列名, 价格数组, 信号数组, 日期标签)；缺少价格列时返回None
+    """
+    signals_df = pd.DataFrame(signals) if isinstance(signals, list) else signals
+    price_col = 'close' if 'close' in signals_df.columns else '收盘'
+    if price_col not in signals_df.columns:
+        return None
+    prices = np.ascontiguousarray(pd.to_numeric(signals_df[price_col], errors='coerce').to_numpy(dtype=float))
+    if 'signal' in signals_df.columns:
+        signal_values = pd.to_numeric(signals_df['signal'], errors='coerce').fillna(0).to_numpy(dtype=float)
+    else:
+        signal_values = np.zeros(len(signals_df))
+    labels = signals_df['date'].tolist() if 'date' in signals_df.columns else signals_df.index.tolist()
+    return signals_df, price_col, prices, np.ascontiguousarray(signal_values), labels
+
+
+def _all_in_entry(i: int, price: float, state: SimulationState) -> Tuple[int, Dict]:
+    return int(state.cash // (price * (1 + state.commission))), {}
+
+
+def simulate_signals(prices: np.ndarray, signals: np.ndarray, labels: List, initial_capital: float = 100000,
+                     commission: float = 0.001, size_entry: Optional[EntryHook] = None,
+                     on_exit: Optional[ExitHook] = None, check_hold: Optional[HoldHook] = None) -> SimulationState:
+    """
+    信号驱动的单标的回测模拟
+    :param prices: 价格数组
+    :param signals: 信号数组（1买入 / -1卖出 / 其他无操作）
+    :param labels: 每根K线的日期标签，写入交易记录
+    :param initial_capital: 初始资金
+    :param commission: 手续费率
+    :param size_entry: 开仓钩子，返回买入股数和买入记录附加字段，默认全仓
+    :param on_exit: 平仓钩子，返回卖出记录附加字段
+    :param check_hold: 持仓检查钩子，返回平仓动作名称时按当前价平仓
+    :return: 模拟结束时的状态（cash 为未清算的现金，equity 为每根K线的组合价值，tracker 为回撤跟踪）
+    """
+    size_entry = size_entry or _all_in_entry
+    state = SimulationState(prices, labels, initial_capital, commission)
+    equity = state.equity
+    n_bars = len(prices)
+    events = np.flatnonzero((signals == 1) | (signals == -1)).tolist()
+    events.append(n_bars)
+
+    def exit_position(i: int, price: float, action: str) -> None:
+        proceeds = state.positions * price * (1 - commission)
+        state.cash += proceeds
+        trade = {'date': labels[i], 'action': action, 'price': price, 'shares': state.positions, 'value': proceeds}
+        if on_exit is not None:
+            trade.update(on_exit(i, price, proceeds, state))
+        state.trades.append(trade)
+        state.positions = 0
+        state.entry_trade = None
+
+    def hold_bars(start: int, stop: int) -> None:
+        """无信号的K线：持仓且有检查钩子时逐根检查，否则按切片计算组合价值"""
+        i = start
+        if state.positions > 0 and check_hold is not None:
+            while i < stop and state.positions > 0:
+                price = prices[i]
+                action = check_hold(i, price, state)
+                if action:
+                    exit_position(i, price, action)
+                state.record(i, price)
+                i += 1
+        if i < stop:
+            equity[i:stop] = state.cash + state.positions * prices[i:stop]
+            state.tracker.update_many(equity[i:stop], range(i, stop))
+
+    start = 0
+    for i in events:
+        hold_bars(start, i)
+        if i == n_bars:
+            break
+        price = prices[i]
+        signal = signals[i]
+        if signal == 1 and state.positions == 0:
+            entry = size_entry(i, price, state)
+            if entry is not None:
+                shares, extra = entry
+                if shares > 0:
+                    cost = shares * price * (1 + commission)
+                    state.cash -= cost
+                    state.positions = shares
+                    trade = {'date': labels[i], 'action': 'buy', 'price': price, 'shares': shares, 'value': cost}
+                    trade.update(extra)
+                    state.trades.append(trade)
+                    state.entry_trade = trade
+        elif signal == -1 and state.positions > 0:
+            exit_position(i, price, 'sell')
+        elif state.positions > 0 and check_hold is not None:
+            action = check_hold(i, price, state)
+            if action:
+                exit_position(i, price, action)
+        state.record(i, price)
+        start = i + 1
+    return state
@@ -5,6 +5,7 @@ import pandas as pd
 import numpy as np
 from typing import List, Dict, Optional  # 添加 Optional 导入
 import datetime
+import inspect
 from app.services.analytics import analytic_service
 from app.services.signals.data_signals import (
     default_ma_crossover_rule,
@@ -27,7 +28,9 @@ from app.services.risk.risk_manage_service import (
     calculate_position_size, ManagerFactory, RiskManager, PositionManager,
     calculate_volatility, calculate_max_drawdown, 
     calculate_sharpe_ratio, calculate_var, calculate_win_rate)
-from app.services.signals.signal_service import DataSignalGenerator, EventSignalGenerator, UnifiedSignalManager
+from app.services.strategy.simulation import prepare_signal_arrays, simulate_signals
+from app.services.strategy.price_index import AsOfPriceIndex, MarkToMarketCache
+from app.services.signals.signal_service import DataSignalGenerator, EventSignalGenerator, UnifiedSignalManager, build_data_signal_generator
 from app.services.events.event_service import MarketEvent, EventType, EventSeverity 
 from app.services.analytics.indicator_service import IndicatorCalculator, calculate_indicators_for_rule_configs
 from datetime import datetime as dt
@@ -689,7 +692,8 @@ def generate_unified_signals_with_configs(price_data: pd.DataFrame,
                            data_signal_config: Optional[Dict] = None,
                            event_signal_config: Optional[Dict] = None,
                            events_data: Optional[List[Dict]] = None,
-                           filter_rules: Optional[List] = None) -> Dict:    
+                           filter_rules: Optional[List] = None,
+                           publish: bool = False) -> Dict:    
     try:
         unified_manager = UnifiedSignalManager()
         #  默认数据信号配置，每个规则都有独立的过滤配置
@@ -738,49 +742,7 @@ def generate_unified_signals_with_configs(price_data: pd.DataFrame,
         # 生成数据驱动信号
         data_signals = []
         try:
-            data_generator = DataSignalGenerator()
-            # 检查是否有启用的数据信号规则
-            enabled_data_rules = []
-            
-            # 处理RSI规则
-            if data_signal_config.get('rsi', {}).get('enable', True):
-                rsi_config = data_signal_config.get('rsi', {})
-                if rsi_config.get('use_parameterized', False): # 使用参数化规则
-                    config_rsi_rule = ParameterizedRuleFactory.create_rsi_rule(
-                        period=rsi_config.get('period', 14),
-                        oversold=rsi_config.get('oversold', 30),
-                        overbought=rsi_config.get('overbought', 70),
-                        adaptive=rsi_config.get('adaptive', False),  # 新增自适应参数
-                        filter_config=rsi_config.get('filter_config')  # 传入独立的过滤配置
-                    )
-                    data_generator.add_signal_rule(config_rsi_rule)
-                    debug_signals(f"配置参数化RSI规则: 周期={rsi_config.get('period', 14)}, 超卖={rsi_config.get('oversold', 30)}, 超买={rsi_config.get('overbought', 70)}{', 参数将会自适应' if rsi_config.get('adaptive', False) else ''}")
-                else: # 使用默认参数
-                    basic_rsi_rule = default_rsi_rule
-                    basic_rsi_rule.metadata = BASIC_RULES_METADATA['rsi']
-                    data_generator.add_signal_rule(basic_rsi_rule)
-                    debug_signals("配置默认的RSI规则")
-                enabled_data_rules.append('rsi')
-
-            
-            # 处理MA交叉规则
-            if data_signal_config.get('ma_crossover', {}).get('enable', True):
-                ma_config = data_signal_config.get('ma_crossover', {})
-                if ma_config.get('use_parameterized', False):
-                    config_ma_rule = ParameterizedRuleFactory.create_ma_rule(
-                        short_period=ma_config.get('short_period', 5),
-                        long_period=ma_config.get('long_period', 20),
-                        adaptive=ma_config.get('adaptive', False),
-                        filter_config=ma_config.get('filter_config')  # 传入独立的过滤配置
-                    )
-                    data_generator.add_signal_rule(config_ma_rule)
-                    debug_signals(f"配置参数化MA规则: 短周期={ma_config.get('short_period', 5)}, 长周期={ma_config.get('long_period', 20)}{', 参数将会自适应' if ma_config.get('adaptive', False) else ''}")
-                else: # 使用默认参数
-                    basic_ma_rule = default_ma_crossover_rule
-                    basic_ma_rule.metadata = BASIC_RULES_METADATA['ma_crossover']
-                    data_generator.add_signal_rule(basic_ma_rule)
-                    debug_signals("配置默认的MA规则")
-                enabled_data_rules.append('ma_crossover')
+            data_generator, enabled_data_rules = build_data_signal_generator(data_signal_config)
             
             # 检查是否有启用的规则
             if not enabled_data_rules:
@@ -803,7 +765,7 @@ def generate_unified_signals_with_configs(price_data: pd.DataFrame,
                     indicators = {} 
                 
                 # 生成信号
-                data_signals = data_generator.generate_signals(price_data, indicators)
+                data_signals = data_generator.generate_signals(price_data, indicators, publish=publish)
                 
                 # 修复：正确处理字典格式的信号
                 signal_type_distribution = {}
@@ -908,7 +870,7 @@ def generate_unified_signals_with_configs(price_data: pd.DataFrame,
                             logger.warning(f"[Strategy]跳过无效事件数据: {e}")
                             continue
                     # 生成信号
-                    event_signals = event_generator.generate_signals(market_events)
+                    event_signals = event_generator.generate_signals(market_events, publish=publish)
                     logger.info(f"[Strategy]原生事件驱动信号生成完成，信号数量: {len(event_signals)}")
                 
             except Exception as e:
@@ -1037,55 +999,21 @@ def simple_backtest(df, signals, initial_capital=100000, commission=0.001):
     """
     logger.info(f"[Strategy]开始回测，初始资金: {initial_capital}")
     try:
-        portfolio_value = initial_capital
-        positions = 0
-        trades = []
-        portfolio_values = []
-        
-        signals_df = pd.DataFrame(signals) if isinstance(signals, list) else signals
-        
-        # 确定价格列名
-        price_col = 'close' if 'close' in signals_df.columns else '收盘'
-        if price_col not in signals_df.columns:
+        prepared = prepare_signal_arrays(signals)
+        if prepared is None:
             return {"status": "error", "message": "未找到价格数据"}
+        signals_df, price_col, prices, signal_values, labels = prepared
         
-        for i, row in signals_df.iterrows():
-            current_price = row[price_col]
-            signal = row.get('signal', 0)
-            
-            if signal == 1 and positions == 0:  # 买入信号
-                shares = int(portfolio_value // (current_price * (1 + commission)))
-                if shares > 0:
-                    cost = shares * current_price * (1 + commission)
-                    portfolio_value -= cost
-                    positions = shares
-                    trades.append({
-                        'date': row.get('date', i),
-                        'action': 'buy',
-                        'price': current_price,
-                        'shares': shares,
-                        'value': cost
-                    })
-            
-            elif signal == -1 and positions > 0:  # 卖出信号
-                proceeds = positions * current_price * (1 - commission)
-                portfolio_value += proceeds
-                trades.append({
-                    'date': row.get('date', i),
-                    'action': 'sell',
-                    'price': current_price,
-                    'shares': positions,
-                    'value': proceeds
-                })
-                positions = 0
-            
-            # 计算当前组合价值
-            current_portfolio_value = portfolio_value + positions * current_price
-            portfolio_values.append(current_portfolio_value)
+        # 全仓买入、信号卖出
+        state = simulate_signals(prices, signal_values, labels, initial_capital, commission)
+        portfolio_value = state.cash
+        positions = state.positions
+        trades = state.trades
+        portfolio_values = state.equity.tolist()
         
         # 计算最终价值
         if positions > 0:
-            final_price = signals_df.iloc[-1][price_col]
+            final_price = prices[-1]
             portfolio_value += positions * final_price
         
         # 计算收益率
@@ -1120,55 +1048,21 @@ def enhanced_backtest(df, signals, initial_capital=100000, commission=0.001, ris
     """
     logger.info(f"[Strategy]开始增强版回测，初始资金: {initial_capital}")
     try:
-        portfolio_value = initial_capital
-        positions = 0
-        trades = []
-        portfolio_values = []
-        
-        signals_df = pd.DataFrame(signals) if isinstance(signals, list) else signals
-        
-        # 确定价格列名
-        price_col = 'close' if 'close' in signals_df.columns else '收盘'
-        if price_col not in signals_df.columns:
+        prepared = prepare_signal_arrays(signals)
+        if prepared is None:
             return {"status": "error", "message": "未找到价格数据"}
+        signals_df, price_col, prices, signal_values, labels = prepared
         
-        for i, row in signals_df.iterrows():
-            current_price = row[price_col]
-            signal = row.get('signal', 0)
-            
-            if signal == 1 and positions == 0:  # 买入信号
-                shares = int(portfolio_value // (current_price * (1 + commission)))
-                if shares > 0:
-                    cost = shares * current_price * (1 + commission)
-                    portfolio_value -= cost
-                    positions = shares
-                    trades.append({
-                        'date': row.get('date', i),
-                        'action': 'buy',
-                        'price': current_price,
-                        'shares': shares,
-                        'value': cost
-                    })
-            
-            elif signal == -1 and positions > 0:  # 卖出信号
-                proceeds = positions * current_price * (1 - commission)
-                portfolio_value += proceeds
-                trades.append({
-                    'date': row.get('date', i),
-                    'action': 'sell',
-                    'price': current_price,
-                    'shares': positions,
-                    'value': proceeds
-                })
-                positions = 0
-            
-            # 计算当前组合价值
-            current_portfolio_value = portfolio_value + positions * current_price
-            portfolio_values.append(current_portfolio_value)
+        # 全仓买入、信号卖出
+        state = simulate_signals(prices, signal_values, labels, initial_capital, commission)
+        portfolio_value = state.cash
+        positions = state.positions
+        trades = state.trades
+        portfolio_values = state.equity.tolist()
         
         # 计算最终价值
         if positions > 0:
-            final_price = signals_df.iloc[-1][price_col]
+            final_price = prices[-1]
             portfolio_value += positions * final_price
         
         # 计算总收益率（这个变量在原代码中缺失）
@@ -1295,118 +1189,71 @@ def enhanced_backtest_with_position_management(
     """
     logger.info(f"[Strategy]开始仓位管理回测，初始资金: {initial_capital}，单笔风险: {risk_per_trade*100}%")
     try:
-        portfolio_value = initial_capital
-        positions = 0
-        trades = []
-        portfolio_values = []
         position_records = []  # 记录仓位管理信息
         
-        signals_df = pd.DataFrame(signals) if isinstance(signals, list) else signals
-        
-        # 确定价格列名
-        price_col = 'close' if 'close' in signals_df.columns else '收盘'
-        if price_col not in signals_df.columns:
+        prepared = prepare_signal_arrays(signals)
+        if prepared is None:
             return {"status": "error", "message": "未找到价格数据"}
+        signals_df, price_col, prices, signal_values, labels = prepared
         
-        for i, row in signals_df.iterrows():
-            current_price = row[price_col]
-            signal = row.get('signal', 0)
+        def size_entry(i, current_price, state):
+            """买入信号：按单笔风险计算仓位"""
+            # 计算止损价格
+            stop_loss_price = current_price * (1 - stop_loss_pct)
             
-            if signal == 1 and positions == 0:  # 买入信号
-                # 计算止损价格
-                stop_loss_price = current_price * (1 - stop_loss_pct)
-                
-                # 使用仓位管理计算买入数量
-                position_result = calculate_position_size(
-                    capital=portfolio_value,
-                    risk_per_trade=risk_per_trade,
-                    entry_price=current_price,
-                    stop_loss=stop_loss_price
-                )
-                
-                if position_result["status"] == "success":
-                    position_data = position_result["data"]
-                    suggested_shares = position_data["position_size"]
-                    
-                    # 确保不超过可用资金
-                    max_affordable_shares = int(portfolio_value // (current_price * (1 + commission)))
-                    shares = min(suggested_shares, max_affordable_shares)
-                    
-                    if shares > 0:
-                        cost = shares * current_price * (1 + commission)
-                        portfolio_value -= cost
-                        positions = shares
-                        
-                        trade_record = {
-                            'date': row.get('date', i),
-                            'action': 'buy',
-                            'price': current_price,
-                            'shares': shares,
-                            'value': cost,
-                            'stop_loss': stop_loss_price
-                        }
-                        trades.append(trade_record)
-                        
-                        # 记录仓位管理信息
-                        position_records.append({
-                            'date': row.get('date', i),
-                            'suggested_position': suggested_shares,
-                            'actual_position': shares,
-                            'position_value': cost,
-                            'position_ratio': position_data["position_ratio"],
-                            'risk_amount': position_data["risk_amount"],
-                            'stop_loss_price': stop_loss_price
-                        })
-                else:
-                    logger.warning(f"[Strategy]仓位计算失败: {position_result['message']}")
+            # 使用仓位管理计算买入数量
+            position_result = calculate_position_size(
+                capital=state.cash,
+                risk_per_trade=risk_per_trade,
+                entry_price=current_price,
+                stop_loss=stop_loss_price
+            )
+            if position_result["status"] != "success":
+                logger.warning(f"[Strategy]仓位计算失败: {position_result['message']}")
+                return None
             
-            elif signal == -1 and positions > 0:  # 卖出信号
-                proceeds = positions * current_price * (1 - commission)
-                portfolio_value += proceeds
-                
-                # 计算这笔交易的盈亏
-                last_buy = next((t for t in reversed(trades) if t['action'] == 'buy'), None)
-                profit_loss = 0
-                if last_buy:
-                    profit_loss = proceeds - last_buy['value']
-                
-                trades.append({
-                    'date': row.get('date', i),
-                    'action': 'sell',
-                    'price': current_price,
-                    'shares': positions,
-                    'value': proceeds,
-                    'profit_loss': profit_loss
-                })
-                positions = 0
+            position_data = position_result["data"]
+            suggested_shares = position_data["position_size"]
             
-            # 检查止损（如果有持仓）
-            elif positions > 0:
-                last_buy = next((t for t in reversed(trades) if t['action'] == 'buy'), None)
-                if last_buy and current_price <= last_buy.get('stop_loss', 0):
-                    # 触发止损
-                    proceeds = positions * current_price * (1 - commission)
-                    portfolio_value += proceeds
-                    
-                    profit_loss = proceeds - last_buy['value']
-                    
-                    trades.append({
-                        'date': row.get('date', i),
-                        'action': 'stop_loss',
-                        'price': current_price,
-                        'shares': positions,
-                        'value': proceeds,
-                        'profit_loss': profit_loss
-                    })
-                    positions = 0
+            # 确保不超过可用资金
+            max_affordable_shares = int(state.cash // (current_price * (1 + commission)))
+            shares = min(suggested_shares, max_affordable_shares)
             
-            # 计算当前组合价值
-            current_portfolio_value = portfolio_value + positions * current_price
-            portfolio_values.append(current_portfolio_value)
+            if shares > 0:
+                # 记录仓位管理信息
+                position_records.append({
+                    'date': state.date_at(i),
+                    'suggested_position': suggested_shares,
+                    'actual_position': shares,
+                    'position_value': shares * current_price * (1 + commission),
+                    'position_ratio': position_data["position_ratio"],
+                    'risk_amount': position_data["risk_amount"],
+                    'stop_loss_price': stop_loss_price
+                })
+            return shares, {'stop_loss': stop_loss_price}
+        
+        def on_exit(i, current_price, proceeds, state):
+            """卖出/止损：计算这笔交易的盈亏"""
+            last_buy = state.entry_trade
+            return {'profit_loss': proceeds - last_buy['value'] if last_buy else 0}
+        
+        def check_stop_loss(i, current_price, state):
+            """持仓期间检查止损"""
+            last_buy = state.entry_trade
+            if last_buy and current_price <= last_buy.get('stop_loss', 0):
+                return 'stop_loss'
+            return None
+        
+        state = simulate_signals(prices, signal_values, labels, initial_capital, commission,
+                                 size_entry=size_entry, on_exit=on_exit, check_hold=check_stop_loss)
+        portfolio_value = state.cash
+        positions = state.positions
+        trades = state.trades
+        portfolio_values = state.equity.tolist()
         
         # 计算最终价值
         if positions > 0:
-            final_price = signals_df.iloc[-1][price_col]
+            final_price = prices[-1]
             portfolio_value += positions * final_price
         
         # 计算总收益率
@@ -1520,197 +1367,140 @@ def pluggable_backtest(
             )
         
         # 初始化回测变量
-        portfolio_value = initial_capital
-        positions = 0
-        trades = []
-        portfolio_values = []
         risk_events = []  # 记录风控事件
         position_adjustments = []  # 记录仓位调整
         
-        signals_df = pd.DataFrame(signals) if isinstance(signals, list) else signals
-        price_col = 'close' if 'close' in signals_df.columns else '收盘'
-        
-        if price_col not in signals_df.columns:
+        prepared = prepare_signal_arrays(signals)
+        if prepared is None:
             return {"status": "error", "message": "未找到价格数据"}
+        signals_df, price_col, prices, signal_values, labels = prepared
         
         # 计算市场波动率（用于动态仓位管理）
-        prices = signals_df[price_col].values
         returns = pd.Series(prices).pct_change().dropna()
         market_volatility = returns.std() * np.sqrt(252) if len(returns) > 1 else 0.2
         
-        entry_price = None
-        stop_loss_price = None
-        
-        for i, row in signals_df.iterrows():
-            current_price = row[price_col]
-            signal = row.get('signal', 0)
-            current_date = row.get('date', i)
+        def size_entry(i, current_price, state):
+            """买入信号：风控检查 + 仓位计算"""
+            current_date = state.date_at(i)
             
-            # 计算当前回撤
-            peak_value = max(portfolio_values) if portfolio_values else initial_capital
-            current_value = portfolio_value + positions * current_price
-            current_drawdown = (peak_value - current_value) / peak_value if peak_value > 0 else 0
+            # 当前回撤取自运行峰值（O(1)），尚无历史时以初始资金为峰值
+            risk_context = state.tracker.risk_context(
+                state.cash, current_value=state.value_at(current_price), default_peak=initial_capital,
+                market_volatility=market_volatility
+            )
             
-            # 买入信号处理
-            if signal == 1 and positions == 0:
-                # 风控检查
-                risk_context = {
-                    'portfolio_value': portfolio_value,
-                    'current_drawdown': current_drawdown,
-                    'market_volatility': market_volatility
-                }
-                
-                risk_decision = {"status": "approve"}
-                if risk_manager:
-                    risk_decision = risk_manager.should_enter_position(risk_context)
+            risk_decision = {"status": "approve"}
+            if risk_manager:
+                risk_decision = risk_manager.should_enter_position(risk_context)
+            
+            if risk_decision["status"] != "approve":
+                # 记录风控拒绝事件
+                risk_events.append({
+                    'date': current_date,
+                    'event': 'entry_rejected',
+                    'reason': risk_decision.get('reason', '未知原因'),
+                    'price': current_price
+                })
+                return None
+            
+            # 计算止损价格
+            if risk_manager:
+                stop_loss_price = risk_manager.get_stop_loss_price(current_price, risk_context)
+            else:
+                stop_loss_price = current_price * 0.95  # 默认5%止损
+            
+            # 计算仓位大小
+            position_context = {
+                'capital': state.cash,
+                'entry_price': current_price,
+                'stop_loss_price': stop_loss_price,
+                'commission': commission,
+                'market_volatility': market_volatility
+            }
+            
+            if position_manager:
+                position_result = position_manager.calculate_position_size(position_context)
+            else:
+                # 默认仓位计算
+                position_result = calculate_position_size(
+                    capital=state.cash,
+                    risk_per_trade=0.02,
+                    entry_price=current_price,
+                    stop_loss=stop_loss_price
+                )
+            
+            if position_result["status"] != "success":
+                return None
+            
+            suggested_shares = position_result["data"]["position_size"]
+            # 确保不超过可用资金
+            max_affordable_shares = int(state.cash // (current_price * (1 + commission)))
+            return min(suggested_shares, max_affordable_shares), {'stop_loss': stop_loss_price}
+        
+        def on_exit(i, current_price, proceeds, state):
+            """平仓：按开仓价计算盈亏"""
+            entry_price = state.entry_trade['price'] if state.entry_trade else None
+            return {'profit_loss': proceeds - (entry_price * state.positions * (1 + commission)) if entry_price else 0}
+        
+        def check_hold(i, current_price, state):
+            """持仓期间的风控检查和仓位调整"""
+            current_date = state.date_at(i)
+            entry_price = state.entry_trade['price']
+            
+            if risk_manager:
+                risk_context = state.tracker.risk_context(
+                    state.cash, current_value=state.value_at(current_price), default_peak=initial_capital,
+                    current_price=current_price,
+                    entry_price=entry_price,
+                    stop_loss_price=state.entry_trade['stop_loss'],
+                    positions=state.positions
+                )
+                exit_decision = risk_manager.should_exit_position(risk_context)
                 
-                if risk_decision["status"] == "approve":
-                    # 计算止损价格
-                    if risk_manager:
-                        stop_loss_price = risk_manager.get_stop_loss_price(current_price, risk_context)
-                    else:
-                        stop_loss_price = current_price * 0.95  # 默认5%止损
-                    
-                    # 计算仓位大小
-                    position_context = {
-                        'capital': portfolio_value,
-                        'entry_price': current_price,
-                        'stop_loss_price': stop_loss_price,
-                        'commission': commission,
-                        'market_volatility': market_volatility
-                    }
-                    
-                    if position_manager:
-                        position_result = position_manager.calculate_position_size(position_context)
-                    else:
-                        # 默认仓位计算
-                        position_result = calculate_position_size(
-                            capital=portfolio_value,
-                            risk_per_trade=0.02,
-                            entry_price=current_price,
-                            stop_loss=stop_loss_price
-                        )
-                    
-                    if position_result["status"] == "success":
-                        position_data = position_result["data"]
-                        suggested_shares = position_data["position_size"]
-                        
-                        # 确保不超过可用资金
-                        max_affordable_shares = int(portfolio_value // (current_price * (1 + commission)))
-                        shares = min(suggested_shares, max_affordable_shares)
-                        
-                        if shares > 0:
-                            cost = shares * current_price * (1 + commission)
-                            portfolio_value -= cost
-                            positions = shares
-                            entry_price = current_price
-                            
-                            trades.append({
-                                'date': current_date,
-                                'action': 'buy',
-                                'price': current_price,
-                                'shares': shares,
-                                'value': cost,
-                                'stop_loss': stop_loss_price
-                            })
-                else:
-                    # 记录风控拒绝事件
+                if exit_decision["status"] == "force_exit":
                     risk_events.append({
                         'date': current_date,
-                        'event': 'entry_rejected',
-                        'reason': risk_decision.get('reason', '未知原因'),
+                        'event': 'force_exit',
+                        'reason': exit_decision.get('reason', '风控强制平仓'),
                         'price': current_price
                     })
+                    # 强制平仓
+                    return exit_decision.get('exit_type', 'force_exit')
             
-            # 卖出信号处理
-            elif signal == -1 and positions > 0:
-                proceeds = positions * current_price * (1 - commission)
-                portfolio_value += proceeds
+            # 仓位调整检查
+            if position_manager:
+                current_value = state.value_at(current_price)
+                profit_ratio = (current_value - initial_capital) / initial_capital
                 
-                profit_loss = proceeds - (entry_price * positions * (1 + commission)) if entry_price else 0
-                
-                trades.append({
-                    'date': current_date,
-                    'action': 'sell',
-                    'price': current_price,
-                    'shares': positions,
-                    'value': proceeds,
-                    'profit_loss': profit_loss
-                })
-                
-                positions = 0
-                entry_price = None
-                stop_loss_price = None
-            
-            # 持仓期间的风控检查
-            elif positions > 0:
-                risk_context = {
+                adjust_context = {
+                    'market_volatility': market_volatility,
+                    'profit_ratio': profit_ratio,
                     'current_price': current_price,
-                    'entry_price': entry_price,
-                    'stop_loss_price': stop_loss_price,
-                    'portfolio_value': portfolio_value,
-                    'positions': positions
+                    'entry_price': entry_price
                 }
                 
-                # 风控检查
-                if risk_manager:
-                    exit_decision = risk_manager.should_exit_position(risk_context)
-                    
-                    if exit_decision["status"] == "force_exit":
-                        # 强制平仓
-                        proceeds = positions * current_price * (1 - commission)
-                        portfolio_value += proceeds
-                        
-                        profit_loss = proceeds - (entry_price * positions * (1 + commission)) if entry_price else 0
-                        
-                        trades.append({
-                            'date': current_date,
-                            'action': exit_decision.get('exit_type', 'force_exit'),
-                            'price': current_price,
-                            'shares': positions,
-                            'value': proceeds,
-                            'profit_loss': profit_loss
-                        })
-                        
-                        risk_events.append({
-                            'date': current_date,
-                            'event': 'force_exit',
-                            'reason': exit_decision.get('reason', '风控强制平仓'),
-                            'price': current_price
-                        })
-                        
-                        positions = 0
-                        entry_price = None
-                        stop_loss_price = None
-                
-                # 仓位调整检查
-                if position_manager and positions > 0:
-                    current_value = portfolio_value + positions * current_price
-                    profit_ratio = (current_value - initial_capital) / initial_capital
-                    
-                    adjust_context = {
-                        'market_volatility': market_volatility,
-                        'profit_ratio': profit_ratio,
-                        'current_price': current_price,
-                        'entry_price': entry_price
-                    }
-                    
-                    adjustment = position_manager.adjust_position(positions, adjust_context)
-                    if adjustment["status"] == "success" and adjustment["action"] != "hold":
-                        position_adjustments.append({
-                            'date': current_date,
-                            'action': adjustment["action"],
-                            'reason': adjustment.get('reason', ''),
-                            'adjustment_ratio': adjustment.get('adjustment_ratio', 1.0)
-                        })
-            
-            # 记录组合价值
-            current_portfolio_value = portfolio_value + positions * current_price
-            portfolio_values.append(current_portfolio_value)
+                adjustment = position_manager.adjust_position(state.positions, adjust_context)
+                if adjustment["status"] == "success" and adjustment["action"] != "hold":
+                    position_adjustments.append({
+                        'date': current_date,
+                        'action': adjustment["action"],
+                        'reason': adjustment.get('reason', ''),
+                        'adjustment_ratio': adjustment.get('adjustment_ratio', 1.0)
+                    })
+            return None
+        
+        # 没有管理器时持仓期间无需逐根检查
+        state = simulate_signals(prices, signal_values, labels, initial_capital, commission,
+                                 size_entry=size_entry, on_exit=on_exit,
+                                 check_hold=check_hold if (risk_manager or position_manager) else None)
+        portfolio_value = state.cash
+        positions = state.positions
+        trades = state.trades
+        portfolio_values = state.equity.tolist()
         
         # 最终清算
         if positions > 0:
-            final_price = signals_df.iloc[-1][price_col]
+            final_price = prices[-1]
             portfolio_value += positions * final_price
         
         # 计算回测结果
@@ -1768,6 +1558,9 @@ def pluggable_backtest(
                 # 风险指标
                 "risk_metrics": risk_metrics,
                 
+                # 回撤跟踪（运行峰值、最大回撤及起止日期）
+                "drawdown_summary": state.tracker.summary(labels),
+                
                 # 市场环境
                 "market_volatility": market_volatility,
                 "market_volatility_pct": market_volatility * 100
@@ -1815,6 +1608,10 @@ def event_driven_backtest(
         portfolio_values = []
         event_signals = []
         
+        # 按标的建立价格索引，as-of 查找为二分查找；持仓估值复用缓存的价格
+        price_index = AsOfPriceIndex(price_data)
+        mark_to_market = MarkToMarketCache(price_index)
+        
         # 按时间排序事件
         sorted_events = sorted(events_data, key=lambda x: x['timestamp'])
         
@@ -1832,16 +1629,11 @@ def event_driven_backtest(
                 timestamp = signal['timestamp']
                 
                 # 获取当时的价格
-                price_row = price_data[
-                    (price_data['symbol'] == symbol) & 
-                    (price_data['date'] <= timestamp)
-                ].tail(1)
+                current_price = price_index.price_at(symbol, timestamp)
                 
-                if price_row.empty:
+                if current_price is None:
                     continue
                 
-                current_price = price_row['close'].iloc[0]
-                
                 # 执行交易逻辑
                 if signal_value > 0:  # 买入信号
                     if symbol not in positions or positions[symbol] == 0:
@@ -1888,15 +1680,7 @@ def event_driven_backtest(
                         event_signals.append(signal)
             
             # 计算当前组合价值
-            current_value = portfolio_value
-            for symbol, shares in positions.items():
-                if shares > 0:
-                    latest_price_row = price_data[
-                        (price_data['symbol'] == symbol) & 
-                        (price_data['date'] <= event.timestamp)
-                    ].tail(1)
-                    if not latest_price_row.empty:
-                        current_value += shares * latest_price_row['close'].iloc[0]
+            current_value = mark_to_market.portfolio_value(portfolio_value, positions, event.timestamp)
             
             portfolio_values.append({
                 'date': event.timestamp,
@@ -1907,9 +1691,9 @@ def event_driven_backtest(
         final_value = portfolio_value
         for symbol, shares in positions.items():
             if shares > 0:
-                final_price_row = price_data[price_data['symbol'] == symbol].tail(1)
-                if not final_price_row.empty:
-                    final_value += shares * final_price_row['close'].iloc[0]
+                final_price = price_index.latest_price(symbol)
+                if final_price is not None:
+                    final_value += shares * final_price
         
         total_return = (final_value - initial_capital) / initial_capital
         
@@ -2067,6 +1851,10 @@ def multi_driven_backtest(
                 risk_manager_config.get('params', {})
             )
         
+        # 价格按日期排序建立索引（与原逻辑一致，不区分标的），as-of 查找为二分查找
+        price_index = AsOfPriceIndex(price_data, symbol_col=None)
+        mark_to_market = MarkToMarketCache(price_index)
+        
         # 处理每个信号
         for signal in all_signals:
             try:
@@ -2077,15 +1865,11 @@ def multi_driven_backtest(
                 signal_type = signal.get('signal_type', 'unknown')
                 
                 # 获取当前价格
-                current_price_row = price_data[
-                    price_data['date'] <= signal_date
-                ].tail(1)
+                current_price = price_index.price_at(symbol, signal_date)
                 
-                if current_price_row.empty:
+                if current_price is None:
                     continue
                 
-                current_price = current_price_row['close'].iloc[0]
-                
                 # 应用权重调整信号强度
                 adjusted_signal = signal_value * signal_weight
                 
@@ -2157,14 +1941,7 @@ def multi_driven_backtest(
                 })
                 
                 # 计算当前组合价值
-                current_value = portfolio_value
-                for pos_symbol, shares in positions.items():
-                    if shares > 0:
-                        latest_price_row = price_data[
-                            (price_data['date'] <= signal_date)
-                        ].tail(1)
-                        if not latest_price_row.empty:
-                            current_value += shares * latest_price_row['close'].iloc[0]
+                current_value = mark_to_market.portfolio_value(portfolio_value, positions, signal_date)
                 
                 portfolio_values.append({
                     'date': signal_date,
@@ -2405,83 +2182,123 @@ def optimize_news_sentiment_strategy():
     )
     
     return result
+def _evaluate_param_combination(df: pd.DataFrame, strategy_func, params: Dict, optimization_metric: str):
+    """
+    评估单个参数组合：策略函数 -> 简单回测 -> 性能评估
+    模块级函数，可被优化器的工作进程按名称导入
+    :return: (目标指标值, 性能评估数据)，任一环节失败时返回None
+    """
+    strategy_result = strategy_func(df, **params)
+    if strategy_result.get('status') != 'success':
+        return None
+    backtest_result = simple_backtest(df, strategy_result['data'])
+    if backtest_result.get('status') != 'success':
+        return None
+    performance = evaluate_strategy_performance(backtest_result)
+    if performance.get('status') != 'success':
+        return None
+    score = performance['data']['return_metrics'].get(optimization_metric, 0)
+    return score, performance['data']
+
+def _optimize_vectorized(df: pd.DataFrame, strategy_func, param_ranges: Dict, optimization_metric: str,
+                         max_iterations: int, seed: Optional[int]):
+    """
+    向量化批量参数优化：所有参数组合的信号矩阵一次回测，返回格式与 optimize_strategy_parameters 一致
+    """
+    from .optimizer import iter_param_combinations
+    from .vectorized_backtest import vectorized_parameter_sweep
+    
+    strategy = _VECTORIZED_STRATEGIES.get(strategy_func)
+    if strategy is None:
+        return {"status": "error", "message": f"策略 {getattr(strategy_func, '__name__', strategy_func)} 不支持向量化回测"}
+    try:
+        # 未指定的参数取策略函数的默认值
+        defaults = {name: param.default for name, param in inspect.signature(strategy_func).parameters.items()
+                    if param.default is not inspect.Parameter.empty}
+        param_sets = [{**defaults, **params}
+                      for _, params in iter_param_combinations(param_ranges, max_iterations, seed=seed)]
+        results = vectorized_parameter_sweep(df, strategy, param_sets, optimization_metric)
+        
+        # 同分取靠前的组合
+        ranked = sorted(range(len(results)), key=lambda i: (-results[i]['score'], i))
+        optimization_results = [results[i] for i in ranked]
+        best = optimization_results[0] if optimization_results else None
+        best_score = best['score'] if best else float('-inf')
+        
+        return {
+            "status": "success",
+            "data": {
+                "best_params": best['params'] if best else None,
+                "best_score": best_score,
+                "optimization_metric": optimization_metric,
+                "search_strategy": 'vectorized',
+                "total_combinations_tested": len(results),
+                "evaluations": len(results),
+                "evaluation_cost": float(len(results)),
+                "evaluations_to_best": ranked[0] + 1 if ranked else 0,
+                "cancelled": False,
+                "top_10_results": optimization_results[:10],
+                "all_results": optimization_results
+            },
+            "message": f"向量化参数优化完成，最佳{optimization_metric}: {best_score:.4f}"
+        }
+    except Exception as e:
+        logger.error(f"[Strategy]向量化参数优化失败: {e}")
+        return {"status": "error", "message": f"参数优化失败: {e}"}
+
+# 支持向量化批量回测的策略函数
+_VECTORIZED_STRATEGIES = {
+    generate_ma_crossover_signal: 'ma_crossover',
+    generate_rsi_signal: 'rsi',
+}
+
 def optimize_strategy_parameters(df: pd.DataFrame, strategy_func, param_ranges: Dict, 
-                               optimization_metric='sharpe_ratio', max_iterations=100):
+                               optimization_metric='sharpe_ratio', max_iterations=100,
+                               n_jobs: Optional[int] = None, cancel_event=None, on_result=None, seed: Optional[int] = None,
+                               search='grid', patience: Optional[int] = None):
     """
     策略参数优化
     :param df: 价格数据
-    :param strategy_func: 策略函数
+    :param strategy_func: 策略函数（需为模块级函数才能多进程并行，否则自动串行）
     :param param_ranges: 参数范围字典
     :param optimization_metric: 优化目标指标
-    :param max_iterations: 最大迭代次数
+    :param max_iterations: 最大迭代次数（回测预算，逐次减半中短窗口回测按数据比例折算）
+    :param n_jobs: 并行进程数，默认为CPU核数（OPTIMIZER_MAX_WORKERS），1为串行
+    :param cancel_event: threading.Event，置位后停止优化并返回已完成的结果
+    :param on_result: 每个组合完成时的回调 on_result(result)，用于流式输出进度
+    :param seed: 随机抽样种子
+    :param search: 搜索策略：grid（网格/随机抽样）、coarse_to_fine（由粗到细）、
+                   successive_halving（逐次减半）、bayesian（代理模型），或 SearchStrategy 实例；
+                   vectorized 为向量化批量回测（仅支持均线交叉、RSI策略，所有组合一次计算）
+    :param patience: 连续多少次评估没有改进时提前停止，为空时用满预算
     :return: 优化结果
     """
-    logger.info(f"[Strategy]开始策略参数优化，目标指标: {optimization_metric}")
+    logger.info(f"[Strategy]开始策略参数优化，目标指标: {optimization_metric}，搜索策略: {search}")
+    
+    if search == 'vectorized':
+        return _optimize_vectorized(df, strategy_func, param_ranges, optimization_metric, max_iterations, seed)
     
     try:
-        from itertools import product
-        import random
+        from .optimizer import EvaluationPool
+        from .search_strategies import run_search
         
-        # 生成参数组合
-        param_names = list(param_ranges.keys())
-        param_values = [param_ranges[name] for name in param_names]
+        with EvaluationPool(df, strategy_func, _evaluate_param_combination, optimization_metric,
+                            n_jobs=n_jobs, cancel_event=cancel_event) as pool:
+            summary = run_search(pool, param_ranges, search=search, budget=max_iterations,
+                                 patience=patience, on_result=on_result, seed=seed)
         
-        # 如果组合数量太大，使用随机采样
-        all_combinations = list(product(*param_values))
-        if len(all_combinations) > max_iterations:
-            combinations = random.sample(all_combinations, max_iterations)
-        else:
-            combinations = all_combinations
-        
-        best_params = None
-        best_score = float('-inf')
-        optimization_results = []
-        
-        for i, param_combo in enumerate(combinations):
-            try:
-                # 构建参数字典
-                params = dict(zip(param_names, param_combo))
-                
-                # 运行策略
-                strategy_result = strategy_func(df, **params)
-                
-                if strategy_result.get('status') != 'success':
-                    continue
-                
-                # 运行回测
-                backtest_result = simple_backtest(df, strategy_result['data'])
-                
-                if backtest_result.get('status') != 'success':
-                    continue
-                
-                # 计算评估指标
-                performance = evaluate_strategy_performance(backtest_result)
-                
-                if performance.get('status') != 'success':
-                    continue
-                
-                # 获取目标指标值
-                score = performance['data']['return_metrics'].get(optimization_metric, 0)
-                
-                optimization_results.append({
-                    'params': params,
-                    'score': score,
-                    'performance': performance['data']
-                })
-                
-                # 更新最佳参数
-                if score > best_score:
-                    best_score = score
-                    best_params = params
-                
-                logger.info(f"[Strategy]优化进度: {i+1}/{len(combinations)}, 当前最佳{optimization_metric}: {best_score:.4f}")
-                
-            except Exception as e:
-                logger.warning(f"[Strategy]参数组合 {param_combo} 优化失败: {e}")
-                continue
+        best = summary['best']
+        best_params = best['params'] if best else None
+        best_score = best['score'] if best else float('-inf')
         
-        # 排序结果
+        # 排序结果（同分按组合序号）
+        optimization_results = sorted(summary['results'], key=lambda x: x['index'])
         optimization_results.sort(key=lambda x: x['score'], reverse=True)
+        optimization_results = [
+            {'params': r['params'], 'score': r['score'], 'performance': r['performance']}
+            for r in optimization_results
+        ]
+        cancelled = summary['cancelled']
         
         return {
             "status": "success",
@@ -2489,11 +2306,16 @@ def optimize_strategy_parameters(df: pd.DataFrame, strategy_func, param_ranges:
                 "best_params": best_params,
                 "best_score": best_score,
                 "optimization_metric": optimization_metric,
+                "search_strategy": summary['search_strategy'],
                 "total_combinations_tested": len(optimization_results),
+                "evaluations": summary['evaluations'],
+                "evaluation_cost": summary['evaluation_cost'],
+                "evaluations_to_best": summary['evaluations_to_best'],
+                "cancelled": cancelled,
                 "top_10_results": optimization_results[:10],
                 "all_results": optimization_results
             },
-            "message": f"参数优化完成，最佳{optimization_metric}: {best_score:.4f}"
+            "message": f"参数优化{'已取消' if cancelled else '完成'}，最佳{optimization_metric}: {best_score:.4f}"
         }
         
     except Exception as e:
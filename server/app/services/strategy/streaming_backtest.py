@@ -0,0 +1,322 @@
+"""
+事件时间流式回测
+
+K线流与事件流按时间戳合并回放，输入可以是生成器，每路流只预读一条，内存占用取决于流的路数而不是数据总量：
+- EventClock：多路有序流的堆归并时钟；同一时间戳先处理K线再处理事件，
+  事件按当时已知的最新价格成交（与 event_driven_backtest 的 as-of 口径一致）
+- StreamingBacktest：维护现金、持仓和各标的最新价，持仓市值随K线增量更新；每个时间戳处理完后记录一次组合价值
+- 信号来源：事件经 EventSignalGenerator 的规则生成信号；K线可挂数据信号规则（逐根更新、状态有界，如 ma_crossover_bar_rule）
+
+交易规则与 event_driven_backtest 一致：无持仓时遇买入信号按 现金 × 信号强度 × 权重 × 单标的仓位比例 买入，
+有持仓时遇卖出信号全部卖出，手续费按成交额比例
+"""
+import heapq
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+from core.logger import logger
+from app.services.events.event_service import MarketEvent
+from app.services.risk.risk_manage_service import EquityTracker
+from app.services.signals.signal_service import EventSignalGenerator
+from app.services.signals.event_signals.event_signal_rules import news_sentiment_rule, keyword_trigger_rule
+
+# 同一时间戳的处理顺序：K线先于事件
+BAR = 0
+EVENT = 1
+
+# bar_rule(bar) -> 信号字典（含 symbol、signal、strength）或 None
+BarRule = Callable[[Dict], Optional[Dict]]
+
+
+def _to_ns(timestamp) -> int:
+    return pd.Timestamp(timestamp).value
+
+
+# ============ 输入流 ============
+def iter_price_bars(source, symbol: str = 'default') -> Iterator[Dict]:
+    """
+    把价格数据转为按时间排序的K线流
+    :param source: DataFrame、DataFrame 分块的可迭代对象（如 pd.read_csv(..., chunksize=...)）或K线字典的可迭代对象
+    :param symbol: 数据中没有 symbol 列时使用的标的代码
+    :return: K线字典 {'date', 'symbol', 'close'} 的生成器；分块数据只在块内排序，块之间须已按时间先后排列
+    """
+    if isinstance(source, pd.DataFrame):
+        source = [source]
+    for chunk in source:
+        if not isinstance(chunk, pd.DataFrame):
+            yield chunk
+            continue
+        price_col = 'close' if 'close' in chunk.columns else '收盘'
+        if price_col not in chunk.columns:
+            raise ValueError("未找到收盘价数据")
+        dates = pd.to_datetime(chunk['date'] if 'date' in chunk.columns else chunk.index)
+        symbols = chunk['symbol'] if 'symbol' in chunk.columns else [symbol] * len(chunk)
+        frame = pd.DataFrame({'date': dates, 'symbol': symbols, 'close': chunk[price_col].to_numpy()})
+        if not frame['date'].is_monotonic_increasing:
+            frame = frame.sort_values('date', kind='stable')
+        for date, bar_symbol, close in frame.itertuples(index=False, name=None):
+            yield {'date': date, 'symbol': bar_symbol, 'close': close}
+
+
+def iter_market_events(events: Iterable) -> Iterator[MarketEvent]:
+    """把事件字典流转为 MarketEvent 流（已是 MarketEvent 的原样返回）"""
+    for event in events:
+        yield event if isinstance(event, MarketEvent) else MarketEvent(**event)
+
+
+def ma_crossover_bar_rule(short_period: int = 5, long_period: int = 20, strength: float = 1.0) -> BarRule:
+    """
+    逐根K线的均线交叉规则（金叉买入、死叉卖出，口径同 generate_ma_crossover_signal_from_indicators），
+    每个标的只保留最近 long_period 根收盘价
+    """
+    windows: Dict[str, deque] = {}
+    previous: Dict[str, Tuple[float, float]] = {}
+
+    def rule(bar: Dict) -> Optional[Dict]:
+        symbol = bar['symbol']
+        window = windows.setdefault(symbol, deque(maxlen=long_period))
+        window.append(bar['close'])
+        if len(window) < long_period:
+            return None
+        closes = list(window)
+        short_ma = sum(closes[-short_period:]) / short_period
+        long_ma = sum(closes) / long_period
+        last = previous.get(symbol)
+        previous[symbol] = (short_ma, long_ma)
+        if last is None:
+            return None
+        if short_ma > long_ma and last[0] <= last[1]:
+            signal = 1
+        elif short_ma < long_ma and last[0] >= last[1]:
+            signal = -1
+        else:
+            return None
+        return {'symbol': symbol, 'signal': signal, 'strength': strength, 'timestamp': bar['date'],
+                'reason': f'均线{"金叉" if signal > 0 else "死叉"}(MA{short_period}/MA{long_period})'}
+
+    rule.__name__ = f'ma_crossover_bar_rule_{short_period}_{long_period}'
+    return rule
+
+
+# ============ 堆时钟 ============
+class EventClock:
+    """多路有序流的堆归并：按 (时间戳, 类型, 流序号) 依次弹出，每路流在堆中最多一条"""
+
+    def __init__(self):
+        self._heap: List[Tuple[int, int, int, Any]] = []
+        self._streams: List[List] = []  # [迭代器, 类型, 取时间戳函数, 上一条时间戳]
+
+    def add_stream(self, stream: Iterable, kind: int, timestamp_of: Callable[[Any], Any]) -> None:
+        """
+        添加一路按时间排序的输入流
+        :param stream: 可迭代对象（可为生成器）
+        :param kind: BAR 或 EVENT
+        :param timestamp_of: 从元素取时间戳的函数
+        """
+        self._streams.append([iter(stream), kind, timestamp_of, None])
+        self._advance(len(self._streams) - 1)
+
+    def _advance(self, stream_id: int) -> None:
+        iterator, kind, timestamp_of, last = self._streams[stream_id]
+        item = next(iterator, None)
+        if item is None:
+            return
+        ns = _to_ns(timestamp_of(item))
+        if last is not None and ns < last:
+            raise ValueError(f"第{stream_id + 1}路输入流时间倒序: {timestamp_of(item)}")
+        self._streams[stream_id][3] = ns
+        heapq.heappush(self._heap, (ns, kind, stream_id, item))
+
+    def __iter__(self) -> Iterator[Tuple[int, int, Any]]:
+        """依次产出 (时间戳纳秒, 类型, 元素)"""
+        while self._heap:
+            ns, kind, stream_id, item = heapq.heappop(self._heap)
+            self._advance(stream_id)
+            yield ns, kind, item
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+# ============ 回测引擎 ============
+class StreamingBacktest:
+    """事件时间流式回测引擎"""
+
+    def __init__(self, initial_capital: float = 100000, commission: float = 0.001, max_position_pct: float = 0.1,
+                 signal_rules: Optional[List[Callable]] = None, bar_rules: Optional[List[BarRule]] = None,
+                 signal_weights: Optional[Dict[str, float]] = None, keep_history: bool = True):
+        """
+        :param initial_capital: 初始资金
+        :param commission: 手续费率
+        :param max_position_pct: 单次买入占现金的最大比例
+        :param signal_rules: 事件信号规则，默认同 event_driven_backtest（新闻情感、关键词）
+        :param bar_rules: K线信号规则
+        :param signal_weights: 信号来源权重 {'data_driven': 1.0, 'event_driven': 1.0}，乘到信号强度上
+        :param keep_history: 是否保留每个时间戳的组合价值；关闭时只保留回撤汇总，内存不随回放长度增长
+        """
+        self.initial_capital = initial_capital
+        self.commission = commission
+        self.max_position_pct = max_position_pct
+        self.bar_rules = bar_rules or []
+        self.signal_weights = {'data_driven': 1.0, 'event_driven': 1.0, **(signal_weights or {})}
+        self.keep_history = keep_history
+
+        self.signal_generator = EventSignalGenerator()
+        for rule in (signal_rules if signal_rules is not None else [news_sentiment_rule, keyword_trigger_rule]):
+            self.signal_generator.add_rule(rule)
+
+        self.cash = initial_capital
+        self.positions: Dict[str, int] = {}
+        self.last_price: Dict[str, float] = {}
+        self.positions_value = 0.0
+        self.tracker = EquityTracker()
+        self.trades: List[Dict] = []
+        self.portfolio_values: List[Dict] = []
+        self.signals_executed = 0
+        self.bars_processed = 0
+        self.events_processed = 0
+
+    # ---- 事件处理 ----
+    def on_bar(self, bar: Dict) -> None:
+        """K线：更新最新价和持仓市值，再执行K线信号规则"""
+        symbol, price = bar['symbol'], bar['close']
+        shares = self.positions.get(symbol, 0)
+        if shares:
+            self.positions_value += shares * (price - self.last_price[symbol])
+        self.last_price[symbol] = price
+        self.bars_processed += 1
+        for rule in self.bar_rules:
+            signal = rule(bar)
+            if signal:
+                signal.setdefault('signal_type', 'data_driven')
+                self._execute(signal, 'data_driven', bar['date'])
+
+    def on_event(self, event: MarketEvent) -> None:
+        """事件：经事件规则生成信号并执行"""
+        self.events_processed += 1
+        for signal in self.signal_generator.generate_signals([event]):
+            self._execute(signal, 'event_driven', signal.get('timestamp', event.timestamp))
+
+    def _execute(self, signal: Dict, source: str, timestamp) -> None:
+        symbol = signal['symbol']
+        price = self.last_price.get(symbol)
+        if price is None:  # 该标的还没有K线
+            return
+        shares = self.positions.get(symbol, 0)
+        record = {'date': timestamp, 'symbol': symbol, 'price': price, 'source': source,
+                  'reason': signal.get('reason'), 'event_id': signal.get('event_id')}
+        if signal['signal'] > 0 and shares == 0:
+            strength = signal.get('strength', 1.0) * self.signal_weights.get(source, 1.0)
+            position_size = self.cash * strength * self.max_position_pct
+            shares = int(position_size // (price * (1 + self.commission)))
+            if shares <= 0:
+                return
+            cost = shares * price * (1 + self.commission)
+            self.cash -= cost
+            self.positions[symbol] = shares
+            self.positions_value += shares * price
+            self.trades.append({**record, 'action': 'buy', 'shares': shares, 'value': cost})
+        elif signal['signal'] < 0 and shares > 0:
+            proceeds = shares * price * (1 - self.commission)
+            self.cash += proceeds
+            self.positions[symbol] = 0
+            self.positions_value -= shares * price
+            if not any(self.positions.values()):
+                self.positions_value = 0.0  # 空仓时清除累计误差
+            self.trades.append({**record, 'action': 'sell', 'shares': shares, 'value': proceeds})
+        else:
+            return
+        self.signals_executed += 1
+
+    def _mark(self, ns: int) -> None:
+        """记录时间戳 ns 处理完后的组合价值"""
+        value = self.cash + self.positions_value
+        date = pd.Timestamp(ns)
+        self.tracker.update(value, date)
+        if self.keep_history:
+            self.portfolio_values.append({'date': date, 'value': value, 'cash': self.cash,
+                                          'positions_value': self.positions_value})
+
+    def final_value(self) -> float:
+        """现金 + 按各标的最新价计算的持仓市值"""
+        value = self.cash
+        for symbol, shares in self.positions.items():
+            if shares > 0:
+                value += shares * self.last_price[symbol]
+        return value
+
+    # ---- 回放 ----
+    def run(self, bar_streams: List[Iterable[Dict]], event_streams: Optional[List[Iterable[MarketEvent]]] = None) -> 'StreamingBacktest':
+        """
+        合并回放K线流和事件流
+        :param bar_streams: K线流列表（每路按时间排序，见 iter_price_bars）
+        :param event_streams: MarketEvent 流列表（每路按时间排序，见 iter_market_events）
+        """
+        clock = EventClock()
+        for stream in bar_streams:
+            clock.add_stream(stream, BAR, lambda bar: bar['date'])
+        for stream in event_streams or []:
+            clock.add_stream(stream, EVENT, lambda event: event.timestamp)
+
+        current = None
+        for ns, kind, item in clock:
+            if current is not None and ns != current:
+                self._mark(current)
+            current = ns
+            if kind == BAR:
+                self.on_bar(item)
+            else:
+                self.on_event(item)
+        if current is not None:
+            self._mark(current)
+        return self
+
+
+def streaming_backtest(price_data, events: Optional[Iterable] = None, initial_capital=100000, commission=0.001,
+                       signal_rules=None, bar_rules=None, signal_weights=None, keep_history=True):
+    """
+    事件时间流式回测
+    :param price_data: 价格数据：DataFrame、DataFrame 分块迭代器、K线字典流，或前两者的列表（每个元素一路K线流，如每个标的一路）
+    :param events: 事件流（按时间排序的 MarketEvent 或事件字典，可为生成器）
+    :param initial_capital: 初始资金
+    :param commission: 手续费率
+    :param signal_rules: 事件信号规则
+    :param bar_rules: K线信号规则，如 [ma_crossover_bar_rule(5, 20)]
+    :param signal_weights: 信号来源权重
+    :param keep_history: 是否保留组合价值序列
+    :return: 回测结果
+    """
+    logger.info(f"[Strategy]开始流式回测，初始资金: {initial_capital}")
+    try:
+        multiple = isinstance(price_data, list) and bool(price_data) and not isinstance(price_data[0], dict)
+        sources = price_data if multiple else [price_data]
+        engine = StreamingBacktest(initial_capital, commission, signal_rules=signal_rules, bar_rules=bar_rules,
+                                   signal_weights=signal_weights, keep_history=keep_history)
+        engine.run([iter_price_bars(source) for source in sources],
+                   [iter_market_events(events)] if events is not None else None)
+
+        final_value = engine.final_value()
+        total_return = (final_value - initial_capital) / initial_capital
+        logger.info(f"[Strategy]流式回测完成: K线 {engine.bars_processed} 根, 事件 {engine.events_processed} 个, "
+                    f"交易 {len(engine.trades)} 笔")
+        return {
+            "status": "success",
+            "data": {
+                "initial_capital": initial_capital,
+                "final_value": final_value,
+                "total_return": total_return,
+                "total_return_pct": total_return * 100,
+                "trades_count": len(engine.trades),
+                "trades": engine.trades,
+                "portfolio_values": engine.portfolio_values,
+                "drawdown_summary": engine.tracker.summary(),
+                "bars_processed": engine.bars_processed,
+                "events_processed": engine.events_processed,
+                "signals_executed": engine.signals_executed
+            },
+            "message": "流式回测完成"
+        }
+    except Exception as e:
+        logger.error(f"[Strategy]流式回测失败: {e}")
+        return {"status": "error", "message": f"回测失败: {e}"}
@@ -0,0 +1,242 @@
+"""
+向量化批量回测
+
+一次 NumPy 计算评估多组参数：信号矩阵形状为 (参数组数, K线数)，每行是一组参数的交易信号（1买入 / -1卖出 / 0无操作）
+- 交易规则与 simple_backtest 一致：空仓遇买入信号全仓买入整数股，持仓遇卖出信号全部卖出，手续费按成交额比例
+- 持仓状态由"最近一个非零信号"前向填充得到；现金只在开平仓时变化，按第k笔交易逐笔（对所有参数组同时）递推
+- 绩效指标口径与 evaluate_strategy_performance 一致（收益率、年化、波动率、夏普、最大回撤）
+
+与逐行回测的差异：资金不足一股时 simple_backtest 会在之后的买入信号上重试，这里视为该笔交易成交0股
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from core.logger import logger
+
+TRADING_DAYS = 252
+
+
+# ============ 信号矩阵 ============
+def _close_array(df: pd.DataFrame) -> np.ndarray:
+    price_col = 'close' if 'close' in df.columns else '收盘'
+    if price_col not in df.columns:
+        raise ValueError("未找到收盘价数据")
+    return pd.to_numeric(df[price_col], errors='coerce').to_numpy(dtype=float)
+
+
+def _shift(matrix: np.ndarray) -> np.ndarray:
+    shifted = np.empty_like(matrix)
+    shifted[:, 0] = np.nan
+    shifted[:, 1:] = matrix[:, :-1]
+    return shifted
+
+
+def ma_crossover_signal_matrix(close: np.ndarray, params: Sequence[Tuple[int, int]]) -> np.ndarray:
+    """
+    均线交叉信号矩阵（与 generate_ma_crossover_signal_from_indicators 规则一致：金叉买入，死叉卖出）
+    :param close: 收盘价
+    :param params: [(short_period, long_period), ...]
+    :return: 信号矩阵 (len(params), len(close))
+    """
+    series = pd.Series(close)
+    periods = sorted({p for pair in params for p in pair})
+    ma = {p: series.rolling(window=p).mean().to_numpy() for p in periods}
+    short = np.array([ma[s] for s, _ in params])
+    long = np.array([ma[l] for _, l in params])
+    short_prev, long_prev = _shift(short), _shift(long)
+    signals = np.zeros(short.shape, dtype=np.int8)
+    signals[(short > long) & (short_prev <= long_prev)] = 1
+    signals[(short < long) & (short_prev >= long_prev)] = -1
+    return signals
+
+
+def _rsi(close: pd.Series, period: int) -> np.ndarray:
+    """RSI（与 analytic_service.calculate_rsi 口径一致）"""
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(window=period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    rsi = 100 - (100 / (1 + gain / loss.replace(0, np.nan)))
+    rsi[(gain > 0) & (loss == 0)] = 100.0
+    rsi[(gain == 0) & (loss == 0)] = 50.0
+    return rsi.to_numpy(dtype=float)
+
+
+def rsi_signal_matrix(close: np.ndarray, params: Sequence[Tuple[int, float, float]]) -> np.ndarray:
+    """
+    RSI超买超卖信号矩阵（与 generate_rsi_signal 规则一致：超卖买入，超买卖出）
+    :param close: 收盘价
+    :param params: [(period, oversold, overbought), ...]
+    :return: 信号矩阵 (len(params), len(close))
+    """
+    series = pd.Series(close)
+    rsi = {p: _rsi(series, p) for p in sorted({p for p, _, _ in params})}
+    values = np.array([rsi[p] for p, _, _ in params])
+    oversold = np.array([o for _, o, _ in params], dtype=float)[:, None]
+    overbought = np.array([o for _, _, o in params], dtype=float)[:, None]
+    signals = np.zeros(values.shape, dtype=np.int8)
+    signals[values < oversold] = 1
+    signals[values > overbought] = -1
+    return signals
+
+
+# 策略名称 -> (参数名顺序, 信号矩阵构造函数)
+BATCH_SIGNAL_BUILDERS = {
+    'ma_crossover': (('short_period', 'long_period'), ma_crossover_signal_matrix),
+    'rsi': (('period', 'oversold', 'overbought'), rsi_signal_matrix),
+}
+
+
+# ============ 批量回测 ============
+def batch_backtest(close: np.ndarray, signals: np.ndarray, initial_capital: float = 100000,
+                   commission: float = 0.001) -> Dict[str, np.ndarray]:
+    """
+    批量回测：对信号矩阵的每一行同时执行全仓回测
+    :param close: 收盘价 (T,)
+    :param signals: 信号矩阵 (P, T)
+    :param initial_capital: 初始资金
+    :param commission: 手续费率
+    :return: {'equity', 'shares', 'final_value', 'total_return', 'trades_count', 'round_trips', 'win_rate'}，
+             equity / shares 形状为 (P, T)，其余为 (P,)
+    """
+    close = np.asarray(close, dtype=float)
+    signals = np.atleast_2d(signals)
+    n_sets, n_bars = signals.shape
+    if n_bars == 0:
+        raise ValueError("价格数据为空")
+    # 按行展开后的扁平下标偏移，gather 用 np.take 比 take_along_axis 快
+    row_offset = (np.arange(n_sets, dtype=np.int64) * n_bars)[:, None]
+
+    # 持仓状态：最近一个非零信号为买入
+    last = np.maximum.accumulate(np.where(signals != 0, np.arange(n_bars, dtype=np.int64), -1), axis=1)
+    holding = (last >= 0) & (np.take(signals, np.maximum(last, 0) + row_offset) == 1)
+    previous = np.zeros_like(holding)
+    previous[:, 1:] = holding[:, :-1]
+    entries = holding & ~previous
+    exits = ~holding & previous
+
+    # 第k笔交易的开仓价、平仓价（未平仓为NaN）
+    trade_no = np.cumsum(entries, axis=1, dtype=np.int32)
+    max_trades = int(trade_no[:, -1].max())
+    entry_price = np.full((n_sets, max_trades), np.nan)
+    exit_price = np.full((n_sets, max_trades), np.nan)
+    rows, cols = np.nonzero(entries)
+    entry_price[rows, trade_no[rows, cols] - 1] = close[cols]
+    rows, cols = np.nonzero(exits)
+    exit_price[rows, trade_no[rows, cols] - 1] = close[cols]
+
+    # 逐笔递推现金（对所有参数组同时计算，运算顺序与 simple_backtest 相同）
+    # 状态表：第0列为初始状态，第2k-1列为持有第k笔，第2k列为第k笔平仓后
+    cash_table = np.empty((n_sets, 2 * max_trades + 1))
+    shares_table = np.zeros((n_sets, 2 * max_trades + 1))
+    cash = np.full(n_sets, float(initial_capital))
+    cash_table[:, 0] = cash
+    wins = np.zeros(n_sets, dtype=int)
+    round_trips = np.zeros(n_sets, dtype=int)
+    trades_count = np.zeros(n_sets, dtype=int)
+    for k in range(max_trades):
+        opened = ~np.isnan(entry_price[:, k])
+        price = np.where(opened, entry_price[:, k], 1.0)
+        qty = np.where(opened, np.floor_divide(cash, price * (1 + commission)), 0.0)
+        cost = qty * price * (1 + commission)
+        cash = cash - cost
+        cash_table[:, 2 * k + 1] = cash
+        shares_table[:, 2 * k + 1] = qty
+        closed = ~np.isnan(exit_price[:, k])
+        proceeds = np.where(closed, qty * np.where(closed, exit_price[:, k], 0.0) * (1 - commission), 0.0)
+        cash = cash + proceeds
+        cash_table[:, 2 * k + 2] = cash
+        filled = qty > 0
+        round_trip = filled & closed
+        trades_count += filled.astype(int) + round_trip
+        round_trips += round_trip
+        wins += round_trip & (proceeds > cost)
+
+    state = (2 * trade_no - holding) + np.arange(n_sets, dtype=np.int64)[:, None] * (2 * max_trades + 1)
+    bar_shares = np.take(shares_table, state)
+    equity = np.take(cash_table, state) + bar_shares * close
+    final_value = equity[:, -1]
+    return {
+        'equity': equity,
+        'shares': bar_shares,
+        'final_value': final_value,
+        'total_return': (final_value - initial_capital) / initial_capital,
+        'trades_count': trades_count,
+        'round_trips': round_trips,
+        'win_rate': np.divide(wins, round_trips, out=np.zeros(n_sets), where=round_trips > 0),
+    }
+
+
+def batch_performance(equity: np.ndarray, total_return: np.ndarray, risk_free_rate: float = 0.03) -> Dict[str, np.ndarray]:
+    """
+    批量绩效指标（口径与 evaluate_strategy_performance 一致）
+    :param equity: 权益曲线 (P, T)
+    :param total_return: 总收益率 (P,)
+    :param risk_free_rate: 无风险利率
+    :return: {'returns', 'annual_return', 'volatility', 'sharpe_ratio', 'max_drawdown', 'calmar_ratio'}
+    """
+    returns = np.zeros_like(equity)
+    returns[:, 1:] = equity[:, 1:] / equity[:, :-1] - 1
+    n_bars = equity.shape[1]
+    annual_return = (1 + total_return) ** (TRADING_DAYS / n_bars) - 1
+    volatility = returns.std(axis=1, ddof=1) * np.sqrt(TRADING_DAYS) if n_bars > 1 else np.zeros(len(equity))
+    sharpe_ratio = np.divide(annual_return - risk_free_rate, volatility,
+                             out=np.zeros(len(equity)), where=volatility > 0)
+    cumulative = np.cumprod(1 + returns, axis=1)
+    peak = np.maximum.accumulate(cumulative, axis=1)
+    max_drawdown = ((cumulative - peak) / peak).min(axis=1)
+    calmar_ratio = np.divide(annual_return, np.abs(max_drawdown),
+                             out=np.zeros(len(equity)), where=max_drawdown != 0)
+    return {
+        'returns': returns,
+        'annual_return': annual_return,
+        'volatility': volatility,
+        'sharpe_ratio': sharpe_ratio,
+        'max_drawdown': max_drawdown,
+        'calmar_ratio': calmar_ratio,
+    }
+
+
+# ============ 批量参数扫描 ============
+def vectorized_parameter_sweep(df: pd.DataFrame, strategy: str, param_sets: List[Dict],
+                               optimization_metric: str = 'sharpe_ratio', initial_capital: float = 100000,
+                               commission: float = 0.001, risk_free_rate: float = 0.03) -> Dict:
+    """
+    一次性回测一组参数
+    :param df: 价格数据（含 close 或 收盘 列）
+    :param strategy: 策略名称，见 BATCH_SIGNAL_BUILDERS
+    :param param_sets: 参数字典列表
+    :param optimization_metric: 排序指标（total_return / annual_return / volatility / sharpe_ratio /
+                                max_drawdown / calmar_ratio / win_rate）
+    :param initial_capital: 初始资金
+    :param commission: 手续费率
+    :param risk_free_rate: 无风险利率
+    :return: 按参数组顺序的结果列表 [{'params', 'score', 'performance'}]
+    """
+    if strategy not in BATCH_SIGNAL_BUILDERS:
+        raise ValueError(f"不支持向量化回测的策略: {strategy}，可选: {', '.join(BATCH_SIGNAL_BUILDERS)}")
+    names, builder = BATCH_SIGNAL_BUILDERS[strategy]
+    close = _close_array(df)
+    signals = builder(close, [tuple(params[name] for name in names) for params in param_sets])
+    backtest = batch_backtest(close, signals, initial_capital, commission)
+    metrics = batch_performance(backtest['equity'], backtest['total_return'], risk_free_rate)
+    metrics.update(total_return=backtest['total_return'], win_rate=backtest['win_rate'])
+    if optimization_metric not in metrics or optimization_metric == 'returns':
+        raise ValueError(f"不支持的优化指标: {optimization_metric}")
+    logger.info(f"[Strategy]向量化回测完成: {strategy}，参数组 {len(param_sets)} 个，K线 {len(close)} 根")
+
+    results = []
+    for i, params in enumerate(param_sets):
+        results.append({
+            'params': params,
+            'score': float(metrics[optimization_metric][i]),
+            'performance': {
+                'return_metrics': {key: float(metrics[key][i]) for key in
+                                   ('total_return', 'annual_return', 'volatility', 'sharpe_ratio', 'calmar_ratio')},
+                'risk_metrics': {'max_drawdown': float(metrics['max_drawdown'][i])},
+                'trading_metrics': {'total_trades': int(backtest['trades_count'][i]),
+                                    'win_rate': float(backtest['win_rate'][i])},
+                'final_value': float(backtest['final_value'][i]),
+            },
+        })
+    return results
@@ -0,0 +1,210 @@
+# app/services/stream/stream_service.py
+"""
+实时推送服务
+一个进程内的推送中心替代N个轮询方：
+- 行情：监听实时行情快照的每次刷新，只向订阅了相关代码的客户端推送发生变化的字段
+- 信号：监听实时入口（事件监控、publish=True 的信号生成）发布的新信号，按代码推送给订阅方
+快照刷新和信号生成发生在工作线程，推送通过 call_soon_threadsafe 投递到各连接所在的事件循环
+"""
+import asyncio
+import json
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+from core.logger import logger
+from common.utils import safe_convert_to_dict
+from app.services.signals.signal_service import add_signal_listener, remove_signal_listener
+
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "256"))
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+# 读取初始行情期间快照被刷新时的重读次数
+INITIAL_QUOTES_RETRIES = 3
+QUOTE_CODE_COLUMN = '代码'
+
+
+def normalize_symbol(symbol) -> str:
+    """统一代码格式：000001.SZ / 000001 -> 000001"""
+    return str(symbol).split('.')[0].strip()
+
+
+def parse_symbols(symbols) -> Set[str]:
+    """解析订阅代码（逗号分隔字符串或列表）"""
+    if not symbols:
+        return set()
+    items = symbols.split(',') if isinstance(symbols, str) else symbols
+    return {normalize_symbol(item) for item in items if str(item).strip()}
+
+
+def encode_message(message: Dict) -> str:
+    """序列化推送消息（信号中的时间戳等对象转为字符串）"""
+    return json.dumps(message, ensure_ascii=False, default=str)
+
+
+class Subscription:
+    """单个客户端连接的订阅状态"""
+    def __init__(self, loop: asyncio.AbstractEventLoop, symbols: Set[str], queue_size: int = STREAM_QUEUE_SIZE):
+        self.loop = loop
+        self.symbols = symbols
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        # 已推送给该客户端的最新行情，用于计算字段级变化
+        self.last_quotes: Dict[str, Dict] = {}
+        self.dropped = 0
+
+    def offer(self, message: Dict) -> None:
+        """投递消息（在事件循环线程中执行），客户端消费过慢时丢弃最旧的消息"""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    async def next_message(self, timeout: Optional[float] = None) -> Optional[Dict]:
+        """等待下一条消息，超时返回None"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class StreamHub:
+    """
+    推送中心：管理订阅，把行情变化和新信号分发给订阅方
+    """
+    def __init__(self, snapshot=None):
+        """
+        :param snapshot: 实时行情快照（QuoteSnapshot），为空时使用 akshare 数据源的共享快照
+        """
+        self._snapshot = snapshot
+        self._subscriptions: List[Subscription] = []
+        # 可重入：首次读取快照会同步刷新，并在同一线程内触发 _on_quotes
+        self._lock = threading.RLock()
+        self._attached = False
+
+    @property
+    def snapshot(self):
+        if self._snapshot is None:
+            from data_providers.akshare import realtime_snapshot
+            self._snapshot = realtime_snapshot
+        return self._snapshot
+
+    # ---------- 订阅管理 ----------
+
+    def subscribe(self, symbols, loop: Optional[asyncio.AbstractEventLoop] = None) -> Subscription:
+        """
+        新建订阅（在事件循环中调用）
+        :param symbols: 订阅代码
+        :param loop: 连接所在的事件循环，默认当前运行的循环
+        """
+        subscription = Subscription(loop or asyncio.get_running_loop(), parse_symbols(symbols))
+        with self._lock:
+            self._subscriptions.append(subscription)
+            if not self._attached:
+                self.snapshot.add_listener(self._on_quotes)
+                add_signal_listener(self._on_signals)
+                self._attached = True
+        logger.info(f"[Stream]新订阅，代码数: {len(subscription.symbols)}，当前连接数: {len(self._subscriptions)}")
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """取消订阅，最后一个连接断开时停止监听"""
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+            if not self._subscriptions and self._attached:
+                self.snapshot.remove_listener(self._on_quotes)
+                remove_signal_listener(self._on_signals)
+                self._attached = False
+        logger.info(f"[Stream]订阅已关闭，当前连接数: {len(self._subscriptions)}，丢弃消息数: {subscription.dropped}")
+
+    def update_symbols(self, subscription: Subscription, add: Iterable = (), remove: Iterable = ()) -> Set[str]:
+        """
+        增减订阅代码（add / remove 为逗号分隔字符串或列表）
+        :return: 本次新增的代码（此前未订阅）
+        """
+        with self._lock:
+            removed = parse_symbols(remove)
+            added = parse_symbols(add) - subscription.symbols - removed
+            subscription.symbols = (subscription.symbols | added) - removed
+            for code in removed:
+                subscription.last_quotes.pop(code, None)
+            return added
+
+    # ---------- 行情 ----------
+
+    def send_initial_quotes(self, subscription: Subscription, symbols: Optional[Iterable] = None) -> None:
+        """
+        推送代码的当前完整行情（阻塞调用，首次会触发快照加载，应在线程池中执行）
+        消息：{'type': 'quotes', 'version', 'full': True, 'data': {代码: 行情}}
+        行情在锁外读取（可能同步下载），锁内确认期间快照未刷新后再投递，
+        保证客户端先收到完整行情、再收到之后的增量；刷新过则重读
+        :param subscription: 订阅
+        :param symbols: 只推送这些代码（如新增的订阅），默认推送全部订阅代码
+        """
+        codes = sorted(parse_symbols(symbols) if symbols is not None else subscription.symbols)
+        if not codes:
+            return
+        for _ in range(INITIAL_QUOTES_RETRIES):
+            version = self.snapshot.version
+            frame = self.snapshot.get_frame(codes)
+            with self._lock:
+                if self.snapshot.version == version:
+                    self._offer_full(subscription, version, frame)
+                    return
+        # 快照持续刷新：在锁内读取，此时快照已加载，只是内存查找
+        with self._lock:
+            self._offer_full(subscription, self.snapshot.version, self.snapshot.get_frame(codes))
+
+    def _offer_full(self, subscription: Subscription, version: int, frame) -> None:
+        """投递完整行情并记为已推送（调用方持有锁）；读取期间被取消订阅的代码不再推送"""
+        rows = safe_convert_to_dict(frame)
+        quotes = {str(row[QUOTE_CODE_COLUMN]): row for row in rows
+                  if str(row[QUOTE_CODE_COLUMN]) in subscription.symbols}
+        subscription.last_quotes.update(quotes)
+        message = {'type': 'quotes', 'version': version, 'full': True, 'data': quotes}
+        subscription.loop.call_soon_threadsafe(subscription.offer, message)
+
+    def _on_quotes(self, version: int, changed: Set[str]) -> None:
+        """快照刷新回调（在刷新线程中执行）：计算每个订阅方的字段级变化并投递"""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+            interested = set().union(*(sub.symbols for sub in subscriptions)) & changed if subscriptions else set()
+            if not interested:
+                return
+            rows = safe_convert_to_dict(self.snapshot.get_frame(sorted(interested)))
+            quotes = {str(row[QUOTE_CODE_COLUMN]): row for row in rows}
+
+            for subscription in subscriptions:
+                delta = {}
+                for code in subscription.symbols & interested:
+                    row = quotes.get(code)
+                    if row is None:
+                        continue
+                    previous = subscription.last_quotes.get(code, {})
+                    fields = {key: value for key, value in row.items() if previous.get(key) != value}
+                    if fields:
+                        delta[code] = fields
+                        subscription.last_quotes[code] = row
+                if delta:
+                    message = {'type': 'quotes', 'version': version, 'full': False, 'data': delta}
+                    subscription.loop.call_soon_threadsafe(subscription.offer, message)
+
+    # ---------- 信号 ----------
+
+    def _on_signals(self, signal_kind: str, signals: List[Dict]) -> None:
+        """信号生成回调（在生成信号的线程中执行）：按代码分发给订阅方"""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        if not subscriptions:
+            return
+        by_symbol: Dict[str, List[Dict]] = {}
+        for signal in signals:
+            by_symbol.setdefault(normalize_symbol(signal.get('symbol', '')), []).append(signal)
+        for subscription in subscriptions:
+            matched = [signal for code in subscription.symbols & by_symbol.keys() for signal in by_symbol[code]]
+            if matched:
+                message = {'type': 'signals', 'kind': signal_kind, 'data': matched}
+                subscription.loop.call_soon_threadsafe(subscription.offer, message)
+
+
+# 进程内共享的推送中心
+stream_hub = StreamHub()
@@ -0,0 +1,97 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+import threading
+import time
+import numpy as np
+import pandas as pd
+from app.services.strategy.optimizer import (
+    EvaluationPool, iter_param_combinations, iter_optimization_results, count_param_combinations
+)
+from app.services.strategy import optimizer
+
+def build_price_frame(rows: int = 2500) -> pd.DataFrame:
+    """构造10年日线数据"""
+    rng = np.random.default_rng(11)
+    close = 10 * np.exp(np.cumsum(rng.normal(0.0002, 0.02, rows)))
+    return pd.DataFrame({
+        'date': pd.bdate_range('2015-01-01', periods=rows).strftime('%Y-%m-%d'),
+        'close': close,
+        'volume': rng.integers(10_000, 1_000_000, rows),
+    })
+
+def ma_crossover_strategy(df: pd.DataFrame, short_period: int, long_period: int):
+    """均线交叉策略（逐行循环，模拟真实策略函数的计算量）"""
+    close = df['close']
+    short_ma = close.rolling(short_period).mean()
+    long_ma = close.rolling(long_period).mean()
+    position = (short_ma > long_ma).astype(int).to_numpy()
+    equity, cash, shares = [], 100000.0, 0
+    prices = close.to_numpy()
+    for price, pos in zip(prices, position):
+        if pos == 1 and shares == 0:
+            shares = int(cash // price)
+            cash -= shares * price
+        elif pos == 0 and shares > 0:
+            cash += shares * price
+            shares = 0
+        equity.append(cash + shares * price)
+    return {"status": "success", "data": np.asarray(equity)}
+
+def sharpe_evaluator(df, strategy_func, params, metric):
+    """评估函数：夏普比率"""
+    result = strategy_func(df, **params)
+    if result.get('status') != 'success':
+        return None
+    equity = result['data']
+    returns = np.diff(equity) / equity[:-1]
+    sharpe = returns.mean() / returns.std() * np.sqrt(252) if returns.std() > 0 else 0.0
+    return float(sharpe), {'return_metrics': {'sharpe_ratio': float(sharpe)}}
+
+def worker_shares_memory():
+    """在工作进程中检查价格列是否直接引用共享内存段（而不是进程私有副本）"""
+    state = optimizer._worker_state
+    segment = np.ndarray((state['shm'].size,), dtype=np.uint8, buffer=state['shm'].buf)
+    return {col: bool(np.shares_memory(state['df'][col].to_numpy(), segment)) for col in ('close', 'volume')}
+
+def run(df, param_ranges, n_jobs, cancel_event=None):
+    start = time.perf_counter()
+    results = list(iter_optimization_results(
+        df, ma_crossover_strategy, sharpe_evaluator,
+        iter_param_combinations(param_ranges), 'sharpe_ratio', n_jobs=n_jobs, cancel_event=cancel_event
+    ))
+    return results, time.perf_counter() - start
+
+def benchmark_optimizer():
+    df = build_price_frame()
+    param_ranges = {'short_period': list(range(3, 30)), 'long_period': list(range(20, 120, 5))}
+    total = count_param_combinations(param_ranges)
+    print(f"=== 参数组合 {total} 个，数据 {len(df)} 行，CPU {os.cpu_count()} 核 ===")
+
+    serial, serial_time = run(df, param_ranges, n_jobs=1)
+    parallel, parallel_time = run(df, param_ranges, n_jobs=max(2, os.cpu_count()))
+    by_index = lambda results: sorted((r['index'], r['score']) for r in results)
+    print(f"串行: {serial_time:.2f}s, 并行: {parallel_time:.2f}s (加速 {serial_time / parallel_time:.1f}x)")
+    print(f"结果一致: {by_index(serial) == by_index(parallel)}")
+    best = max(parallel, key=lambda r: (r['score'], -r['index']))
+    print(f"最佳参数: {best['params']}, 夏普: {best['score']:.4f}")
+
+    print("\n=== 共享内存 ===")
+    with EvaluationPool(df, ma_crossover_strategy, sharpe_evaluator, 'sharpe_ratio', n_jobs=2) as pool:
+        print(f"工作进程价格列与共享内存段共用内存: {pool._ensure_executor().submit(worker_shares_memory).result()}")
+
+    print("\n=== 取消 ===")
+    cancel_event = threading.Event()
+    threading.Timer(0.5, cancel_event.set).start()
+    partial, elapsed = run(df, param_ranges, n_jobs=max(2, os.cpu_count()), cancel_event=cancel_event)
+    print(f"0.5s后取消: 完成 {len(partial)}/{total} 个组合, 返回耗时 {elapsed:.2f}s")
+
+    print("\n=== 大网格惰性抽样 ===")
+    huge = {f'p{i}': list(range(100)) for i in range(6)}
+    start = time.perf_counter()
+    sampled = list(iter_param_combinations(huge, max_iterations=100, seed=1))
+    print(f"网格 {count_param_combinations(huge):.2e} 个组合，抽样100个耗时 {(time.perf_counter() - start) * 1000:.2f} ms")
+
+if __name__ == '__main__':
+    benchmark_optimizer()
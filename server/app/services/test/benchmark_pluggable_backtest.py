@@ -0,0 +1,50 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+import time
+import numpy as np
+import pandas as pd
+from app.services.strategy.strategy_service import pluggable_backtest
+from app.services.strategy.vectorized_backtest import ma_crossover_signal_matrix
+from app.services.risk.risk_manage_service import EquityTracker, calculate_max_drawdown
+
+def build_minute_frame(rows: int) -> pd.DataFrame:
+    """构造分钟线数据和均线交叉信号"""
+    rng = np.random.default_rng(7)
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.002, rows)))
+    return pd.DataFrame({
+        'date': pd.date_range('2024-01-02 09:30', periods=rows, freq='min'),
+        'close': close,
+        'signal': ma_crossover_signal_matrix(close, [(30, 120)])[0],
+    })
+
+def benchmark_pluggable_backtest():
+    print("=== EquityTracker 与 calculate_max_drawdown 对照 ===")
+    values = build_minute_frame(5000)['close'].to_numpy() * 10000
+    tracker = EquityTracker()
+    tracker.update_many(values[:2000])
+    for value in values[2000:]:
+        tracker.update(value)
+    reference = calculate_max_drawdown(list(values))['data']
+    print(f"最大回撤: {tracker.max_drawdown:.6f} / {-reference['max_drawdown']:.6f}, "
+          f"起止: ({tracker.max_drawdown_start}, {tracker.max_drawdown_end}) / "
+          f"({reference['drawdown_start']}, {reference['drawdown_end']})")
+
+    print("\n=== 可插拔回测耗时随K线数量线性增长 ===")
+    config = dict(risk_manager_config={'type': 'basic', 'params': {'max_drawdown': 0.2}},
+                  position_manager_config={'type': 'dynamic'})
+    for rows in (10_000, 50_000, 200_000):
+        frame = build_minute_frame(rows)
+        start = time.perf_counter()
+        result = pluggable_backtest(frame, frame, **config)
+        elapsed = time.perf_counter() - start
+        data = result['data']
+        print(f"{rows:>7} 根: {elapsed:.2f}s, 交易 {data['trades_count']} 笔, "
+              f"最大回撤 {data['drawdown_summary']['max_drawdown']:.2%} "
+              f"({data['drawdown_summary']['max_drawdown_start']} -> {data['drawdown_summary']['max_drawdown_end']})")
+
+if __name__ == '__main__':
+    from core.logger import logger
+    logger.remove()
+    benchmark_pluggable_backtest()
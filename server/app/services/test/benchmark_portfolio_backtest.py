@@ -0,0 +1,113 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+import time
+import numpy as np
+import pandas as pd
+from app.services.strategy.backtest_service import BacktestConfig, EnhancedBacktestService
+from app.services.strategy.portfolio_backtest import build_price_panel, build_signal_panel, simulate_portfolio
+
+def build_universe(n_symbols: int, n_days: int, seed: int = 11):
+    """构造价格宽表（部分标的晚上市、随机停牌）和均线交叉信号宽表"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2014-01-02', periods=n_days)
+    symbols = [f"{600000 + i:06d}.SH" for i in range(n_symbols)]
+    close = 10 * np.exp(np.cumsum(rng.normal(0.0002, 0.02, (n_days, n_symbols)), axis=0))
+    listed = rng.integers(0, n_days // 3, n_symbols) * (rng.random(n_symbols) < 0.3)
+    close[np.arange(n_days)[:, None] < listed] = np.nan
+    close[rng.random((n_days, n_symbols)) < 0.01] = np.nan
+    prices = pd.DataFrame(close, index=dates, columns=symbols)
+    filled = prices.ffill()
+    fast, slow = filled.rolling(20).mean(), filled.rolling(60).mean()
+    above = (fast > slow).astype(int)
+    cross = above.diff().fillna(0)
+    signals = cross.where(cross <= 0, 0.6).where(cross >= 0, -1.0)
+    return prices, signals
+
+def reference_portfolio(prices: np.ndarray, signals: np.ndarray, config: BacktestConfig):
+    """逐日逐标的的参考实现（规则与 simulate_portfolio 相同）"""
+    service = EnhancedBacktestService(config)
+    n_days, n_symbols = prices.shape
+    cash, holdings, last_price = config.initial_capital, {}, {}
+    equity = []
+    for day in range(n_days):
+        for col in range(n_symbols):
+            if np.isfinite(prices[day, col]) and prices[day, col] > 0:
+                last_price[col] = prices[day, col]
+        tradable = [col for col in range(n_symbols) if np.isfinite(prices[day, col]) and prices[day, col] > 0]
+        for col in tradable:
+            if signals[day, col] < 0 and holdings.get(col, 0) > 0:
+                shares = int(holdings[col] * min(-signals[day, col], 1.0))
+                if shares > 0:
+                    amount = shares * prices[day, col]
+                    cash += amount - service._calculate_trading_costs(amount, prices[day, col], 'sell')
+                    holdings[col] -= shares
+        buys = [col for col in tradable if signals[day, col] >= 0.3]
+        if buys and cash > 0:
+            cap = (cash + sum(shares * last_price[col] for col, shares in holdings.items())) * config.max_position_size
+            orders = []
+            for col in buys:
+                price = prices[day, col]
+                target = min(cap * signals[day, col], cap - holdings.get(col, 0) * price)
+                shares = int(np.floor(max(target, 0) / price / 100) * 100)
+                if shares > 0:
+                    amount = shares * price
+                    orders.append((-signals[day, col], col, shares, amount + service._calculate_trading_costs(amount, price, 'buy')))
+            spent = 0.0
+            for _, col, shares, total in sorted(orders, key=lambda order: order[0]):
+                if spent + total > cash:
+                    break
+                spent += total
+                holdings[col] = holdings.get(col, 0) + shares
+            cash -= spent
+        equity.append(cash + sum(shares * last_price[col] for col, shares in holdings.items()))
+    return np.array(equity)
+
+def benchmark_portfolio_backtest():
+    config = BacktestConfig()
+
+    print("=== 与逐日逐标的参考实现对照（40 个标的，500 个交易日）===")
+    prices, signals = build_universe(40, 500)
+    dates, symbols, panel = build_price_panel(prices)
+    signal_panel = build_signal_panel(signals, dates, symbols)
+    result = simulate_portfolio(panel, signal_panel, config.initial_capital, config.trading_cost, config.max_position_size)
+    expected = reference_portfolio(panel, signal_panel, config)
+    print(f"权益曲线最大相对误差: {np.max(np.abs(result['equity'] / expected - 1)):.2e}, "
+          f"成交 {len(result['trades']['day'])} 笔")
+
+    long = prices.stack().rename('close').reset_index().rename(columns={'level_0': 'date', 'level_1': 'symbol'})
+    records = [{'date': d, 'symbol': s, 'action': 'buy' if v > 0 else 'sell', 'strength': abs(v)}
+               for (d, s), v in signals.stack().items() if v != 0]
+    _, _, long_panel = build_price_panel(long)
+    print(f"长表价格面板一致: {np.array_equal(np.nan_to_num(long_panel), np.nan_to_num(panel))}, "
+          f"信号字典面板一致: {np.array_equal(build_signal_panel(records, dates, symbols), signal_panel)}")
+
+    print("\n=== 1000 个标的，10 年日线 ===")
+    prices, signals = build_universe(1000, 2520)
+    start = time.perf_counter()
+    result = EnhancedBacktestService(config).portfolio_backtest(prices, signals)
+    elapsed = time.perf_counter() - start
+    data = result['data']
+    stats = data['trade_statistics']
+    print(f"{result['message']}，耗时 {elapsed:.2f}s")
+    print(f"最大同时持仓 {stats['max_positions_held']} 只，交易成本 {stats['total_trading_costs']:,.0f}，"
+          f"总收益率 {stats['total_return_pct']:.2f}%，最大回撤 {data['performance_metrics']['max_drawdown']:.2%}")
+
+    history = pd.DataFrame(data['portfolio_history'])
+    buys = pd.DataFrame([t for t in data['trades_history'] if t['action'] == 'buy'])
+    fees = buys.groupby('timestamp')['trading_cost'].sum()
+    pre_buy_equity = history.set_index('date')['value'].loc[buys['timestamp']].to_numpy() + fees.loc[buys['timestamp']].to_numpy()
+    _, symbols, panel = build_price_panel(prices)
+    result = simulate_portfolio(panel, build_signal_panel(signals, pd.DatetimeIndex(history['date']), symbols),
+                                config.initial_capital, config.trading_cost, config.max_position_size)
+    trades = result['trades']
+    bought = trades['side'] > 0
+    position_value = result['holdings'][trades['day'][bought], trades['col'][bought]] * trades['price'][bought]
+    print(f"买入后单标的仓位超出上限: {int((position_value > config.max_position_size * pre_buy_equity + 1e-6).sum())} 笔，"
+          f"最低现金: {result['cash'].min():,.2f}")
+
+if __name__ == '__main__':
+    from core.logger import logger
+    logger.remove()
+    benchmark_portfolio_backtest()
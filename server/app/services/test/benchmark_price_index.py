@@ -0,0 +1,85 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+import time
+import numpy as np
+import pandas as pd
+from app.services.events.event_service import EventType, EventSeverity
+from app.services.strategy.price_index import AsOfPriceIndex, MarkToMarketCache
+from app.services.strategy.strategy_service import event_driven_backtest
+
+def build_long_prices(n_symbols: int = 40, n_days: int = 600, seed: int = 5) -> pd.DataFrame:
+    """多标的长表价格（按日期排序，每个标的每日一行，附带少量重复日期行）"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2020-01-01', periods=n_days)
+    frames = [pd.DataFrame({'date': dates, 'symbol': f"S{i}",
+                            'close': 10 * np.exp(np.cumsum(rng.normal(0, 0.02, n_days)))})
+              for i in range(n_symbols)]
+    prices = pd.concat(frames, ignore_index=True)
+    duplicates = prices.sample(n=n_symbols, random_state=seed).assign(close=lambda df: df['close'] * 1.01)
+    return pd.concat([prices, duplicates]).sort_values('date', kind='stable').reset_index(drop=True)
+
+def legacy_price(price_data: pd.DataFrame, symbol, timestamp):
+    """原实现：整表布尔过滤后取最后一行"""
+    mask = price_data['date'] <= timestamp
+    if symbol is not None:
+        mask &= price_data['symbol'] == symbol
+    row = price_data[mask].tail(1)
+    return None if row.empty else row['close'].iloc[0]
+
+def build_events(symbols, dates, count: int, seed: int = 5):
+    rng = np.random.default_rng(seed)
+    events = []
+    for k in range(count):
+        timestamp = dates[rng.integers(0, len(dates))] + pd.Timedelta(hours=int(rng.integers(0, 20)))
+        events.append(dict(event_id=str(k), event_type=EventType.NEWS, symbol=symbols[rng.integers(0, len(symbols))],
+                           timestamp=timestamp.to_pydatetime(), title='新闻', content='', severity=EventSeverity.HIGH,
+                           sentiment_score=float(rng.choice([-0.9, 0.9])), keywords=[], source='benchmark', metadata={}))
+    return events
+
+def benchmark_price_index():
+    prices = build_long_prices()
+    dates = pd.DatetimeIndex(prices['date'].unique())
+    rng = np.random.default_rng(1)
+    queries = [(f"S{rng.integers(0, 42)}", dates[rng.integers(0, len(dates))] - pd.Timedelta(days=int(rng.integers(-3, 3))))
+               for _ in range(300)]
+
+    print("=== as-of 查找与整表过滤一致性 ===")
+    for label, symbol_col in (("按标的", 'symbol'), ("不区分标的", None)):
+        index = AsOfPriceIndex(prices, symbol_col=symbol_col)
+        start = time.perf_counter()
+        expected = [legacy_price(prices, symbol if symbol_col else None, ts) for symbol, ts in queries]
+        legacy_elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        actual = [index.price_at(symbol, ts) for symbol, ts in queries]
+        indexed_elapsed = time.perf_counter() - start
+        mismatches = sum(a != b for a, b in zip(expected, actual))
+        print(f"{label}: {len(queries)} 次查找不一致 {mismatches} 次，整表过滤 {legacy_elapsed * 1000:.0f} ms，"
+              f"索引 {indexed_elapsed * 1000:.1f} ms")
+
+    print("\n=== 持仓估值缓存 ===")
+    index = AsOfPriceIndex(prices)
+    cache = MarkToMarketCache(index)
+    positions = {f"S{i}": 100 * (i + 1) for i in range(0, 40, 3)}
+    mismatches = 0
+    for ts in sorted(ts for _, ts in queries):
+        expected = 1000.0
+        for symbol, shares in positions.items():
+            price = index.price_at(symbol, ts)
+            if price is not None:
+                expected += shares * price
+        mismatches += cache.portfolio_value(1000.0, positions, ts) != expected
+    print(f"{len(queries)} 个时间点估值不一致 {mismatches} 次，缓存命中率 {cache.hits / cache.lookups:.1%}")
+
+    print("\n=== event_driven_backtest ===")
+    events = build_events([f"S{i}" for i in range(40)], dates, 1500)
+    start = time.perf_counter()
+    result = event_driven_backtest(events, prices)
+    print(f"{len(events)} 个事件，{len(prices)} 行价格：{result['message']}，"
+          f"交易 {result['data']['trades_count']} 笔，耗时 {time.perf_counter() - start:.2f}s")
+
+if __name__ == '__main__':
+    from core.logger import logger
+    logger.remove()
+    benchmark_price_index()
@@ -0,0 +1,57 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+import time
+import numpy as np
+import pandas as pd
+from app.services.strategy.backtest_service import EnhancedBacktestService
+
+def build_inputs(days: int = 2500, signals_count: int = 3000):
+    """构造日线数据和带日内时间戳的信号（一半为字符串时间戳）"""
+    rng = np.random.default_rng(3)
+    dates = pd.bdate_range('2015-01-05', periods=days)
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+    price_data = pd.DataFrame({'open': close, 'high': close, 'low': close, 'close': close, 'volume': 1e6},
+                              index=dates)
+    signals = []
+    for k in range(signals_count):
+        ts = dates[rng.integers(0, days)] + pd.Timedelta(hours=int(rng.integers(9, 15)))
+        signals.append({
+            'timestamp': ts.strftime('%Y-%m-%d %H:%M:%S') if k % 2 else ts,
+            'symbol': '000001.SZ',
+            'action': 'buy' if rng.random() < 0.5 else 'sell',
+            'strength': float(rng.uniform(0.3, 1.0)),
+        })
+    return price_data, signals
+
+def legacy_daily_signals(signals_df: pd.DataFrame, date) -> list:
+    """原实现：每个交易日对全部信号做一次日期转换和比较"""
+    signals_dates = pd.to_datetime(signals_df['date']).dt.date
+    target_date = date.date() if hasattr(date, 'date') else date
+    return signals_df[signals_dates == target_date].to_dict('records')
+
+def benchmark_realistic_backtest():
+    price_data, signals = build_inputs()
+    service = EnhancedBacktestService()
+
+    print("=== 按日分桶与逐日扫描一致性 ===")
+    signals_df = pd.DataFrame(signals)
+    signals_df['date'] = pd.to_datetime(signals_df['timestamp']).dt.date
+    by_date = service._index_signals_by_date(signals_df.copy())
+    sample = price_data.index[::10]
+    start = time.perf_counter()
+    legacy = [legacy_daily_signals(signals_df, d) for d in sample]
+    legacy_elapsed = (time.perf_counter() - start) * len(price_data) / len(sample)
+    mismatches = sum(expected != service._get_daily_signals(by_date, d) for expected, d in zip(legacy, sample))
+    print(f"{len(sample)} 个交易日，不一致 {mismatches} 个；逐日扫描全量估计耗时 {legacy_elapsed:.2f}s")
+
+    print(f"\n=== realistic_backtest：{len(price_data)} 个交易日，{len(signals)} 条信号 ===")
+    start = time.perf_counter()
+    result = service.realistic_backtest(price_data, signals)
+    print(f"{result['message']}，耗时 {time.perf_counter() - start:.2f}s")
+
+if __name__ == '__main__':
+    from core.logger import logger
+    logger.remove()
+    benchmark_realistic_backtest()
@@ -0,0 +1,38 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+import time
+import numpy as np
+from app.services.strategy.optimizer import EvaluationPool, count_param_combinations
+from app.services.strategy.search_strategies import SEARCH_STRATEGIES, run_search
+from app.services.test.benchmark_optimizer import build_price_frame, ma_crossover_strategy, sharpe_evaluator
+
+def benchmark_search_strategies(budget: int = 100, seeds=(1, 2, 3)):
+    df = build_price_frame()
+    param_ranges = {'short_period': list(range(3, 60)), 'long_period': list(range(20, 250, 2))}
+    total = count_param_combinations(param_ranges)
+    print(f"=== 参数组合 {total} 个，数据 {len(df)} 行，预算 {budget} 次全量回测 ===")
+
+    with EvaluationPool(df, ma_crossover_strategy, sharpe_evaluator, 'sharpe_ratio', n_jobs=1) as pool:
+        start = time.perf_counter()
+        exhaustive = run_search(pool, param_ranges, search='grid', budget=total)
+        optimum = exhaustive['best']['score']
+        print(f"全网格: 最优夏普 {optimum:.4f} {exhaustive['best']['params']}, 耗时 {time.perf_counter() - start:.1f}s")
+        scores = np.array([r['score'] for r in exhaustive['results']])
+
+        print(f"\n{'策略':<20}{'最佳夏普':>10}{'分位':>8}{'评估次数':>10}{'成本':>8}{'找到最优时':>10}{'耗时':>8}")
+        for name in SEARCH_STRATEGIES:
+            for seed in seeds:
+                start = time.perf_counter()
+                summary = run_search(pool, param_ranges, search=name, budget=budget, seed=seed)
+                best = summary['best']['score']
+                percentile = (scores <= best).mean() * 100
+                print(f"{name:<20}{best:>10.4f}{percentile:>7.1f}%{summary['evaluations']:>10}"
+                      f"{summary['evaluation_cost']:>8.1f}{summary['evaluations_to_best']:>10}"
+                      f"{time.perf_counter() - start:>7.2f}s")
+
+if __name__ == '__main__':
+    from core.logger import logger
+    logger.remove()
+    benchmark_search_strategies()
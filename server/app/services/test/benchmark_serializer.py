@@ -0,0 +1,106 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+import time
+import numpy as np
+import pandas as pd
+from common.utils import (
+    clean_numeric_data, safe_convert_to_dict, safe_convert_to_dict_rowwise, dataframe_to_json_bytes
+)
+
+def build_realtime_snapshot(rows: int = 5000) -> pd.DataFrame:
+    """构造与 stock_zh_a_spot_em 结构相近的实时行情快照（字符串 + 浮点 + 整数，含缺失值）"""
+    rng = np.random.default_rng(42)
+    price = rng.uniform(2, 300, rows).round(2)
+    df = pd.DataFrame({
+        '序号': np.arange(1, rows + 1),
+        '代码': [f'{i:06d}' for i in range(rows)],
+        '名称': [f'股票{i}' for i in range(rows)],
+        '最新价': price,
+        '涨跌幅': rng.normal(0, 3, rows).round(2),
+        '涨跌额': rng.normal(0, 1, rows).round(2),
+        '成交量': rng.integers(1000, 10_000_000, rows),
+        '成交额': rng.uniform(1e6, 1e10, rows).round(1),
+        '振幅': rng.uniform(0, 10, rows).round(2),
+        '最高': (price * 1.02).round(2),
+        '最低': (price * 0.98).round(2),
+        '今开': (price * 1.001).round(2),
+        '昨收': (price * 0.999).round(2),
+        '量比': rng.uniform(0.1, 5, rows).round(2),
+        '换手率': rng.uniform(0, 20, rows).round(2),
+        '市盈率-动态': rng.normal(30, 50, rows).round(2),
+        '市净率': rng.uniform(0.5, 10, rows).round(2),
+        '总市值': rng.uniform(1e9, 1e12, rows).round(0),
+        '流通市值': rng.uniform(1e9, 1e12, rows).round(0),
+        '涨速': rng.normal(0, 0.5, rows).round(2),
+        '5分钟涨跌': rng.normal(0, 0.5, rows).round(2),
+        '60日涨跌幅': rng.normal(0, 15, rows).round(2),
+        '年初至今涨跌幅': rng.normal(0, 25, rows).round(2),
+    })
+    # 停牌股票：价格类字段缺失
+    suspended = rng.random(rows) < 0.02
+    df.loc[suspended, ['最新价', '涨跌幅', '涨跌额', '量比']] = np.nan
+    df.loc[rng.random(rows) < 0.001, '市盈率-动态'] = np.inf
+    return df
+
+def build_history_frame(rows: int = 2500) -> pd.DataFrame:
+    """构造10年日线历史数据（datetime64 日期列 + 数值列）"""
+    rng = np.random.default_rng(7)
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, rows)))
+    return pd.DataFrame({
+        '日期': pd.bdate_range('2015-01-01', periods=rows),
+        '开盘': close * 0.99,
+        '收盘': close,
+        '最高': close * 1.02,
+        '最低': close * 0.98,
+        '成交量': rng.integers(10_000, 1_000_000, rows),
+        '成交额': close * rng.integers(10_000, 1_000_000, rows),
+    })
+
+def build_numeric_frame(rows: int = 2500) -> pd.DataFrame:
+    """构造纯浮点指标结果（单一dtype，含前导NaN）"""
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame(rng.normal(0, 1, (rows, 8)), columns=[f'IND_{i}' for i in range(8)])
+    df.iloc[:20] = np.nan
+    return df
+
+def benchmark(name: str, df: pd.DataFrame, repeat: int = 3):
+    """对比逐行与按列两种实现的输出和耗时"""
+    cleaned = clean_numeric_data(df)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        expected = safe_convert_to_dict_rowwise(cleaned)
+    rowwise_time = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        actual = safe_convert_to_dict(cleaned)
+    columnwise_time = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        payload = dataframe_to_json_bytes(cleaned)
+    bytes_time = (time.perf_counter() - start) / repeat
+
+    identical = expected == actual
+    print(f"=== {name}: {df.shape[0]}行 x {df.shape[1]}列 ===")
+    print(f"  输出一致: {identical}")
+    print(f"  逐行版本: {rowwise_time * 1000:.1f} ms")
+    print(f"  按列版本: {columnwise_time * 1000:.1f} ms (加速 {rowwise_time / columnwise_time:.1f}x)")
+    print(f"  JSON字节: {bytes_time * 1000:.1f} ms ({len(payload) / 1024:.0f} KB)")
+    if not identical:
+        for i, (a, b) in enumerate(zip(expected, actual)):
+            if a != b:
+                print(f"  首个差异行{i}: 逐行={a} 按列={b}")
+                break
+    return identical
+
+if __name__ == '__main__':
+    results = [
+        benchmark("实时行情快照", build_realtime_snapshot()),
+        benchmark("日线历史数据", build_history_frame()),
+        benchmark("纯数值指标", build_numeric_frame()),
+    ]
+    print(f"\n全部一致: {all(results)}")
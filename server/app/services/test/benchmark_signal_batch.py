@@ -0,0 +1,112 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+import time
+import numpy as np
+import pandas as pd
+from app.services.analytics.indicator_service import calculate_indicators_for_rule_configs
+from app.services.signals.data_signals import ParameterizedRuleFactory
+from app.services.signals.signal_batch import SignalBatch, DATA_DRIVEN, EVENT_DRIVEN
+from app.services.signals.signal_service import DataSignalGenerator, UnifiedSignalManager
+from app.services.test.benchmark_signal_dedup import build_signals
+
+DATA_SIGNAL_CONFIG = {
+    'ma_crossover': {'enable': True, 'use_parameterized': True, 'short_period': 5, 'long_period': 20},
+    'rsi': {'enable': True, 'use_parameterized': True, 'period': 14, 'oversold': 30, 'overbought': 70},
+}
+
+def build_price_data(n_days: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, n_days)))
+    return pd.DataFrame({
+        'date': pd.bdate_range('2015-01-05', periods=n_days), 'symbol': '600000.SH',
+        'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close,
+        'volume': rng.integers(1_000_000, 5_000_000, n_days).astype(float),
+    })
+
+def build_generator() -> DataSignalGenerator:
+    generator = DataSignalGenerator()
+    generator.add_signal_rule(ParameterizedRuleFactory.create_rsi_rule(period=14, oversold=30, overbought=70))
+    generator.add_signal_rule(ParameterizedRuleFactory.create_ma_rule(short_period=5, long_period=20))
+    return generator
+
+def as_batch_fields(signal):
+    return (signal['symbol'], signal['signal'], signal['reason'], signal['rule_name'],
+            signal['category'], pd.Timestamp(signal['timestamp']))
+
+def benchmark_signal_batch():
+    print("=== generate_signal_batch 与 generate_signals 对照 ===")
+    price_data = build_price_data(2520, 3)
+    indicators, _ = calculate_indicators_for_rule_configs(price_data, DATA_SIGNAL_CONFIG)
+    generator = build_generator()
+    start = time.perf_counter()
+    signals = generator.generate_signals(price_data, indicators)
+    dict_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    batch = generator.generate_signal_batch(price_data, indicators)
+    batch_elapsed = time.perf_counter() - start
+    restored = batch.to_dicts()
+    same_fields = [as_batch_fields(s) for s in signals] == [as_batch_fields(s) for s in restored]
+    max_error = max((abs(float(s['strength']) - r['strength']) for s, r in zip(signals, restored)), default=0.0)
+    print(f"{len(signals)} 个信号，字段一致: {same_fields}，强度最大误差 {max_error:.1e}，"
+          f"字典 {dict_elapsed * 1000:.0f} ms / 列式 {batch_elapsed * 1000:.0f} ms")
+    roundtrip = SignalBatch.from_dicts(signals, source=DATA_DRIVEN).to_dicts()
+    print(f"from_dicts → to_dicts 往返一致: {[as_batch_fields(s) for s in roundtrip] == [as_batch_fields(s) for s in signals]}")
+
+    print("\n=== merge_signal_batches 与 merge_signals 对照 ===")
+    manager = UnifiedSignalManager()
+    mismatches = 0
+    for seed in range(50):
+        data_signals = [dict(s, signal=1 if s['signal_type'] == 'buy' else -1, reason='数据', rule_name='均线',
+                             category='trend_following') for s in build_signals(150, 4, 60 * 24 * 30, seed)]
+        event_signals = [dict(s, signal=1 if s['signal_type'] == 'buy' else -1, reason='事件', rule_name='新闻',
+                              category='news_sentiment', event_id=str(k))
+                         for k, s in enumerate(build_signals(50, 4, 60 * 24 * 30, seed + 1000))]
+        if seed % 5 == 0:
+            # 没有时间戳的信号两条路径都丢弃
+            for k, signal in enumerate(data_signals[seed % 7::13]):
+                signal['timestamp'] = pd.NaT if k % 2 else None
+        expected = manager.merge_signals(data_signals, event_signals)
+        merged = manager.merge_signal_batches(SignalBatch.from_dicts(data_signals, source=DATA_DRIVEN),
+                                              SignalBatch.from_dicts(event_signals, source=EVENT_DRIVEN))
+        actual = merged.to_dicts()
+        mismatches += ([(s['symbol'], s['direction'], s['strength'], s['type'], pd.Timestamp(s['timestamp'])) for s in expected] !=
+                       [(s['symbol'], s['signal'], s['strength'], s['type'], s['timestamp']) for s in actual])
+    print(f"50 组随机信号（含无时间戳信号）：不一致 {mismatches} 组")
+    batch = SignalBatch.from_dicts([dict(s, timestamp=pd.NaT) for s in data_signals[:3]] + data_signals[3:], source=DATA_DRIVEN)
+    deduplicated = batch.deduplicate(manager.dedup_window)
+    print(f"deduplicate 保留全部 NaT 信号: {int((deduplicated.timestamp == pd.NaT.value).sum()) == 3}")
+
+    print("\n=== 拼接 / 排序 / 过滤（50 万个信号）===")
+    rng = np.random.default_rng(0)
+    n = 500_000
+    chunks = [SignalBatch.from_columns(
+        pd.Timestamp('2020-01-01').value + rng.integers(0, 10**9 * 86400 * 1000, n // 10),
+        [f"{600000 + i:06d}.SH" for i in rng.integers(0, 3000, n // 10)],
+        rng.choice([1, -1], n // 10), rng.random(n // 10), [f"原因{i}" for i in rng.integers(0, 50, n // 10)],
+        rule_name=f"规则{k % 4}", category='trend_following') for k in range(10)]
+    start = time.perf_counter()
+    merged = SignalBatch.concat(chunks)
+    concat_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    ordered = merged.sort()
+    sort_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    selected = ordered.select(direction=1, min_strength=0.6, start='2021-01-01')
+    select_elapsed = time.perf_counter() - start
+    print(f"拼接 {concat_elapsed * 1000:.0f} ms，按时间排序 {sort_elapsed * 1000:.0f} ms，"
+          f"条件过滤 {select_elapsed * 1000:.0f} ms（保留 {len(selected)} 个）")
+
+    print("\n=== 内存 ===")
+    sample = ordered.take(np.arange(100_000))
+    dicts = sample.to_dicts()
+    dict_bytes = sum(sys.getsizeof(s) for s in dicts) + sys.getsizeof(dicts)
+    dict_bytes += sum(sys.getsizeof(s['timestamp']) + sys.getsizeof(s['strength']) for s in dicts)
+    print(f"10 万个信号：字典列表约 {dict_bytes / 1e6:.1f} MB，列式数组 {sample.nbytes / 1e6:.1f} MB "
+          f"（字符串池 {len(sample.symbols)} 个标的、{len(sample.reasons)} 条原因）")
+
+if __name__ == '__main__':
+    from core.logger import logger
+    logger.remove()
+    benchmark_signal_batch()
@@ -0,0 +1,85 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+import time
+import numpy as np
+import pandas as pd
+from app.services.signals.signal_service import UnifiedSignalManager
+
+def legacy_optimize_signals(signals, time_window=pd.Timedelta(days=1)):
+    """原实现：每个信号与所有已保留信号两两比较，每次比较都重新解析时间戳"""
+    optimized = []
+    for signal in signals:
+        should_add = True
+        signal_time = pd.to_datetime(signal['timestamp'])
+        for existing in optimized:
+            existing_time = pd.to_datetime(existing['timestamp'])
+            if (abs(signal_time - existing_time) <= time_window and
+                    signal['signal_type'] == existing['signal_type'] and
+                    signal['symbol'] == existing['symbol']):
+                if signal['strength'] > existing['strength']:
+                    optimized.remove(existing)
+                    break
+                else:
+                    should_add = False
+                    break
+        if should_add:
+            optimized.append(signal)
+    return optimized
+
+def build_signals(count: int, n_symbols: int, span_minutes: int, seed: int, as_string: bool = False):
+    """按时间排序的统一信号（强度取少量离散值以覆盖强度相同的情况）"""
+    rng = np.random.default_rng(seed)
+    times = np.sort(rng.integers(0, span_minutes, count))
+    signals = []
+    for minute in times:
+        timestamp = pd.Timestamp('2024-01-01') + pd.Timedelta(minutes=int(minute))
+        signals.append({
+            'timestamp': timestamp.strftime('%Y-%m-%d %H:%M:%S') if as_string else timestamp,
+            'symbol': f"S{rng.integers(0, n_symbols)}",
+            'signal_type': 'buy' if rng.random() < 0.5 else 'sell',
+            'strength': float(rng.choice([0.3, 0.5, 0.7, 0.9])),
+        })
+    return signals
+
+def benchmark_signal_dedup():
+    manager = UnifiedSignalManager()
+
+    print("=== 与原实现对照 ===")
+    mismatches = 0
+    for seed in range(100):
+        window = pd.Timedelta(hours=1 + seed % 48)
+        signals = build_signals(200, 4, 60 * 24 * 30, seed, as_string=seed % 2 == 1)
+        missing = []
+        if seed % 5 == 0:
+            # 夹杂时间戳缺失（NaT）的信号：不与任何信号去重，全部保留（原实现遇到NaT会报错，只对照其余信号）
+            missing = signals[seed % 7::17]
+            for signal in missing:
+                signal['timestamp'] = pd.NaT
+        expected = legacy_optimize_signals([s for s in signals if s['timestamp'] is not pd.NaT], window)
+        actual = manager._optimize_signals(signals, window)
+        mismatches += ([id(s) for s in expected] != [id(s) for s in actual if s['timestamp'] is not pd.NaT] or
+                       [id(s) for s in missing] != [id(s) for s in actual if s['timestamp'] is pd.NaT])
+    print(f"100 组随机信号（不同时间窗口、字符串/时间戳、含NaT）：不一致 {mismatches} 组")
+
+    print("\n=== 耗时 ===")
+    for count in (1000, 3000):
+        signals = build_signals(count, 200, 60 * 24 * 365, count)
+        start = time.perf_counter()
+        legacy_optimize_signals(signals)
+        legacy_elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        manager._optimize_signals(signals)
+        print(f"{count} 个信号: 原实现 {legacy_elapsed:.2f}s，单趟扫描 {(time.perf_counter() - start) * 1000:.1f} ms")
+    signals = build_signals(100_000, 500, 60 * 24 * 365 * 3, 1)
+    start = time.perf_counter()
+    kept = manager._optimize_signals(signals)
+    print(f"100000 个信号: 单趟扫描 {time.perf_counter() - start:.2f}s，保留 {len(kept)} 个")
+    kept = UnifiedSignalManager(dedup_window='30min')._optimize_signals(signals)
+    print(f"30分钟窗口保留 {len(kept)} 个")
+
+if __name__ == '__main__':
+    from core.logger import logger
+    logger.remove()
+    benchmark_signal_dedup()
@@ -0,0 +1,83 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from app.services.events.event_service import EventType, EventSeverity, MarketEvent
+from app.services.strategy.strategy_service import event_driven_backtest
+from app.services.strategy.streaming_backtest import (
+    StreamingBacktest, ma_crossover_bar_rule, streaming_backtest
+)
+from app.services.strategy.vectorized_backtest import ma_crossover_signal_matrix
+from app.services.test.benchmark_price_index import build_events, build_long_prices
+
+def symbol_bars(symbol: str, n_days: int, seed: int):
+    """单个标的的K线生成器（逐根生成，不预先构造整段数据）"""
+    rng = np.random.default_rng(seed)
+    price = 10.0
+    for date in pd.bdate_range('2010-01-04', periods=n_days):
+        price *= np.exp(rng.normal(0, 0.02))
+        yield {'date': date, 'symbol': symbol, 'close': price}
+
+def news_events(symbols, n_days: int, per_day: int, seed: int):
+    """按时间顺序生成新闻事件"""
+    rng = np.random.default_rng(seed)
+    count = 0
+    for date in pd.bdate_range('2010-01-04', periods=n_days):
+        for hour in sorted(rng.integers(0, 24, per_day)):
+            count += 1
+            yield MarketEvent(event_id=str(count), event_type=EventType.NEWS, symbol=symbols[rng.integers(0, len(symbols))],
+                              timestamp=(date + pd.Timedelta(hours=int(hour))).to_pydatetime(), title='新闻', content='',
+                              severity=EventSeverity.HIGH, sentiment_score=float(rng.choice([-0.9, 0.9])),
+                              keywords=[], source='benchmark', metadata={})
+
+def benchmark_streaming_backtest():
+    print("=== 与 event_driven_backtest 对照 ===")
+    prices = build_long_prices()
+    dates = pd.DatetimeIndex(prices['date'].unique())
+    events = sorted(build_events([f"S{i}" for i in range(40)], dates, 1500), key=lambda event: event['timestamp'])
+    expected = event_driven_backtest(events, prices)['data']
+    actual = streaming_backtest(prices, events)['data']
+    fields = ('date', 'symbol', 'action', 'price', 'shares', 'value', 'event_id')
+    same_trades = [{k: t[k] for k in fields} for t in expected['trades']] == [{k: t[k] for k in fields} for t in actual['trades']]
+    print(f"交易一致: {same_trades} ({actual['trades_count']} 笔), 期末价值: {actual['final_value']:.6f} / {expected['final_value']:.6f}, "
+          f"估值时间点: {len(actual['portfolio_values'])} (原 {len(expected['portfolio_values'])})")
+
+    print("\n=== K线均线规则与向量化信号对照 ===")
+    bars = list(symbol_bars('S0', 2000, 1))
+    engine = StreamingBacktest(bar_rules=[ma_crossover_bar_rule(5, 20)], signal_rules=[])
+    rule = ma_crossover_bar_rule(5, 20)
+    streamed = np.array([(rule(bar) or {'signal': 0})['signal'] for bar in bars])
+    reference = ma_crossover_signal_matrix(np.array([bar['close'] for bar in bars]), [(5, 20)])[0]
+    print(f"信号一致: {np.array_equal(streamed, reference)}，信号数 {np.count_nonzero(streamed)}")
+    engine.run([iter(bars)])
+    print(f"纯K线回测: 交易 {len(engine.trades)} 笔，期末价值 {engine.final_value():.2f}")
+
+    print("\n=== 生成器输入：100 个标的 × 10 年日线 + 每日 10 条新闻 ===")
+    symbols = [f"{600000 + i:06d}.SH" for i in range(100)]
+    start = time.perf_counter()
+    result = streaming_backtest([symbol_bars(symbol, 2520, i) for i, symbol in enumerate(symbols)],
+                                news_events(symbols, 2520, 10, 7),
+                                bar_rules=[ma_crossover_bar_rule(10, 60)], signal_weights={'data_driven': 0.5},
+                                keep_history=False)
+    data = result['data']
+    print(f"K线 {data['bars_processed']} 根，事件 {data['events_processed']} 个，交易 {data['trades_count']} 笔，"
+          f"耗时 {time.perf_counter() - start:.1f}s，最大回撤 {data['drawdown_summary']['max_drawdown']:.2%}")
+
+    print("\n=== 内存峰值随回放长度（20 个标的，每日 10 条新闻，不保留组合价值序列）===")
+    symbols = symbols[:20]
+    for n_days in (500, 2000):
+        tracemalloc.start()
+        result = streaming_backtest([symbol_bars(symbol, n_days, i) for i, symbol in enumerate(symbols)],
+                                    news_events(symbols, n_days, 10, 7), keep_history=False)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{n_days} 个交易日: 内存峰值 {peak / 1e6:.1f} MB（其中交易记录 {result['data']['trades_count']} 笔）")
+
+if __name__ == '__main__':
+    from core.logger import logger
+    logger.remove()
+    benchmark_streaming_backtest()
@@ -0,0 +1,88 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+import time
+import numpy as np
+import pandas as pd
+from app.services.analytics.indicator_service import calculate_indicators_for_rule_configs
+from app.services.signals.signal_service import build_data_signal_generator
+from app.services.signals.universe_scan import iter_universe_scan, required_history
+
+DATA_SIGNAL_CONFIG = {
+    'ma_crossover': {'enable': True, 'use_parameterized': True, 'short_period': 5, 'long_period': 20},
+    'rsi': {'enable': True, 'use_parameterized': True, 'period': 14, 'oversold': 30, 'overbought': 70},
+}
+
+def build_universe(n_symbols: int, n_days: int, seed: int):
+    """合成股票池：中文列名的日线历史，附带次新股（K线不足回看窗口）和停牌股（最后一根K线较早）"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end='2024-06-28', periods=n_days)
+    frames = []
+    for i in range(n_symbols):
+        end = n_days if i % 37 else n_days - 5
+        length = end if i % 50 else int(rng.integers(30, 100))
+        close = 10 * np.exp(np.cumsum(rng.normal(0, 0.025, length)))
+        frames.append((f"{600000 + i:06d}", pd.DataFrame({
+            '日期': dates[end - length:end].strftime('%Y-%m-%d'), '开盘价': close, '最高价': close * 1.01,
+            '最低价': close * 0.99, '收盘价': close, '成交量': rng.integers(10_000, 500_000, length).astype(float),
+        })))
+    return frames
+
+def reference_scan(frames):
+    """逐只股票按完整历史计算（与 generate_unified_signals_with_configs 的数据信号部分一致），取最后一根K线的买卖信号"""
+    results = {}
+    for symbol, df in frames:
+        generator, _ = build_data_signal_generator(DATA_SIGNAL_CONFIG)
+        df = df.assign(symbol=symbol)
+        indicators, _ = calculate_indicators_for_rule_configs(df, DATA_SIGNAL_CONFIG)
+        last = pd.Timestamp(df['日期'].iloc[-1])
+        results[symbol] = [s for s in generator.generate_signals(df, indicators)
+                           if s['signal'] != 0 and pd.Timestamp(s['timestamp']) == last]
+    return results
+
+def signal_key(signal):
+    return signal['symbol'], signal['signal'], signal['reason'], signal['rule_name']
+
+def same_signals(expected, actual):
+    """字段一致，强度在 float32 精度内一致"""
+    expected, actual = sorted(expected, key=signal_key), sorted(actual, key=signal_key)
+    return ([signal_key(s) for s in expected] == [signal_key(s) for s in actual] and
+            all(abs(float(e['strength']) - a['strength']) < 1e-6 for e, a in zip(expected, actual)))
+
+def benchmark_universe_scan():
+    print(f"回看K线数: {required_history(DATA_SIGNAL_CONFIG)}（按配置计算的最少预热长度）")
+
+    print("\n=== 与逐只完整历史计算对照（300 只，每只 500 根K线）===")
+    frames = build_universe(300, 500, 1)
+    start = time.perf_counter()
+    expected = reference_scan(frames)
+    reference_elapsed = time.perf_counter() - start
+    for max_workers in (1, 2):
+        timings = {}
+        start = time.perf_counter()
+        results = list(iter_universe_scan(iter(frames), DATA_SIGNAL_CONFIG, max_workers=max_workers, chunk_size=50, timings=timings))
+        elapsed = time.perf_counter() - start
+        actual = {result['symbol']: result['signals'] for result in results}
+        mismatches = sum(not same_signals(expected[symbol], actual.get(symbol, [])) for symbol in expected)
+        with_signals = sum(bool(signals) for signals in actual.values())
+        print(f"{max_workers} 个进程: 结果 {len(results)} 只，不一致 {mismatches} 只，有信号 {with_signals} 只，"
+              f"耗时 {elapsed:.2f}s（逐只 {reference_elapsed:.2f}s），"
+              f"阶段耗时 {', '.join(f'{k}={v:.2f}s' for k, v in timings.items())}")
+
+    print("\n=== 全市场规模（5000 只，每只 250 根K线，单进程）===")
+    frames = build_universe(5000, 250, 2)
+    timings = {}
+    start = time.perf_counter()
+    results = list(iter_universe_scan(iter(frames), DATA_SIGNAL_CONFIG, max_workers=1, timings=timings))
+    print(f"扫描 {len(results)} 只，耗时 {time.perf_counter() - start:.1f}s，"
+          f"阶段耗时 {', '.join(f'{k}={v:.2f}s' for k, v in timings.items())}")
+    start = time.perf_counter()
+    reference_scan(frames[:200])
+    elapsed = time.perf_counter() - start
+    print(f"逐只计算 200 只: {elapsed:.1f}s（按比例 5000 只约 {elapsed * 25:.0f}s）")
+
+if __name__ == '__main__':
+    from core.logger import logger
+    logger.remove()
+    benchmark_universe_scan()
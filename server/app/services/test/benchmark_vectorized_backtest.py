@@ -0,0 +1,76 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+import time
+import numpy as np
+import pandas as pd
+from app.services.strategy.strategy_service import (
+    generate_ma_crossover_signal, generate_ma_crossover_signal_from_indicators, generate_rsi_signal, simple_backtest, optimize_strategy_parameters
+)
+from app.services.strategy.vectorized_backtest import (
+    ma_crossover_signal_matrix, rsi_signal_matrix, batch_backtest, batch_performance
+)
+from app.services.test.benchmark_optimizer import build_price_frame
+
+def check_against_simple_backtest(df, close, signals, label):
+    """逐列与 simple_backtest 比较权益曲线"""
+    batch = batch_backtest(close, signals)
+    mismatches = 0
+    for row in range(len(signals)):
+        frame = pd.DataFrame({'close': close, 'signal': signals[row]})
+        result = simple_backtest(df, frame)['data']
+        same = (np.array_equal(np.asarray(result['portfolio_values']), batch['equity'][row])
+                and result['final_value'] == batch['final_value'][row]
+                and result['trades_count'] == batch['trades_count'][row])
+        mismatches += not same
+    print(f"{label}: {len(signals)} 组参数与 simple_backtest 逐根K线比较，不一致 {mismatches} 组")
+
+def benchmark_vectorized_backtest():
+    df = build_price_frame()
+    close = df['close'].to_numpy()
+
+    print("=== 信号一致性 ===")
+    for short, long in [(5, 20), (10, 60)]:
+        with_ma = df.assign(**{f'MA{p}': df['close'].rolling(p).mean() for p in (short, long)})
+        result = generate_ma_crossover_signal_from_indicators(with_ma, short, long)
+        expected = pd.to_numeric(pd.DataFrame(result['data'])['signal']).to_numpy()
+        print(f"MA({short},{long}) 信号一致: {np.array_equal(expected, ma_crossover_signal_matrix(close, [(short, long)])[0])}")
+    expected = pd.to_numeric(pd.DataFrame(generate_rsi_signal(df, 14, 30, 70)['data'])['signal']).to_numpy()
+    print(f"RSI(14,30,70) 信号一致: {np.array_equal(expected, rsi_signal_matrix(close, [(14, 30, 70)])[0])}")
+
+    print("\n=== 回测一致性 ===")
+    ma_params = [(s, l) for s in range(3, 28) for l in range(30, 130, 5)]
+    check_against_simple_backtest(df, close, ma_crossover_signal_matrix(close, ma_params[::25]), "均线交叉")
+    rsi_params = [(p, o, b) for p in (6, 14, 21) for o in (20, 30) for b in (70, 80)]
+    check_against_simple_backtest(df, close, rsi_signal_matrix(close, rsi_params), "RSI")
+
+    print(f"\n=== 耗时：{len(ma_params)} 组均线参数，{len(df)} 根K线 ===")
+    frame = pd.DataFrame({'close': close, 'signal': ma_crossover_signal_matrix(close, [(5, 20)])[0]})
+    start = time.perf_counter()
+    generate_ma_crossover_signal(df, 5, 20)
+    simple_backtest(df, frame)
+    single = time.perf_counter() - start
+    start = time.perf_counter()
+    signals = ma_crossover_signal_matrix(close, ma_params)
+    batch = batch_backtest(close, signals)
+    metrics = batch_performance(batch['equity'], batch['total_return'])
+    vectorized = time.perf_counter() - start
+    print(f"单组（信号+逐行回测）: {single * 1000:.1f} ms")
+    print(f"向量化 {len(ma_params)} 组（信号+回测+指标）: {vectorized * 1000:.1f} ms")
+    best = int(np.argmax(metrics['sharpe_ratio']))
+    print(f"最佳参数: {ma_params[best]}, 夏普: {metrics['sharpe_ratio'][best]:.4f}, "
+          f"最大回撤: {metrics['max_drawdown'][best]:.2%}")
+
+    print("\n=== optimize_strategy_parameters(search='vectorized') ===")
+    result = optimize_strategy_parameters(
+        df, generate_ma_crossover_signal,
+        {'short_period': list(range(3, 28)), 'long_period': list(range(30, 130, 5))},
+        max_iterations=500, search='vectorized'
+    )
+    print(f"{result['message']}，最佳参数: {result['data']['best_params']}")
+
+if __name__ == '__main__':
+    from core.logger import logger
+    logger.remove()
+    benchmark_vectorized_backtest()
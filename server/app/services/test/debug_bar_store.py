@@ -0,0 +1,141 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from data_providers.bar_store import BarStore
+
+class FakeClock:
+    """可手动推进的时钟"""
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+class FakeHistory:
+    """模拟 ak.stock_zh_a_hist：按日期范围返回K线，记录每次请求的范围"""
+    def __init__(self, end: str):
+        # 先生成固定的完整序列再截断，保证不同 end 下的历史K线相同
+        dates = pd.bdate_range('2019-06-01', '2023-12-31')
+        rng = np.random.default_rng(1)
+        close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+        self.full = pd.DataFrame({
+            '日期': dates.date,
+            '股票代码': '000001',
+            '开盘': close * 0.99,
+            '收盘': close,
+            '最高': close * 1.02,
+            '最低': close * 0.98,
+            '成交量': rng.integers(10_000, 1_000_000, len(dates)),
+            '换手率': rng.uniform(0, 5, len(dates)),
+        })
+        self.full = self.full[pd.to_datetime(self.full['日期']) <= pd.Timestamp(end)].reset_index(drop=True)
+        self.requests = []
+
+    def __call__(self, start_date: str, end_date: str) -> pd.DataFrame:
+        self.requests.append((start_date, end_date))
+        dates = pd.to_datetime(self.full['日期'])
+        mask = (dates >= pd.Timestamp(start_date)) & (dates <= pd.Timestamp(end_date))
+        return self.full[mask].reset_index(drop=True)
+
+def expected_range(source: FakeHistory, start: str, end: str) -> pd.DataFrame:
+    dates = pd.to_datetime(source.full['日期'])
+    mask = (dates >= pd.Timestamp(start)) & (dates <= pd.Timestamp(end))
+    return source.full[mask].reset_index(drop=True)
+
+def read_repeatedly(root: str, rounds: int, expected_rows: int) -> int:
+    """反复读取全部K线，返回行数不完整或报错的次数（可在子进程中运行）"""
+    store = BarStore(root=root)
+    failures = 0
+    for _ in range(rounds):
+        try:
+            failures += len(store.read('000001', adjust='qfq')) != expected_rows
+        except Exception:
+            failures += 1
+    return failures
+
+def write_repeatedly(root: str, rounds: int, df: pd.DataFrame) -> None:
+    """反复合并写入同一股票（在子进程中运行，与其他进程的写入竞争）"""
+    store = BarStore(root=root, retire_seconds=0)
+    for _ in range(rounds):
+        store.write('000001', df, 'qfq')
+
+def list_partitions(root: str) -> list:
+    return [name for name in os.listdir(os.path.join(root, 'qfq', '000001')) if name not in ('meta.json', '.lock')]
+
+def debug_bar_store():
+    root = tempfile.mkdtemp(prefix='bar_store_')
+    clock = FakeClock()
+    store = BarStore(root=root, sync_seconds=3600, clock=clock)
+
+    print("=== 全量同步 + 区间读取 ===")
+    source = FakeHistory(end='2023-03-31')
+    df = store.get_history('000001', source, start_date='20210104', end_date='20220630')
+    print(f"请求次数: {len(source.requests)} (期望1), 首次请求范围: {source.requests[0]} (期望从19901219开始)")
+    print(f"分区: {sorted(list_partitions(root))}")
+    print(f"与源数据一致: {df.equals(expected_range(source, '20210104', '20220630'))}")
+
+    store.get_history('000001', source, start_date='20200101', end_date='20201231')
+    print(f"同步间隔内再次读取，请求次数: {len(source.requests)} (期望1)")
+
+    print("\n=== 增量同步 ===")
+    newer = FakeHistory(end='2023-06-30')
+    clock.now += 7200
+    df = store.get_history('000001', newer, start_date='20230101', end_date='20230630')
+    print(f"增量请求范围: {newer.requests} (期望从 2023-03-31 开始)")
+    print(f"与源数据一致: {df.equals(expected_range(newer, '20230101', '20230630'))}")
+
+    print("\n=== 除权后复权价格变化 ===")
+    adjusted = FakeHistory(end='2023-07-31')
+    for col in ['开盘', '收盘', '最高', '最低']:
+        adjusted.full[col] = adjusted.full[col] * 0.95
+    clock.now += 7200
+    df = store.get_history('000001', adjusted, start_date='20190101', end_date='20230731')
+    print(f"请求次数: {len(adjusted.requests)} (期望2：增量校验不一致后全量重下)")
+    print(f"与源数据一致: {df.equals(expected_range(adjusted, '20190101', '20230731'))}")
+
+    print("\n=== 重写分区时并发读取（线程 + 子进程）===")
+    rows = len(adjusted.full)
+    stop = threading.Event()
+    # 缩短旧版本保留时间，连续重写时仍不应读到缺失数据
+    writer_store = BarStore(root=root, retire_seconds=0.5)
+
+    def rewrite():
+        while not stop.is_set():
+            writer_store.write('000001', adjusted.full, 'qfq', replace=True)
+            writer_store.write('000001', adjusted.full.tail(30), 'qfq')
+
+    writer = threading.Thread(target=rewrite)
+    writer.start()
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        process_failures = executor.submit(read_repeatedly, root, 200, rows)
+        thread_failures = read_repeatedly(root, 200, rows)
+        process_failures = process_failures.result()
+    stop.set()
+    writer.join()
+    time.sleep(0.6)
+    writer_store.write('000001', adjusted.full.tail(30), 'qfq')
+    partitions = list_partitions(root)
+    meta = store.read_meta('000001')
+    print(f"线程读取失败 {thread_failures} 次，子进程读取失败 {process_failures} 次 (期望均为0)")
+    print(f"剩余分区目录 {len(partitions)} 个 (期望 {len(meta['partitions'])} 个当前版本 + {len(meta['retired'])} 个保留中的旧版本)")
+
+    print("\n=== 多进程并发写入 ===")
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(write_repeatedly, root, 30, adjusted.full.tail(n)) for n in (30, 300)]
+        for future in futures:
+            future.result()
+    meta = store.read_meta('000001')
+    tracked = set(meta['partitions'].values()) | {dirname for dirname, _ in meta['retired']}
+    leaked = set(list_partitions(root)) - tracked
+    print(f"未被元数据记录的分区目录: {len(leaked)} 个 (期望0)")
+    print(f"数据完整: {store.read('000001').equals(expected_range(adjusted, '20190101', '20230731'))}")
+
+if __name__ == '__main__':
+    debug_bar_store()
@@ -0,0 +1,67 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+import threading
+import time
+import numpy as np
+import pandas as pd
+import data_providers
+from app.services.data import data_service
+from data_providers.rate_limit import RateLimiter
+
+class SlowHistoryProvider:
+    """本地假数据源：每次请求固定延迟，记录最大并发数"""
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def get_stock_history(self, source, code, market, start_date=None, end_date=None):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        if code == '999999':
+            raise ValueError("无效代码")
+        dates = pd.bdate_range('2024-01-01', periods=20)
+        close = np.linspace(10, 12, len(dates))
+        return pd.DataFrame({
+            '日期': dates.date, '股票代码': code, '开盘': close, '收盘': close,
+            '最高': close * 1.01, '最低': close * 0.99, '成交量': np.arange(len(dates)) + 1000,
+        })
+
+def debug_batch_history():
+    fake = SlowHistoryProvider()
+    data_providers.provider_registry.register('fake', lambda: fake)
+    codes = [f'{i:06d}' for i in range(1, 41)] + ['999999']
+
+    print("=== 合并长表 ===")
+    start = time.perf_counter()
+    result = data_service.get_batch_stock_history(source='fake', codes=','.join(codes), max_workers=8)
+    elapsed = time.perf_counter() - start
+    data = result['data']
+    print(f"状态: {result['status']}, 行数: {data['total']} (期望800), 股票数: {len(data['symbols'])}, 失败: {data['failed']}")
+    print(f"按请求顺序拼接: {data['symbols'] == codes[:-1]}, 首行: {data['list'][0]}")
+    print(f"耗时: {elapsed:.2f}s (串行约 {len(codes) * fake.delay:.2f}s), 最大并发: {fake.max_active} (上限8)")
+
+    print("\n=== NDJSON 流 ===")
+    chunks = list(data_service.stream_batch_stock_history(source='fake', codes=codes[:3] + ['999999'], max_workers=2))
+    lines = b''.join(chunks).decode('utf-8').splitlines()
+    print(f"块数: {len(chunks)}, 行数: {len(lines)} (期望61), 错误行: {[line for line in lines if 'error' in line]}")
+
+    print("\n=== 令牌桶限速 ===")
+    limiter = RateLimiter(rate=20, burst=1)
+    start = time.perf_counter()
+    threads = [threading.Thread(target=limiter.acquire) for _ in range(21)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    print(f"21次请求 @20/s 耗时: {time.perf_counter() - start:.2f}s (期望约1.0s)")
+
+if __name__ == '__main__':
+    debug_batch_history()
@@ -0,0 +1,85 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+import threading
+import time
+import pandas as pd
+from data_providers.cache import CachedProvider, TTLCache
+
+class FakeProvider:
+    """本地假数据源：记录每个方法的真实调用次数，可模拟慢请求"""
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def _record(self, name):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        time.sleep(self.delay)
+
+    def get_realtime_quotes(self, source, codes=None):
+        self._record('get_realtime_quotes')
+        return pd.DataFrame({'代码': ['000001', '000002'], '最新价': [10.0, 20.0]})
+
+    def get_all_stocks(self, source, market=None):
+        self._record('get_all_stocks')
+        return pd.DataFrame({'code': ['600000'], 'name': ['浦发银行']})
+
+    def get_stock_history(self, source, code, market, start_date=None, end_date=None):
+        self._record('get_stock_history')
+        return pd.DataFrame()
+
+class FakeClock:
+    """可手动推进的时钟"""
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+def debug_ttl_and_lru():
+    """验证TTL过期、LRU淘汰、返回副本"""
+    print("=== TTL / LRU ===")
+    clock = FakeClock()
+    cache = TTLCache(max_entries=2, clock=clock)
+    fake = FakeProvider()
+    provider = CachedProvider(fake, namespace='fake', cache=cache,
+                              policies={'get_realtime_quotes': 5, 'get_all_stocks': 86400})
+
+    provider.get_realtime_quotes(source='fake')
+    df = provider.get_realtime_quotes(source='fake')
+    df['最新价'] = 0  # 修改返回值不应影响缓存
+    print(f"5秒内重复请求，真实调用次数: {fake.calls['get_realtime_quotes']} (期望1)")
+    print(f"缓存值未被污染: {provider.get_realtime_quotes(source='fake')['最新价'].tolist() == [10.0, 20.0]}")
+
+    clock.now += 6
+    provider.get_realtime_quotes(source='fake')
+    print(f"TTL过期后真实调用次数: {fake.calls['get_realtime_quotes']} (期望2)")
+
+    provider.get_all_stocks(source='fake', market='SH')
+    provider.get_all_stocks(source='fake', market='SZ')
+    print(f"超出容量后条目数: {len(cache)} (期望2), 淘汰次数: {cache.stats['evictions']}")
+
+    provider.get_stock_history(source='fake', code='000001', market='SZ')
+    provider.get_stock_history(source='fake', code='000001', market='SZ')
+    print(f"未配置策略的方法不缓存，真实调用次数: {fake.calls['get_stock_history']} (期望2)")
+
+def debug_single_flight():
+    """验证并发未命中只触发一次真实请求"""
+    print("\n=== 单飞去重 ===")
+    cache = TTLCache(max_entries=16)
+    fake = FakeProvider(delay=0.2)
+    provider = CachedProvider(fake, namespace='fake', cache=cache, policies={'get_all_stocks': 86400})
+
+    threads = [threading.Thread(target=provider.get_all_stocks, kwargs={'source': 'fake'}) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    print(f"10个并发请求，真实调用次数: {fake.calls['get_all_stocks']} (期望1), 统计: {cache.stats}")
+
+if __name__ == '__main__':
+    debug_ttl_and_lru()
+    debug_single_flight()
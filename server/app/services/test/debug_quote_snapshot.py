@@ -0,0 +1,84 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+
+import time
+import numpy as np
+import pandas as pd
+from data_providers.quote_snapshot import QuoteSnapshot
+
+class FakeSpotTable:
+    """模拟 ak.stock_zh_a_spot_em：每次调用随机修改少量股票的价格"""
+    def __init__(self, rows: int = 5000, changes_per_call: int = 50):
+        rng = np.random.default_rng(5)
+        self.rng = rng
+        self.changes_per_call = changes_per_call
+        self.calls = 0
+        self.df = pd.DataFrame({
+            '序号': np.arange(1, rows + 1),
+            '代码': [f'{i:06d}' for i in range(rows)],
+            '名称': [f'股票{i}' for i in range(rows)],
+            '最新价': rng.uniform(2, 300, rows).round(2),
+            '涨跌幅': rng.normal(0, 3, rows).round(2),
+            '成交量': rng.integers(1000, 10_000_000, rows).astype(float),
+        })
+        self.df.loc[:9, '最新价'] = np.nan  # 停牌
+
+    def __call__(self) -> pd.DataFrame:
+        if self.calls > 0:
+            idx = self.rng.choice(np.arange(10, len(self.df)), self.changes_per_call, replace=False)
+            self.df.loc[idx, '最新价'] = (self.df.loc[idx, '最新价'] * 1.01).round(2)
+        self.calls += 1
+        return self.df.copy()
+
+def debug_quote_snapshot():
+    spot = FakeSpotTable()
+    snapshot = QuoteSnapshot(loader=spot, refresh_seconds=3600)
+
+    print("=== 按代码读取 ===")
+    df = snapshot.get_frame('004999,000001,999999')
+    print(f"行数: {len(df)} (期望2，未知代码忽略), 代码: {df['代码'].tolist()}")
+    start = time.perf_counter()
+    for _ in range(1000):
+        snapshot.get_frame('000001,000002')
+    print(f"1000次按代码读取: {(time.perf_counter() - start) * 1000:.1f} ms, 下载次数: {spot.calls} (期望1)")
+
+    print("\n=== 增量读取 ===")
+    version = snapshot.version
+    snapshot.refresh()
+    snapshot.refresh()
+    current, changed, full = snapshot.changes_since(version)
+    print(f"版本 {version} -> {current}, 变化行数: {len(changed)} (期望<=100, 停牌NaN不计为变化), 全量: {full}")
+    current, changed, full = snapshot.changes_since(current)
+    print(f"已是最新版本，变化行数: {len(changed)} (期望0)")
+    _, all_changed, _ = snapshot.changes_since(version)
+    watched = all_changed['代码'].tolist()[:3] + ['000000']
+    _, changed, _ = snapshot.changes_since(version, codes=watched)
+    print(f"按代码过滤后的变化行数: {len(changed)} (期望3，停牌股票000000无变化)")
+
+    print("\n=== 版本过旧返回全量 ===")
+    small = QuoteSnapshot(loader=FakeSpotTable(rows=100, changes_per_call=5), refresh_seconds=3600, history=3)
+    small.get_frame()
+    for _ in range(5):
+        small.refresh()
+    current, changed, full = small.changes_since(1)
+    print(f"当前版本 {current}, 全量: {full} (期望True), 行数: {len(changed)}")
+
+    print("\n=== 空闲停止与按需重启 ===")
+    idle_spot = FakeSpotTable(rows=100, changes_per_call=5)
+    idle = QuoteSnapshot(loader=idle_spot, refresh_seconds=0.05, idle_seconds=0.2)
+    idle.get_frame('000001')
+    time.sleep(0.6)
+    calls = idle_spot.calls
+    time.sleep(0.3)
+    print(f"空闲后线程已停止: {idle._thread is None} (期望True), 停止后下载次数不变: {idle_spot.calls == calls}")
+    idle.get_frame('000001')
+    print(f"再次读取后线程已重启: {idle._thread is not None and idle._thread.is_alive()} (期望True), "
+          f"同步刷新: {idle_spot.calls == calls + 1}")
+    idle.add_listener(lambda version, changed: None)
+    time.sleep(0.6)
+    print(f"有监听器时保持刷新: {idle._thread is not None} (期望True)")
+    idle.stop()
+
+if __name__ == '__main__':
+    debug_quote_snapshot()
@@ -1,8 +1,14 @@
 import pandas as pd
 import numpy as np
 import datetime
+import json
 from core.logger import logger
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # common/utils.py
 # 业务单位处理
 def format_number(num_str):
@@ -106,9 +112,108 @@ def clean_numeric_data(df):
             # 将NaN替换为None
             df_copy[col] = df_copy[col].where(pd.notna(df_copy[col]), None)
     return df_copy
+def _convert_cell(value):
+    """
+    单元格转换，判断顺序与逐行版本 safe_convert_to_dict_rowwise 完全一致
+    """
+    if type(value) is str:
+        return value
+    if isinstance(value, (list, tuple, np.ndarray)):
+        try:
+            return [str(item) for item in value] if value else []
+        except (TypeError, ValueError):
+            return str(value)
+    elif pd.isna(value) or value in [np.inf, -np.inf]:
+        return None
+    elif isinstance(value, (np.integer, np.floating)):
+        if np.isfinite(value):
+            return float(value) if isinstance(value, np.floating) else int(value)
+        return None
+    elif isinstance(value, datetime.date):
+        return value.strftime('%Y-%m-%d')
+    elif isinstance(value, datetime.datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    elif hasattr(value, 'strftime'):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+def _convert_float_items(items, invalid):
+    """浮点列：NaN/inf转为None，其余为Python float的字符串形式（与逐行版本一致）"""
+    converted = list(map(str, items))
+    for index in np.flatnonzero(invalid).tolist():
+        converted[index] = None
+    return converted
+def _convert_datetime_series(series):
+    """datetime64列：NaT转为None，其余格式化为'%Y-%m-%d'"""
+    formatted = series.dt.strftime('%Y-%m-%d').tolist()
+    missing = series.isna().tolist()
+    return [None if bad else text for text, bad in zip(formatted, missing)]
+def _convert_column(column_values, source):
+    """
+    按列转换
+    :param column_values: df.values 中的一列（iterrows 实际看到的值）
+    :param source: 原始列（用于获取原始dtype和向量化判断）
+    """
+    kind = column_values.dtype.kind
+    if kind == 'f':
+        return _convert_float_items(column_values.tolist(), ~np.isfinite(column_values))
+    if kind in 'iub':
+        return list(map(str, column_values.tolist()))
+    if kind == 'O':
+        # 混合类型DataFrame交织为object数组时，数值列已是Python标量
+        source_dtype = source.dtype
+        if isinstance(source_dtype, np.dtype):
+            if source_dtype.kind == 'f':
+                return _convert_float_items(column_values.tolist(), ~np.isfinite(source.to_numpy()))
+            if source_dtype.kind in 'iub':
+                return list(map(str, column_values.tolist()))
+            if source_dtype.kind == 'M':
+                return _convert_datetime_series(source)
+        return [value if type(value) is str else _convert_cell(value) for value in column_values.tolist()]
+    series = pd.Series(column_values)
+    if kind == 'M':
+        return _convert_datetime_series(series)
+    return [_convert_cell(value) for value in series]
 def safe_convert_to_dict(df):
     """
     安全地将DataFrame转换为字典列表，确保所有数据都是JSON可序列化的
+    按列向量化转换，输出与逐行版本 safe_convert_to_dict_rowwise 完全一致
+    :param df: 待转换的DataFrame
+    :return: 字典列表
+    """
+    n_rows, n_cols = df.shape
+    if n_rows == 0:
+        return []
+    if n_cols == 0:
+        return [{} for _ in range(n_rows)]
+    # 与 iterrows 相同的交织结果（决定每个单元格的实际类型）
+    values = df.values
+    columns = list(df.columns)
+    converted = [_convert_column(values[:, j], df.iloc[:, j]) for j in range(n_cols)]
+    return [dict(zip(columns, row)) for row in zip(*converted)]
+def dataframe_to_json_bytes(df) -> bytes:
+    """
+    将DataFrame直接序列化为JSON字节串（记录格式，与 safe_convert_to_dict 输出一致）
+    安装了 orjson 时使用 orjson，否则回退到标准库 json
+    :param df: 待转换的DataFrame
+    :return: UTF-8 编码的JSON字节串
+    """
+    records = safe_convert_to_dict(df)
+    if orjson is not None:
+        return orjson.dumps(records, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(records, ensure_ascii=False).encode('utf-8')
+def dataframe_to_ndjson_bytes(df) -> bytes:
+    """
+    将DataFrame序列化为NDJSON字节串（每行一条JSON记录，以换行结尾），用于流式响应
+    :param df: 待转换的DataFrame
+    :return: UTF-8 编码的NDJSON字节串
+    """
+    records = safe_convert_to_dict(df)
+    if orjson is not None:
+        return b''.join(orjson.dumps(record, option=orjson.OPT_NON_STR_KEYS) + b'\n' for record in records)
+    return ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records).encode('utf-8')
+def safe_convert_to_dict_rowwise(df):
+    """
+    安全地将DataFrame转换为字典列表（逐行版本，保留作为参照实现和性能基准）
     :param df: 待转换的DataFrame
     :return: 字典列表
     """
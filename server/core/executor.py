@@ -0,0 +1,110 @@
+# core/executor.py
+"""
+阻塞任务执行器
+路由是 async def，而数据服务层（akshare HTTP 请求 + pandas 处理）是同步阻塞的，
+直接调用会卡住事件循环。这里提供共享线程池，并按数据源限制并发数：
+某个数据源变慢时只占满自己的并发额度，不影响其他数据源和其他请求。
+"""
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, Iterator, Optional
+
+from core.logger import logger
+from data_providers import provider_registry
+
+BLOCKING_POOL_MAX_WORKERS = int(os.getenv("BLOCKING_POOL_MAX_WORKERS", "32"))
+# 各数据源默认并发数，可用环境变量 SOURCE_CONCURRENCY_{NAME} 覆盖
+DEFAULT_SOURCE_CONCURRENCY: Dict[str, int] = {
+    'akshare': 8,
+    'tushare': 4,
+    'juejinquant': 4,
+    'yfinance': 2,
+}
+SOURCE_CONCURRENCY_DEFAULT = int(os.getenv("SOURCE_CONCURRENCY_DEFAULT", "4"))
+# 未注册的数据源名称（如请求参数写错）共用的并发分组，并发数为 SOURCE_CONCURRENCY_DEFAULT
+UNKNOWN_SOURCE_BUCKET = 'default'
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def get_blocking_executor() -> ThreadPoolExecutor:
+    """获取共享线程池（首次使用时创建）"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=BLOCKING_POOL_MAX_WORKERS, thread_name_prefix="blocking")
+                logger.info(f"[Executor]阻塞任务线程池已创建，线程数: {BLOCKING_POOL_MAX_WORKERS}")
+    return _executor
+
+
+def get_source_concurrency(source: str) -> int:
+    """
+    获取数据源的并发上限
+    :param source: 数据源名称
+    """
+    default = DEFAULT_SOURCE_CONCURRENCY.get(source, SOURCE_CONCURRENCY_DEFAULT)
+    return max(1, int(os.getenv(f"SOURCE_CONCURRENCY_{source.upper()}", default)))
+
+
+def _get_semaphore(source: str) -> asyncio.Semaphore:
+    """
+    获取数据源的并发信号量（在事件循环线程内调用，无需加锁）
+    source 来自请求参数，未注册的名称归入同一分组，信号量个数不超过已注册数据源数 + 1
+    """
+    if source not in provider_registry.names():
+        source = UNKNOWN_SOURCE_BUCKET
+    semaphore = _semaphores.get(source)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(get_source_concurrency(source))
+        _semaphores[source] = semaphore
+    return semaphore
+
+
+async def run_blocking(source: str, func: Callable, /, *args, **kwargs):
+    """
+    在共享线程池中执行阻塞函数，并受数据源并发上限约束
+    :param source: 数据源名称（用于并发分组，仅限位置参数，func 的 source 关键字参数可照常传入）
+    :param func: 同步函数
+    :return: 函数返回值
+    """
+    async with _get_semaphore(source):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_blocking_executor(), functools.partial(func, *args, **kwargs))
+
+
+async def iter_blocking(source: str, iterator: Iterator) -> AsyncIterator:
+    """
+    在共享线程池中逐个取出阻塞迭代器的元素（用于流式响应），整个迭代期间占用数据源的一个并发名额
+    迭代提前结束（如客户端断开）时在线程池中关闭迭代器
+    :param source: 数据源名称
+    :param iterator: 同步迭代器（如生成器）
+    """
+    async with _get_semaphore(source):
+        loop = asyncio.get_running_loop()
+        executor = get_blocking_executor()
+        finished = object()
+        try:
+            while True:
+                item = await loop.run_in_executor(executor, next, iterator, finished)
+                if item is finished:
+                    break
+                yield item
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                await loop.run_in_executor(executor, close)
+
+
+def shutdown_blocking_executor() -> None:
+    """关闭共享线程池（应用退出时调用）"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
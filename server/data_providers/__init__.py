@@ -4,6 +4,9 @@ from .akshare import AkShareProvider
 # from .qstock import QStockProvider
 from .yfinance import YFinanceProvider  # 新增
 from .juejinquant import JueJinQuantProvider
+from .cache import CachedProvider, TTLCache, provider_cache, PROVIDER_CACHE_ENABLED
+from .registry import ProviderRegistry
+from .rate_limit import RateLimiter, get_rate_limiter
 
 default_provider = 'akshare'
 
@@ -15,8 +18,16 @@ provider_map = {
     # 'qstock': QStockProvider, # py_mini_racer冲突
 }
 
-def get_data_provider(name: str = default_provider):
-    provider_class = provider_map.get(name)
-    if not provider_class:
-        raise ValueError(f"Unsupported data provider: {name}")
-    return provider_class()
+# 进程内数据源注册表：每个数据源只构造一次，跨请求复用
+provider_registry = ProviderRegistry(cache=provider_cache)
+for _name, _provider_class in provider_map.items():
+    provider_registry.register(_name, _provider_class)
+
+def get_data_provider(name: str = default_provider, use_cache: bool = PROVIDER_CACHE_ENABLED):
+    """
+    获取数据源实例（进程内单例，首次使用时构造）
+    :param name: 数据源名称
+    :param use_cache: 是否启用响应缓存（按方法TTL缓存，见 data_providers/cache.py）
+    :return: 数据源实例（启用缓存时为 CachedProvider 代理）
+    """
+    return provider_registry.get(name, use_cache=use_cache)
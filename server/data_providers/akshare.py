@@ -3,6 +3,21 @@ import akshare as ak
 import pandas as pd
 from core.logger import logger
 from common.debug_utils import debug_data_provider
+from .concept_index import ConceptIndex
+from .bar_store import bar_store, BAR_STORE_ENABLED
+from .rate_limit import get_rate_limiter
+from .quote_snapshot import QuoteSnapshot, REALTIME_SNAPSHOT_ENABLED
+
+# 进程内共享的概念板块索引（板块代码/板块名称双向查找）
+concept_index = ConceptIndex(loader=lambda: ak.stock_board_concept_name_em())
+# 进程内共享的实时行情快照（后台刷新，按代码索引）
+realtime_snapshot = QuoteSnapshot(loader=lambda: ak.stock_zh_a_spot_em())
+
+def _download_history(code, start_date, end_date):
+    """从上游下载前复权日线（受 akshare 限速器控制；本地K线存储和响应缓存命中时不会调用）"""
+    get_rate_limiter('akshare').acquire()
+    return ak.stock_zh_a_hist(symbol=code, period='daily', start_date=start_date, end_date=end_date, adjust='qfq')
+
 class AkShareProvider:
     # 1.1.1 获取所有股票列表（可用）
     def get_all_stocks(self, source, market=None):
@@ -41,12 +56,21 @@ class AkShareProvider:
         :return: DataFrame ['板块代码', '板块名称']
         """
         logger.info(f"[Provider]source={self.__class__.__name__}")
-        # 获取所有概念板块列表
-        concept_df = ak.stock_board_concept_name_em()
+        # 获取所有概念板块列表（共享索引，定期刷新）
+        concept_df = concept_index.get_frame()
         logger.info(f"[Provider]列名: {concept_df.columns.tolist()}")
         logger.info(f"[Provider]行数: {len(concept_df)}")
         return concept_df
 
+    # 1.1.3 辅助：解析概念板块标识符
+    def resolve_concept(self, concept_identifier):
+        """
+        解析概念板块标识符
+        :param concept_identifier: 板块代码或板块名称
+        :return: {'板块代码': ..., '板块名称': ...}，无法识别时返回None
+        """
+        return concept_index.resolve(concept_identifier)
+
     # 1.1.3 获取概念板块成分股（支持板块代码和板块名称）
     def get_concept_constituent_stocks(self, concept_identifier):
         """
@@ -56,21 +80,13 @@ class AkShareProvider:
         """
         logger.info(f"[Provider]source={self.__class__.__name__}, concept_identifier={concept_identifier}")
         
-        # 首先获取所有概念板块列表，用于代码和名称的转换
-        concept_list_df = ak.stock_board_concept_name_em()
-        
-        # 判断输入的是板块代码还是板块名称
-        if concept_identifier in concept_list_df['板块代码'].values:
-            # 输入的是板块代码，需要转换为板块名称
-            concept_name = concept_list_df[concept_list_df['板块代码'] == concept_identifier]['板块名称'].iloc[0]
-            logger.info(f"[Provider]通过板块代码 {concept_identifier} 找到板块名称: {concept_name}")
-        elif concept_identifier in concept_list_df['板块名称'].values:
-            # 输入的是板块名称，直接使用
-            concept_name = concept_identifier
-            logger.info(f"[Provider]直接使用板块名称: {concept_name}")
-        else:
+        # 通过共享板块索引完成代码和名称的转换
+        concept_info = self.resolve_concept(concept_identifier)
+        if concept_info is None:
             # 既不是有效的板块代码也不是有效的板块名称
             raise ValueError(f"无效的概念板块标识符: {concept_identifier}")
+        concept_name = concept_info['板块名称']
+        logger.info(f"[Provider]板块标识符 {concept_identifier} 对应板块名称: {concept_name}")
         
         # 获取概念板块成分股
         df = ak.stock_board_concept_cons_em(symbol=concept_name)
@@ -90,7 +106,15 @@ class AkShareProvider:
         :return: DataFrame
         """
         logger.info(f"[Provider]source={source}, code={code}, market={market}, start_date={start_date}, end_date={end_date}")
-        df = ak.stock_zh_a_hist(symbol=code, period='daily', start_date=start_date, end_date=end_date, adjust='qfq')
+        if BAR_STORE_ENABLED:
+            # 读穿本地K线存储：只增量下载最后一根已存K线之后的数据
+            df = bar_store.get_history(
+                code,
+                fetcher=lambda start, end: _download_history(code, start, end),
+                start_date=start_date, end_date=end_date, adjust='qfq'
+            )
+        else:
+            df = _download_history(code, start_date, end_date)
         
         # 使用环境变量控制的调试输出
         debug_data_provider("AkShare原始数据检查", {
@@ -120,12 +144,29 @@ class AkShareProvider:
         :param codes: 股票代码列表(逗号分隔字符串)，如 "000001,000002" 或 None(获取所有)
         :return: DataFrame
         """
-        logger.info(f"[Provider]sources={source}")
-        df = ak.stock_zh_a_spot_em()
+        logger.info(f"[Provider]sources={source}, codes={codes}")
+        if REALTIME_SNAPSHOT_ENABLED:
+            # 从后台刷新的快照中按代码读取
+            df = realtime_snapshot.get_frame(codes)
+        else:
+            df = ak.stock_zh_a_spot_em()
+            if codes:
+                df = df[df['代码'].astype(str).isin([code.strip() for code in codes.split(',')])]
         logger.info(f"[Provider]列名: {df.columns.tolist()}")
         logger.info(f"[Provider]行数: {len(df)}")
         return df
 
+    # 1.3.2 获取自某版本以来变化的实时行情
+    def get_realtime_quote_changes(self, source, since_version, codes=None):
+        """
+        获取实时行情快照中自 since_version 以来有变化的行（供轮询方增量读取）
+        :param since_version: 客户端已持有的快照版本号
+        :param codes: 股票代码列表(逗号分隔字符串)，为空时不过滤
+        :return: (当前版本号, DataFrame, 是否为全量)
+        """
+        logger.info(f"[Provider]sources={source}, since_version={since_version}, codes={codes}")
+        return realtime_snapshot.changes_since(since_version, codes)
+
     # 2.1 获取宏观数据（GDP、CPI、PPI、PMI）
     def get_macro_gdp_data(self, source):
         """
@@ -0,0 +1,373 @@
+# data_providers/bar_store.py
+"""
+本地日线K线存储（按列存储，按股票代码/年份分区）
+目录结构：{root}/{adjust}/{symbol}/{year}.{版本}/{列序号}.npy + {root}/{adjust}/{symbol}/meta.json
+- 每列一个 .npy 文件，读取时用 mmap 打开，只拷贝请求日期范围内的切片
+- 分区目录写入后不再修改：重写分区时写入新版本目录，原子替换 meta.json 切换到新版本，
+  被替换的旧目录保留 BAR_STORE_RETIRE_SECONDS 秒后才删除，读取方（包括其他进程）始终看到某个完整版本；
+  读取途中旧版本已被删除时按最新元数据重读
+- 写入方对 meta.json 的读-改-写在股票目录的文件锁（fcntl.flock）内进行，多进程写同一股票时不会互相覆盖
+- 增量同步：只下载最后一根已存K线之后的数据，并用重叠的一根K线校验复权价格，
+  前复权价格在除权除息后会整体变化，校验不一致时重新全量下载
+"""
+import datetime
+import json
+from contextlib import contextmanager
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from core.logger import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，退化为只在进程内加锁
+    fcntl = None
+
+BAR_STORE_ENABLED = os.getenv("BAR_STORE_ENABLED", "True").lower() == "true"
+BAR_STORE_DIR = os.getenv(
+    "BAR_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data_store", "bars")
+)
+# 距上次同步不足该秒数时直接读本地，不访问网络
+BAR_STORE_SYNC_SECONDS = int(os.getenv("BAR_STORE_SYNC_SECONDS", "3600"))
+# 被新版本替换的分区目录保留的秒数（留给正在读取旧版本的一方）
+BAR_STORE_RETIRE_SECONDS = float(os.getenv("BAR_STORE_RETIRE_SECONDS", "60"))
+# 首次全量同步的起始日期（默认为A股首个交易日），不再从1970年开始请求
+BAR_STORE_START_DATE = os.getenv("BAR_STORE_START_DATE", "19901219")
+
+DATE_COLUMN = '日期'
+SYMBOL_COLUMN = '股票代码'
+FULL_END_DATE = '20500101'
+# 重叠K线复权校验的相对误差
+ADJUST_TOLERANCE = 1e-6
+# 读取途中分区被替换时的重读次数
+READ_RETRIES = 3
+
+# 取数函数：fetcher(start_date, end_date) -> DataFrame，日期格式 YYYYMMDD
+Fetcher = Callable[[str, str], pd.DataFrame]
+
+
+def _to_day(value) -> np.datetime64:
+    """YYYYMMDD / YYYY-MM-DD / date 转 datetime64[D]"""
+    return np.datetime64(pd.Timestamp(str(value)).date(), 'D')
+
+
+def _day_str(day: np.datetime64) -> str:
+    """datetime64[D] 转 YYYYMMDD"""
+    return str(day).replace('-', '')
+
+
+class BarStore:
+    """
+    本地K线存储
+    """
+    def __init__(self, root: str = BAR_STORE_DIR, sync_seconds: int = BAR_STORE_SYNC_SECONDS,
+                 clock: Callable[[], float] = time.time, retire_seconds: float = BAR_STORE_RETIRE_SECONDS,
+                 start_date: str = BAR_STORE_START_DATE):
+        """
+        :param root: 存储根目录
+        :param sync_seconds: 同步间隔（秒）
+        :param clock: 时钟函数（便于测试时注入）
+        :param retire_seconds: 旧版本分区目录保留的秒数
+        :param start_date: 全量同步的起始日期 YYYYMMDD
+        """
+        self.root = root
+        self.sync_seconds = sync_seconds
+        self.clock = clock
+        self.retire_seconds = retire_seconds
+        self.start_date = start_date
+        self._locks: Dict[tuple, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    # ---------- 路径与元数据 ----------
+
+    def _symbol_dir(self, symbol: str, adjust: str) -> str:
+        return os.path.join(self.root, adjust or 'none', symbol)
+
+    def _lock_for(self, symbol: str, adjust: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault((symbol, adjust), threading.Lock())
+
+    @contextmanager
+    def _file_lock(self, symbol: str, adjust: str):
+        """股票目录下的进程间排他锁（同一进程内不可重入）"""
+        symbol_dir = self._symbol_dir(symbol, adjust)
+        os.makedirs(symbol_dir, exist_ok=True)
+        with open(os.path.join(symbol_dir, '.lock'), 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def read_meta(self, symbol: str, adjust: str = 'qfq') -> Optional[dict]:
+        """读取元数据（列名、dtype、首末日期、同步时间），不存在时返回None"""
+        path = os.path.join(self._symbol_dir(symbol, adjust), 'meta.json')
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_meta(self, symbol: str, adjust: str, meta: dict) -> None:
+        path = os.path.join(self._symbol_dir(symbol, adjust), 'meta.json')
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    # ---------- 写入 ----------
+
+    @staticmethod
+    def _to_columns(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """DataFrame 转为可落盘的列数组（日期转 datetime64[D]，字符串转定长unicode）"""
+        columns = {}
+        for col in df.columns:
+            if col == DATE_COLUMN:
+                columns[col] = pd.to_datetime(df[col]).values.astype('datetime64[D]')
+            elif df[col].dtype == object:
+                columns[col] = df[col].astype(str).to_numpy(dtype=str)
+            else:
+                columns[col] = df[col].to_numpy()
+        return columns
+
+    @staticmethod
+    def _partition_dirs(symbol_dir: str, meta: Optional[dict]) -> Dict[int, str]:
+        """
+        元数据记录的分区：年份 -> 分区目录名
+        旧版本元数据没有 partitions 字段，分区目录名即年份
+        """
+        if not meta:
+            return {}
+        partitions = meta.get('partitions')
+        if partitions is not None:
+            return {int(year): dirname for year, dirname in partitions.items()}
+        first_year = int(meta['first_date'][:4])
+        last_year = int(meta['last_date'][:4])
+        return {year: str(year) for year in range(first_year, last_year + 1)
+                if os.path.isdir(os.path.join(symbol_dir, str(year)))}
+
+    def _load_partition(self, symbol_dir: str, dirname: str, names: List[str], mmap: bool) -> Dict[str, np.ndarray]:
+        """加载分区各列；分区目录已被删除时抛出 FileNotFoundError"""
+        mode = 'r' if mmap else None
+        partition_dir = os.path.join(symbol_dir, dirname)
+        return {name: np.load(os.path.join(partition_dir, f'{i}.npy'), mmap_mode=mode) for i, name in enumerate(names)}
+
+    def _save_partition(self, symbol_dir: str, year: int, names: List[str], columns: Dict[str, np.ndarray]) -> str:
+        """
+        写入一个年份分区的新版本目录（写入 meta.json 之前不会被读取）
+        :return: 分区目录名
+        """
+        dirname = f'{year}.{uuid.uuid4().hex[:12]}'
+        partition_dir = os.path.join(symbol_dir, dirname)
+        os.makedirs(partition_dir)
+        for i, name in enumerate(names):
+            np.save(os.path.join(partition_dir, f'{i}.npy'), columns[name])
+        return dirname
+
+    def write(self, symbol: str, df: pd.DataFrame, adjust: str = 'qfq', replace: bool = False) -> int:
+        """
+        合并写入K线（同一日期以新数据为准），只重写涉及到的年份分区
+        新分区写完后原子替换 meta.json，被替换的旧分区延迟删除，读取方不会看到缺失或写了一半的数据
+        :param symbol: 股票代码
+        :param df: K线数据，必须包含日期列
+        :param adjust: 复权方式
+        :param replace: 是否清空已有数据后写入
+        :return: 写入的K线数量
+        """
+        if df is None or df.empty:
+            return 0
+        with self._file_lock(symbol, adjust):
+            return self._write_locked(symbol, df, adjust, replace)
+
+    def _write_locked(self, symbol: str, df: pd.DataFrame, adjust: str, replace: bool = False) -> int:
+        """write 的实现，调用方需持有该股票的文件锁"""
+        if df is None or df.empty:
+            return 0
+        symbol_dir = self._symbol_dir(symbol, adjust)
+        previous_meta = self.read_meta(symbol, adjust)
+        previous_partitions = self._partition_dirs(symbol_dir, previous_meta)
+        meta = None if replace else previous_meta
+        partitions = {} if replace else dict(previous_partitions)
+        names = meta['columns'] if meta else df.columns.tolist()
+        new_columns = self._to_columns(df.reindex(columns=names))
+        dates = new_columns[DATE_COLUMN]
+        years = dates.astype('datetime64[Y]').astype(int) + 1970
+
+        for year in np.unique(years):
+            year = int(year)
+            in_year = years == year
+            part = {name: values[in_year] for name, values in new_columns.items()}
+            if year in partitions:
+                existing = self._load_partition(symbol_dir, partitions[year], names, mmap=False)
+                keep = ~np.isin(existing[DATE_COLUMN], part[DATE_COLUMN])
+                part = {name: np.concatenate([existing[name][keep], part[name]]) for name in names}
+            order = np.argsort(part[DATE_COLUMN], kind='stable')
+            partitions[year] = self._save_partition(symbol_dir, year, names, {name: values[order] for name, values in part.items()})
+
+        # 被替换的旧分区记入 retired，超过保留时间的在新元数据生效后删除
+        now = time.time()
+        live = set(partitions.values())
+        retired = (previous_meta or {}).get('retired', []) + [
+            [dirname, now] for dirname in previous_partitions.values() if dirname not in live]
+        expired = [dirname for dirname, retired_at in retired if now - retired_at >= self.retire_seconds]
+        retired = [entry for entry in retired if now - entry[1] < self.retire_seconds]
+
+        first_date = str(dates.min()) if not meta else min(meta['first_date'], str(dates.min()))
+        last_date = str(dates.max()) if not meta else max(meta['last_date'], str(dates.max()))
+        self._write_meta(symbol, adjust, {
+            'columns': names,
+            'first_date': first_date,
+            'last_date': last_date,
+            'synced_at': self.clock(),
+            'partitions': {str(year): dirname for year, dirname in sorted(partitions.items())},
+            'retired': retired,
+        })
+        for dirname in expired:
+            shutil.rmtree(os.path.join(symbol_dir, dirname), ignore_errors=True)
+        return len(df)
+
+    # ---------- 读取 ----------
+
+    def read(self, symbol: str, start_date=None, end_date=None, adjust: str = 'qfq') -> pd.DataFrame:
+        """
+        读取日期范围内的K线（mmap打开分区，只拷贝范围内的切片）
+        :param symbol: 股票代码
+        :param start_date: 开始日期（YYYYMMDD 或 YYYY-MM-DD），为空时不限
+        :param end_date: 结束日期，为空时不限
+        :param adjust: 复权方式
+        :return: DataFrame（列顺序与写入时一致，日期列为 datetime.date），无数据时为空DataFrame
+        """
+        for attempt in range(READ_RETRIES):
+            meta = self.read_meta(symbol, adjust)
+            if meta is None:
+                return pd.DataFrame()
+            try:
+                return self._read_version(symbol, meta, start_date, end_date, adjust)
+            except FileNotFoundError:
+                # 读取途中旧版本分区已过保留时间被删除，按最新元数据重读
+                if attempt == READ_RETRIES - 1:
+                    raise
+                logger.debug(f"[BarStore]{symbol}({adjust}) 读取时分区已更新，重新读取")
+
+    def _read_version(self, symbol: str, meta: dict, start_date, end_date, adjust: str) -> pd.DataFrame:
+        """按给定元数据版本读取日期范围内的K线"""
+        names = meta['columns']
+        start = _to_day(start_date) if start_date else np.datetime64(meta['first_date'], 'D')
+        end = _to_day(end_date) if end_date else np.datetime64(meta['last_date'], 'D')
+        if start > end:
+            return pd.DataFrame(columns=names)
+
+        symbol_dir = self._symbol_dir(symbol, adjust)
+        partitions = self._partition_dirs(symbol_dir, meta)
+        first_year = max(start.astype('datetime64[Y]').astype(int), np.datetime64(meta['first_date'], 'Y').astype(int)) + 1970
+        last_year = min(end.astype('datetime64[Y]').astype(int), np.datetime64(meta['last_date'], 'Y').astype(int)) + 1970
+        pieces = {name: [] for name in names}
+        for year in range(first_year, last_year + 1):
+            if year not in partitions:
+                continue
+            part = self._load_partition(symbol_dir, partitions[year], names, mmap=True)
+            part_dates = part[DATE_COLUMN]
+            lo = np.searchsorted(part_dates, start, side='left')
+            hi = np.searchsorted(part_dates, end, side='right')
+            if lo >= hi:
+                continue
+            for name in names:
+                pieces[name].append(np.array(part[name][lo:hi]))
+
+        if not pieces[DATE_COLUMN]:
+            return pd.DataFrame(columns=names)
+        data = {}
+        for name in names:
+            values = np.concatenate(pieces[name])
+            if name == DATE_COLUMN:
+                # 与 ak.stock_zh_a_hist 一致：日期列为 datetime.date
+                data[name] = pd.to_datetime(values).date
+            elif values.dtype.kind == 'U':
+                data[name] = values.astype(object)
+            else:
+                data[name] = values
+        return pd.DataFrame(data, columns=names)
+
+    # ---------- 同步 ----------
+
+    def _overlap_matches(self, symbol: str, adjust: str, fetched: pd.DataFrame, last_date: np.datetime64) -> bool:
+        """校验重叠K线的复权价格是否一致"""
+        if '收盘' not in fetched.columns:
+            return True
+        stored = self.read(symbol, _day_str(last_date), _day_str(last_date), adjust)
+        fetched_dates = pd.to_datetime(fetched[DATE_COLUMN]).values.astype('datetime64[D]')
+        overlap = fetched.loc[fetched_dates == last_date, '收盘']
+        if stored.empty or overlap.empty:
+            return True
+        stored_close = float(stored['收盘'].iloc[0])
+        fetched_close = float(overlap.iloc[0])
+        return abs(stored_close - fetched_close) <= ADJUST_TOLERANCE * max(abs(stored_close), 1.0)
+
+    def sync(self, symbol: str, fetcher: Fetcher, adjust: str = 'qfq', force: bool = False) -> int:
+        """
+        增量同步：只下载最后一根已存K线（含）之后的数据
+        :param symbol: 股票代码
+        :param fetcher: 取数函数 fetcher(start_date, end_date)
+        :param adjust: 复权方式
+        :param force: 忽略同步间隔
+        :return: 新写入的K线数量
+        """
+        # 文件锁覆盖整个同步过程：其他进程等待后会看到新的 synced_at，不会重复下载
+        with self._lock_for(symbol, adjust), self._file_lock(symbol, adjust):
+            meta = self.read_meta(symbol, adjust)
+            if meta is None:
+                df = fetcher(self.start_date, FULL_END_DATE)
+                written = self._write_locked(symbol, df, adjust, replace=True)
+                logger.info(f"[BarStore]{symbol}({adjust}) 全量同步 {written} 根K线")
+                return written
+
+            if not force and self.clock() - meta.get('synced_at', 0) < self.sync_seconds:
+                return 0
+
+            last_date = np.datetime64(meta['last_date'], 'D')
+            df = fetcher(_day_str(last_date), FULL_END_DATE)
+            if df is None or df.empty:
+                meta['synced_at'] = self.clock()
+                self._write_meta(symbol, adjust, meta)
+                return 0
+
+            if adjust and not self._overlap_matches(symbol, adjust, df, last_date):
+                # 发生除权除息，历史复权价格已变化，重新全量下载
+                df = fetcher(self.start_date, FULL_END_DATE)
+                written = self._write_locked(symbol, df, adjust, replace=True)
+                logger.info(f"[BarStore]{symbol}({adjust}) 复权价格变化，重新全量同步 {written} 根K线")
+                return written
+
+            written = self._write_locked(symbol, df, adjust)
+            logger.info(f"[BarStore]{symbol}({adjust}) 增量同步 {written} 根K线（自 {meta['last_date']}）")
+            return written
+
+    def get_history(self, symbol: str, fetcher: Fetcher, start_date=None, end_date=None, adjust: str = 'qfq') -> pd.DataFrame:
+        """
+        读穿式获取历史K线：按需同步后从本地读取；网络失败时返回本地已有数据
+        :param symbol: 股票代码
+        :param fetcher: 取数函数 fetcher(start_date, end_date)
+        :param start_date: 开始日期 YYYYMMDD
+        :param end_date: 结束日期 YYYYMMDD
+        :param adjust: 复权方式
+        :return: DataFrame
+        """
+        try:
+            self.sync(symbol, fetcher, adjust)
+        except Exception as e:
+            if self.read_meta(symbol, adjust) is None:
+                raise
+            logger.warning(f"[BarStore]{symbol}({adjust}) 同步失败，使用本地数据: {e}")
+        return self.read(symbol, start_date, end_date, adjust)
+
+
+# 进程内共享的K线存储
+bar_store = BarStore()
@@ -0,0 +1,253 @@
+# data_providers/cache.py
+"""
+数据源响应缓存层
+- 有界LRU：按条目数限制内存，超出时淘汰最久未使用的条目
+- 按方法配置TTL：资金流向秒级，股票列表按天，宏观数据到下一次发布
+  （概念板块列表由 concept_index、实时行情由 quote_snapshot 自行刷新，不在此缓存）
+- 单飞（single-flight）：同一个键的并发未命中只会触发一次真实请求，其余请求等待结果
+"""
+import os
+import threading
+import time
+import datetime
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Union
+
+import pandas as pd
+from core.logger import logger
+
+PROVIDER_CACHE_ENABLED = os.getenv("PROVIDER_CACHE_ENABLED", "True").lower() == "true"
+PROVIDER_CACHE_MAX_ENTRIES = int(os.getenv("PROVIDER_CACHE_MAX_ENTRIES", "256"))
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+# TTL 可以是秒数，也可以是根据当前时间计算过期时间戳的函数
+TTLPolicy = Union[float, Callable[[float], float]]
+
+
+def until_next_monthly_release(day: int, hour: int = 10) -> Callable[[float], float]:
+    """
+    月度数据：缓存到下一个发布日（每月day日hour点）
+    :param day: 每月发布日
+    :param hour: 发布时刻
+    """
+    def expiry(now: float) -> float:
+        current = datetime.datetime.fromtimestamp(now)
+        release = current.replace(day=day, hour=hour, minute=0, second=0, microsecond=0)
+        if release <= current:
+            year, month = (current.year + 1, 1) if current.month == 12 else (current.year, current.month + 1)
+            release = release.replace(year=year, month=month)
+        return release.timestamp()
+    return expiry
+
+
+def until_next_quarterly_release(day: int, hour: int = 10) -> Callable[[float], float]:
+    """
+    季度数据：缓存到下一个季度发布日（1/4/7/10月day日hour点）
+    :param day: 发布月份中的发布日
+    :param hour: 发布时刻
+    """
+    def expiry(now: float) -> float:
+        current = datetime.datetime.fromtimestamp(now)
+        for offset in range(0, 13):
+            year = current.year + (current.month - 1 + offset) // 12
+            month = (current.month - 1 + offset) % 12 + 1
+            if month not in (1, 4, 7, 10):
+                continue
+            release = datetime.datetime(year, month, day, hour)
+            if release > current:
+                return release.timestamp()
+        return now + 90 * DAY
+    return expiry
+
+
+# 各方法的缓存策略（未列出的方法不缓存）
+DEFAULT_CACHE_POLICIES: Dict[str, TTLPolicy] = {
+    'get_stock_fund_flow': 30,
+    'get_concept_constituent_stocks': MINUTE,
+    'get_news_sentiment': 5 * MINUTE,
+    'get_stock_history': 10 * MINUTE,
+    'get_dragon_tiger_list': HOUR,
+    'get_all_stocks': DAY,
+    'get_financial_report': DAY,
+    'get_macro_gdp_data': until_next_quarterly_release(day=20),
+    'get_macro_cpi_data': until_next_monthly_release(day=10),
+    'get_macro_ppi_data': until_next_monthly_release(day=10),
+    'get_macro_pmi_data': until_next_monthly_release(day=1),
+}
+
+
+def _copy_value(value):
+    """返回缓存值的副本，避免调用方修改DataFrame污染缓存"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    return value
+
+
+class _InFlight:
+    """进行中的请求（单飞等待对象）"""
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class TTLCache:
+    """
+    线程安全的TTL + LRU缓存
+    """
+    def __init__(self, max_entries: int = PROVIDER_CACHE_MAX_ENTRIES, clock: Callable[[], float] = time.time):
+        """
+        :param max_entries: 最大条目数
+        :param clock: 时钟函数（便于测试时注入）
+        """
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[Hashable, _InFlight] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'waits': 0, 'evictions': 0}
+
+    def _get_fresh(self, key: Hashable):
+        """读取未过期的条目（调用方持有锁），命中时移到LRU末尾"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _put(self, key: Hashable, value, ttl: TTLPolicy):
+        """写入条目并按LRU淘汰（调用方持有锁）"""
+        now = self.clock()
+        expires_at = ttl(now) if callable(ttl) else now + ttl
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], ttl: TTLPolicy):
+        """
+        读取缓存，未命中时调用loader加载；同一键的并发未命中只调用一次loader
+        :param key: 缓存键
+        :param loader: 加载函数
+        :param ttl: TTL秒数或过期时间计算函数
+        :return: 缓存值（DataFrame返回副本）
+        """
+        with self._lock:
+            found, value = self._get_fresh(key)
+            if found:
+                self.stats['hits'] += 1
+                return _copy_value(value)
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _InFlight()
+                self._in_flight[key] = flight
+                self.stats['misses'] += 1
+            else:
+                self.stats['waits'] += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return _copy_value(flight.value)
+
+        try:
+            value = loader()
+            flight.value = value
+            # 空结果不缓存，避免把数据源的临时故障缓存下来
+            if not (isinstance(value, (pd.DataFrame, pd.Series)) and value.empty) and value is not None:
+                with self._lock:
+                    self._put(key, value, ttl)
+            return _copy_value(value)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            flight.event.set()
+
+    def invalidate(self, prefix: Optional[Tuple] = None):
+        """
+        失效缓存
+        :param prefix: 键前缀（如 ('akshare',) 或 ('akshare', 'get_realtime_quotes')），为空时清空全部
+        """
+        with self._lock:
+            if prefix is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k[:len(prefix)] == prefix]:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _make_key(namespace: str, method_name: str, args: tuple, kwargs: dict) -> Tuple:
+    """构造缓存键，不可哈希的参数使用repr"""
+    def _hashable(value):
+        try:
+            hash(value)
+            return value
+        except TypeError:
+            return repr(value)
+    return (
+        namespace,
+        method_name,
+        tuple(_hashable(arg) for arg in args),
+        tuple(sorted((k, _hashable(v)) for k, v in kwargs.items()))
+    )
+
+
+class CachedProvider:
+    """
+    数据源缓存代理：按策略缓存指定方法的返回值，其余属性透明转发给被包装的数据源
+    """
+    def __init__(self, provider, namespace: str, cache: TTLCache,
+                 policies: Optional[Dict[str, TTLPolicy]] = None):
+        """
+        :param provider: 被包装的数据源实例
+        :param namespace: 缓存命名空间（一般为数据源名称）
+        :param cache: 共享缓存
+        :param policies: 方法名 -> TTL策略，默认使用 DEFAULT_CACHE_POLICIES
+        """
+        self._provider = provider
+        self._namespace = namespace
+        self._cache = cache
+        self._policies = DEFAULT_CACHE_POLICIES if policies is None else policies
+
+    def __getattr__(self, name):
+        attr = getattr(self._provider, name)
+        ttl = self._policies.get(name)
+        if ttl is None or not callable(attr):
+            return attr
+
+        @wraps(attr)
+        def cached_method(*args, **kwargs):
+            key = _make_key(self._namespace, name, args, kwargs)
+            return self._cache.get_or_load(key, lambda: attr(*args, **kwargs), ttl)
+        return cached_method
+
+    def invalidate(self, method_name: Optional[str] = None):
+        """失效该数据源（或其某个方法）的缓存"""
+        prefix = (self._namespace,) if method_name is None else (self._namespace, method_name)
+        self._cache.invalidate(prefix)
+
+    @property
+    def provider(self):
+        """被包装的原始数据源实例"""
+        return self._provider
+
+
+# 进程内共享缓存
+provider_cache = TTLCache()
@@ -0,0 +1,86 @@
+# data_providers/concept_index.py
+"""
+概念板块索引
+进程内共享的板块列表，按板块代码和板块名称双向索引，过期后在下次访问时刷新。
+"""
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+from core.logger import logger
+
+CONCEPT_INDEX_REFRESH_SECONDS = int(os.getenv("CONCEPT_INDEX_REFRESH_SECONDS", str(6 * 3600)))
+# 查不到标识符时允许提前刷新的最小间隔（新上线的板块）
+CONCEPT_INDEX_MISS_REFRESH_SECONDS = 300
+
+
+class ConceptIndex:
+    """概念板块索引：板块代码/板块名称 -> 板块信息，O(1) 查找"""
+
+    def __init__(self, loader: Callable[[], pd.DataFrame],
+                 refresh_seconds: int = CONCEPT_INDEX_REFRESH_SECONDS,
+                 code_col: str = '板块代码', name_col: str = '板块名称'):
+        """
+        :param loader: 板块列表加载函数（返回包含代码列和名称列的DataFrame）
+        :param refresh_seconds: 刷新周期（秒）
+        :param code_col: 板块代码列名
+        :param name_col: 板块名称列名
+        """
+        self.loader = loader
+        self.refresh_seconds = refresh_seconds
+        self.code_col = code_col
+        self.name_col = name_col
+        self._frame: Optional[pd.DataFrame] = None
+        self._by_code: Dict[str, Dict[str, str]] = {}
+        self._by_name: Dict[str, Dict[str, str]] = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _is_stale(self) -> bool:
+        return self._frame is None or time.time() - self._loaded_at >= self.refresh_seconds
+
+    def refresh(self) -> None:
+        """重新加载板块列表并重建索引"""
+        with self._lock:
+            self._refresh_locked()
+
+    def _refresh_locked(self) -> None:
+        frame = self.loader()
+        by_code, by_name = {}, {}
+        codes = frame[self.code_col].astype(str).tolist()
+        names = frame[self.name_col].astype(str).tolist()
+        for code, name in zip(codes, names):
+            info = {self.code_col: code, self.name_col: name}
+            # 与 DataFrame 过滤后取 iloc[0] 一致：重复键保留第一条
+            by_code.setdefault(code, info)
+            by_name.setdefault(name, info)
+        self._frame, self._by_code, self._by_name = frame, by_code, by_name
+        self._loaded_at = time.time()
+        logger.info(f"[ConceptIndex]板块索引已刷新，板块数量: {len(frame)}")
+
+    def _ensure_fresh(self) -> None:
+        if self._is_stale():
+            with self._lock:
+                # 双重检查，避免并发请求重复下载
+                if self._is_stale():
+                    self._refresh_locked()
+
+    def get_frame(self) -> pd.DataFrame:
+        """获取板块列表（副本）"""
+        self._ensure_fresh()
+        return self._frame.copy()
+
+    def resolve(self, identifier: str) -> Optional[Dict[str, str]]:
+        """
+        解析板块标识符（优先按板块代码，其次按板块名称）
+        :param identifier: 板块代码或板块名称
+        :return: {'板块代码': ..., '板块名称': ...}，无法识别时返回None
+        """
+        self._ensure_fresh()
+        info = self._by_code.get(identifier) or self._by_name.get(identifier)
+        if info is None and time.time() - self._loaded_at >= CONCEPT_INDEX_MISS_REFRESH_SECONDS:
+            self.refresh()
+            info = self._by_code.get(identifier) or self._by_name.get(identifier)
+        return dict(info) if info else None
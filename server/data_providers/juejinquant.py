@@ -5,6 +5,7 @@ import re
 from gm.api import *
 import pandas as pd
 from core.logger import logger
+from .rate_limit import get_rate_limiter
 from dotenv import load_dotenv
 # 加载 .env 文件
 load_dotenv()
@@ -14,9 +15,20 @@ class JueJinQuantProvider:
         初始化掘金量化客户端
         可以在这里加载 token 或连接远程服务
         """
+        self.refresh_client()
+
+    def refresh_client(self):
+        """
+        重新读取 token 并设置到掘金客户端（由数据源注册表在 token 变更时调用）
+        """
         token = os.getenv("MYQUANT_TOKEN")  # 获取环境变量
-        logger.info(f"MYQUANT_TOKEN value: {token}")  # 打印 token 值
+        logger.info(f"[Provider]{self.__class__.__name__} 初始化客户端，MYQUANT_TOKEN {'已配置' if token else '未配置'}")
         set_token(token)
+        self.token_configured = bool(token)
+
+    def health_check(self):
+        """token 是否已配置"""
+        return getattr(self, 'token_configured', False)
 
     def get_all_stocks(self, market=None):
         """
@@ -71,5 +83,6 @@ class JueJinQuantProvider:
         if not self.api_ready:
             raise RuntimeError("掘金API未正确初始化")
         from gm.api import history
+        get_rate_limiter('juejinquant').acquire()
         df = history(symbol=code, frequency=period, count=count, fields='open,high,low,close,volume', df=True)
         return df
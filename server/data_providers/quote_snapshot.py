@@ -0,0 +1,223 @@
+# data_providers/quote_snapshot.py
+"""
+实时行情快照
+后台线程按固定间隔下载全市场行情表，在内存中按股票代码建立索引：
+- 按代码读取是字典查找，不再为少量代码下载和分页整张表
+- 每次刷新生成一个版本号，记录本次有变化的代码，轮询方可按"自版本N以来的变化"增量读取
+"""
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+from core.logger import logger
+
+REALTIME_SNAPSHOT_ENABLED = os.getenv("REALTIME_SNAPSHOT_ENABLED", "True").lower() == "true"
+REALTIME_SNAPSHOT_REFRESH_SECONDS = float(os.getenv("REALTIME_SNAPSHOT_REFRESH_SECONDS", "5"))
+# 保留最近多少个版本的变化记录，更早的版本增量读取时返回全量
+REALTIME_SNAPSHOT_HISTORY = int(os.getenv("REALTIME_SNAPSHOT_HISTORY", "120"))
+# 没有监听器且超过多少秒无人读取时停止后台刷新，下次读取时再按需启动
+REALTIME_SNAPSHOT_IDLE_SECONDS = float(os.getenv("REALTIME_SNAPSHOT_IDLE_SECONDS", "300"))
+# 快照超过刷新间隔的多少倍仍未更新时（后台线程异常），读取方同步刷新
+STALE_FACTOR = 3
+
+
+def _parse_codes(codes) -> Optional[List[str]]:
+    """解析代码参数（逗号分隔字符串或列表），为空时返回None"""
+    if codes is None:
+        return None
+    code_list = codes.split(',') if isinstance(codes, str) else list(codes)
+    code_list = [str(code).strip() for code in code_list if str(code).strip()]
+    return code_list or None
+
+
+def _select_rows(frame: pd.DataFrame, positions: Dict[str, int],
+                 code_list: Optional[List[str]]) -> pd.DataFrame:
+    """按代码从同一版本的行情表和位置索引中取行（未知代码忽略），代码为空时返回全表副本"""
+    if code_list is None:
+        return frame.copy()
+    rows = [positions[code] for code in code_list if code in positions]
+    return frame.iloc[rows].reset_index(drop=True)
+
+
+def changed_codes(previous: Optional[pd.DataFrame], current: pd.DataFrame) -> Set[str]:
+    """
+    比较两次快照，返回有任一字段变化（含新增）的代码
+    :param previous: 上一次快照（以代码为索引）
+    :param current: 本次快照（以代码为索引）
+    """
+    if previous is None or list(previous.columns) != list(current.columns):
+        return set(current.index)
+    common = current.index.intersection(previous.index)
+    new_codes = set(current.index.difference(previous.index))
+    if len(common) == 0:
+        return new_codes
+    before = previous.loc[common]
+    after = current.loc[common]
+    # 两边同为缺失值视为未变化
+    differs = after.ne(before) & ~(after.isna() & before.isna())
+    return new_codes | set(common[differs.to_numpy().any(axis=1)])
+
+
+class QuoteSnapshot:
+    """
+    后台刷新的实时行情快照
+    """
+    def __init__(self, loader: Callable[[], pd.DataFrame],
+                 refresh_seconds: float = REALTIME_SNAPSHOT_REFRESH_SECONDS,
+                 history: int = REALTIME_SNAPSHOT_HISTORY, code_col: str = '代码',
+                 idle_seconds: float = REALTIME_SNAPSHOT_IDLE_SECONDS):
+        """
+        :param loader: 全市场行情加载函数
+        :param refresh_seconds: 刷新间隔（秒）
+        :param history: 保留的版本变化记录数
+        :param code_col: 代码列名
+        :param idle_seconds: 无监听器且无读取超过该秒数时停止后台刷新
+        """
+        self.loader = loader
+        self.refresh_seconds = refresh_seconds
+        self.idle_seconds = idle_seconds
+        self.code_col = code_col
+        self.version = 0
+        self.updated_at = 0.0
+        self._frame: Optional[pd.DataFrame] = None      # 原始行情表（保持原列和行顺序）
+        self._indexed: Optional[pd.DataFrame] = None    # 以代码为索引的副本，用于变化比较
+        self._positions: Dict[str, int] = {}
+        self._changes: Deque[Tuple[int, Set[str]]] = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._listeners: List[Callable[[int, Set[str]], None]] = []
+        self._last_read = 0.0
+
+    # ---------- 刷新 ----------
+
+    def refresh(self) -> int:
+        """
+        下载行情表并生成新版本
+        :return: 当前版本号
+        """
+        with self._refresh_lock:
+            frame = self.loader()
+            if frame is None or frame.empty:
+                logger.warning("[QuoteSnapshot]行情表为空，保留上一版本")
+                return self.version
+            frame = frame.reset_index(drop=True)
+            codes = frame[self.code_col].astype(str)
+            indexed = frame.set_index(codes, drop=False)
+            indexed = indexed[~indexed.index.duplicated(keep='first')]
+            changed = changed_codes(self._indexed, indexed)
+            positions = {code: i for i, code in reversed(list(enumerate(codes.tolist())))}
+            with self._lock:
+                self._frame, self._indexed, self._positions = frame, indexed, positions
+                self.version += 1
+                self.updated_at = time.time()
+                self._changes.append((self.version, changed))
+                version = self.version
+            listeners = list(self._listeners)
+        logger.debug(f"[QuoteSnapshot]版本 {version}，行数 {len(frame)}，变化 {len(changed)}")
+        for listener in listeners:
+            try:
+                listener(version, changed)
+            except Exception as e:
+                logger.error(f"[QuoteSnapshot]变化通知失败: {e}")
+        return version
+
+    def _run(self) -> None:
+        # 首个版本由 start 之前的同步加载生成，这里先等待一个间隔
+        while not self._stop.wait(self.refresh_seconds):
+            with self._lock:
+                if not self._listeners and time.time() - self._last_read > self.idle_seconds:
+                    # 置空后下一次读取会重新启动线程（判断与置空都在锁内，不会和读取方竞争）
+                    if self._thread is threading.current_thread():
+                        self._thread = None
+                    logger.info(f"[QuoteSnapshot]超过 {self.idle_seconds}s 无人读取，后台刷新已停止")
+                    return
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"[QuoteSnapshot]刷新失败: {e}")
+
+    def start(self) -> None:
+        """启动后台刷新线程（重复调用无副作用），未加载过或快照已过期时先同步加载一次"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._last_read = time.time()
+            self._thread = threading.Thread(target=self._run, name="quote-snapshot", daemon=True)
+            self._thread.start()
+        if self._frame is None or time.time() - self.updated_at > self.refresh_seconds:
+            self.refresh()
+        logger.info(f"[QuoteSnapshot]后台刷新已启动，间隔 {self.refresh_seconds}s")
+
+    def stop(self) -> None:
+        """停止后台刷新线程"""
+        self._stop.set()
+
+    def add_listener(self, listener: Callable[[int, Set[str]], None]) -> None:
+        """
+        注册变化监听器，每次刷新后以 (版本号, 变化代码集合) 调用（在刷新线程中执行，应尽快返回）
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[int, Set[str]], None]) -> None:
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def _ensure_ready(self) -> None:
+        """
+        首次读取或空闲停止后的读取：同步加载并启动后台线程；
+        后台线程失效导致快照过旧时同步刷新
+        """
+        with self._lock:
+            self._last_read = time.time()
+            idle_stopped = self._thread is None
+        if self._frame is None or idle_stopped:
+            self.start()
+        elif time.time() - self.updated_at > self.refresh_seconds * STALE_FACTOR:
+            self.refresh()
+
+    # ---------- 读取 ----------
+
+    def get_frame(self, codes=None) -> pd.DataFrame:
+        """
+        读取快照
+        :param codes: 股票代码（逗号分隔字符串或列表），为空时返回全表
+        :return: DataFrame（副本，行顺序与请求代码顺序一致，未知代码忽略）
+        """
+        self._ensure_ready()
+        with self._lock:
+            frame, positions = self._frame, self._positions
+        return _select_rows(frame, positions, _parse_codes(codes))
+
+    def changes_since(self, since_version: int, codes=None) -> Tuple[int, pd.DataFrame, bool]:
+        """
+        读取某个版本之后发生变化的行
+        :param since_version: 客户端已持有的版本号
+        :param codes: 只关心的股票代码，为空时不过滤
+        :return: (当前版本号, 变化的行, 是否为全量)；版本过旧（超出保留记录）时返回全量
+        """
+        self._ensure_ready()
+        with self._lock:
+            frame, positions, version = self._frame, self._positions, self.version
+            changes = list(self._changes)
+        code_list = _parse_codes(codes)
+        oldest = changes[0][0] if changes else version + 1
+        if since_version < oldest - 1 or since_version > version:
+            # 使用与 version 同一次加锁取得的行情表，避免返回比版本号更新的数据
+            return version, _select_rows(frame, positions, code_list), True
+
+        changed: Set[str] = set()
+        for change_version, change_codes in changes:
+            if change_version > since_version:
+                changed |= change_codes
+        if code_list is not None:
+            changed &= set(code_list)
+        rows = sorted(positions[code] for code in changed if code in positions)
+        return version, frame.iloc[rows].reset_index(drop=True), False
@@ -0,0 +1,75 @@
+# data_providers/rate_limit.py
+"""
+数据源请求限速（令牌桶）
+每个数据源一个进程内共享的限速器，批量并发取数时控制对上游接口的请求频率
+"""
+import os
+import threading
+import time
+from typing import Callable, Dict
+
+# 各数据源默认每秒请求数，可用环境变量 PROVIDER_RATE_LIMIT_{NAME} 覆盖（0表示不限速）
+DEFAULT_RATE_LIMITS: Dict[str, float] = {
+    'akshare': 5,
+    'tushare': 8,       # 500次/分钟
+    'juejinquant': 10,
+    'yfinance': 2,
+}
+
+
+class RateLimiter:
+    """
+    线程安全的令牌桶限速器
+    """
+    def __init__(self, rate: float, burst: int = 1,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        """
+        :param rate: 每秒补充的令牌数（0表示不限速）
+        :param burst: 桶容量（允许的瞬时突发请求数）
+        :param clock: 时钟函数（便于测试时注入）
+        :param sleep: 等待函数（便于测试时注入）
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = float(self.burst)
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        获取一个令牌，令牌不足时阻塞等待
+        :return: 本次等待的秒数
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            # 先扣减再等待：令牌可为负数，后来者依次排在更晚的时间点
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str) -> RateLimiter:
+    """
+    获取数据源的共享限速器
+    :param name: 数据源名称
+    :return: RateLimiter
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            rate = float(os.getenv(f"PROVIDER_RATE_LIMIT_{name.upper()}", DEFAULT_RATE_LIMITS.get(name, 0)))
+            limiter = RateLimiter(rate=rate, burst=max(1, int(rate)))
+            _limiters[name] = limiter
+        return limiter
@@ -0,0 +1,143 @@
+# data_providers/registry.py
+"""
+数据源实例注册表
+- 每个数据源在进程内只构造一次，跨请求复用（首次使用时才构造）
+- 线程安全：同一数据源的并发首次访问只会触发一次构造
+- 生命周期钩子：health() 查看状态，refresh() 重建客户端（如token变更、连接失效）
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from core.logger import logger
+from .cache import CachedProvider, TTLCache, provider_cache
+
+
+class _ProviderSlot:
+    """单个数据源的实例槽位"""
+    def __init__(self, factory: Callable[[], Any]):
+        self.factory = factory
+        self.instance = None
+        self.cached_instance: Optional[CachedProvider] = None
+        self.created_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.lock = threading.Lock()
+
+
+class ProviderRegistry:
+    """
+    数据源注册表：名称 -> 懒加载的单例实例
+    """
+    def __init__(self, cache: TTLCache = provider_cache):
+        """
+        :param cache: 缓存代理使用的共享缓存
+        """
+        self.cache = cache
+        self._slots: Dict[str, _ProviderSlot] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        """
+        注册数据源（重复注册会替换工厂并丢弃已构造的实例）
+        :param name: 数据源名称
+        :param factory: 构造函数（一般为数据源类）
+        """
+        with self._lock:
+            self._slots[name] = _ProviderSlot(factory)
+
+    def names(self):
+        return list(self._slots.keys())
+
+    def _get_slot(self, name: str) -> _ProviderSlot:
+        slot = self._slots.get(name)
+        if slot is None:
+            raise ValueError(f"Unsupported data provider: {name}")
+        return slot
+
+    def _build_locked(self, name: str, slot: _ProviderSlot) -> None:
+        """构造数据源实例（调用方持有slot锁）"""
+        start = time.perf_counter()
+        try:
+            instance = slot.factory()
+        except Exception as e:
+            slot.last_error = str(e)
+            logger.error(f"[ProviderRegistry]{name} 初始化失败: {e}")
+            raise
+        cached_instance = CachedProvider(instance, namespace=name, cache=self.cache)
+        # 先发布代理再发布实例：无锁读取到 instance 时 cached_instance 一定已就绪
+        slot.cached_instance = cached_instance
+        slot.instance = instance
+        slot.created_at = time.time()
+        slot.last_error = None
+        logger.info(f"[ProviderRegistry]{name} 已初始化，耗时 {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def get(self, name: str, use_cache: bool = True):
+        """
+        获取数据源实例（首次访问时构造）
+        :param name: 数据源名称
+        :param use_cache: 是否返回带响应缓存的代理
+        :return: 数据源实例或 CachedProvider 代理
+        """
+        slot = self._get_slot(name)
+        attr = 'cached_instance' if use_cache else 'instance'
+        # 无锁快速路径检查的是实际返回的属性
+        provider = getattr(slot, attr)
+        if provider is None:
+            with slot.lock:
+                # 双重检查，避免并发请求重复构造客户端
+                provider = getattr(slot, attr)
+                if provider is None:
+                    self._build_locked(name, slot)
+                    provider = getattr(slot, attr)
+        return provider
+
+    def refresh(self, name: str, clear_cache: bool = True) -> None:
+        """
+        重建数据源客户端
+        数据源实现了 refresh_client() 时原地刷新，否则重新构造实例
+        :param name: 数据源名称
+        :param clear_cache: 是否同时清空该数据源的响应缓存
+        """
+        slot = self._get_slot(name)
+        with slot.lock:
+            instance = slot.instance
+            if instance is not None and hasattr(instance, 'refresh_client'):
+                try:
+                    instance.refresh_client()
+                    slot.created_at = time.time()
+                    slot.last_error = None
+                    logger.info(f"[ProviderRegistry]{name} 客户端已刷新")
+                except Exception as e:
+                    slot.last_error = str(e)
+                    logger.error(f"[ProviderRegistry]{name} 客户端刷新失败: {e}")
+                    raise
+            else:
+                self._build_locked(name, slot)
+        if clear_cache:
+            self.cache.invalidate((name,))
+
+    def health(self, name: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        查看数据源状态（不会触发构造）
+        数据源实现了 health_check() 时附带其检查结果
+        :param name: 数据源名称，为空时返回全部
+        :return: {名称: {'initialized', 'created_at', 'last_error', 'healthy'}}
+        """
+        names = [name] if name else self.names()
+        report = {}
+        for provider_name in names:
+            slot = self._get_slot(provider_name)
+            status = {
+                'initialized': slot.instance is not None,
+                'created_at': slot.created_at,
+                'last_error': slot.last_error,
+                'healthy': slot.last_error is None,
+            }
+            if slot.instance is not None and hasattr(slot.instance, 'health_check'):
+                try:
+                    status['healthy'] = bool(slot.instance.health_check())
+                except Exception as e:
+                    status['healthy'] = False
+                    status['last_error'] = str(e)
+            report[provider_name] = status
+        return report
@@ -2,16 +2,27 @@ import os
 import tushare as ts
 import pandas as pd
 from core.logger import logger
+from .rate_limit import get_rate_limiter
 from dotenv import load_dotenv
 # 加载 .env 文件
 load_dotenv()
 class TushareProvider:
     def __init__(self):
+        self.refresh_client()
+
+    def refresh_client(self):
+        """
+        重新读取 token 并创建 pro_api 客户端（由数据源注册表在 token 变更或连接失效时调用）
+        """
         token = os.getenv("TUSHARE_TOKEN")  # 获取环境变量
-        logger.info(f"TUSHARE_TOKEN value: {token}")  # 打印 token 值
+        logger.info(f"[Provider]{self.__class__.__name__} 初始化客户端，TUSHARE_TOKEN {'已配置' if token else '未配置'}")
         ts.set_token(token)
         self.pro = ts.pro_api()
 
+    def health_check(self):
+        """客户端是否已创建"""
+        return getattr(self, 'pro', None) is not None
+
     # 可用，1分钟限制
     def get_all_stocks(self, market=None):
         """
@@ -54,6 +65,7 @@ class TushareProvider:
         """
         logger.info(f"[Provider]source={source}, code={code}, market={market}, start_date={start_date}, end_date={end_date}")
         ts_code = f"{code}.{market}"
+        get_rate_limiter('tushare').acquire()
         df = self.pro.daily(ts_code=ts_code, start_date=start_date, end_date=end_date)
         logger.info(f"[Provider]列名: {df.columns.tolist()}")
         logger.info(f"[Provider]行数: {len(df)}")
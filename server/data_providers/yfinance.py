@@ -1,6 +1,7 @@
 import yfinance as yf
 import pandas as pd
 from core.logger import logger
+from .rate_limit import get_rate_limiter
 
 # 似乎要翻墙
 class YFinanceProvider:
@@ -27,6 +28,7 @@ class YFinanceProvider:
         :return: DataFrame
         """
         logger.info(f"[Provider]source={source}, code={code}, market={market}, start_date={start_date}, end_date={end_date}")
+        get_rate_limiter('yfinance').acquire()
         df = yf.download(code, start=start_date, end=end_date)
         df.reset_index(inplace=True)
         logger.info(f"[Provider]列名: {df.columns.tolist()}")